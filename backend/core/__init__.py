@@ -0,0 +1,11 @@
+from .rate_limiter import TokenBucket, get_rate_limiter
+from .cache import ResponseCache, response_cache
+from .http_client import HttpClient, http_client
+from .bandwidth import BandwidthGovernor, INTERACTIVE, BATCH
+from .loop_monitor import LoopLagMonitor, loop_monitor
+from .deadline import (
+    DeadlineExceeded, deadline_scope, partial_result, remaining, within_deadline
+)
+from .singleflight import SingleFlight
+from .upstream import get_json, upstream_flights
+from .swr import StaleWhileRevalidate
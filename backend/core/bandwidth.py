@@ -0,0 +1,123 @@
+"""
+Bant genişliği yöneticisi
+Byte bazlı token-bucket; bekleyenler öncelik sınıfına göre sıralanır,
+böylece arayüzden tetiklenen indirmeler toplu işlerin önüne geçer
+"""
+import time
+import heapq
+import asyncio
+import itertools
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Öncelik sınıfları (küçük değer önce hizmet alır)
+INTERACTIVE = 0
+BATCH = 1
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+# Kova kapasitesi: yarım saniyelik trafik, en az 64 KB
+BURST_SECONDS = 0.5
+MIN_BURST = 64 * 1024
+
+
+class ByteRateLimiter:
+    """
+    Saniyede `rate` byte izin veren kova. Parça boyutu bilinmeden okunduğu
+    için bakiye eksiye düşebilir; borç ödenene kadar sonraki bekleyenler
+    öncelik sırasıyla bekletilir.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(rate * BURST_SECONDS, MIN_BURST)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+        # (öncelik, sıra, byte, future)
+        self._waiters: List[Tuple[int, int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def consume(self, nbytes: int, priority: int = BATCH):
+        """Bakiye uygunsa hemen, değilse öncelik sırasıyla bekleyerek tüket"""
+        self._refill()
+        if not self._waiters and self._tokens > 0:
+            self._tokens -= nbytes
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), nbytes, future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self):
+        while self._waiters:
+            _, _, nbytes, future = self._waiters[0]
+            if future.done():
+                # İptal edilmiş bekleyen
+                heapq.heappop(self._waiters)
+                continue
+
+            self._refill()
+            if self._tokens > 0:
+                heapq.heappop(self._waiters)
+                self._tokens -= nbytes
+                future.set_result(None)
+                continue
+
+            await asyncio.sleep(max(-self._tokens / self.rate, 0.005))
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+
+class BandwidthGovernor:
+    """Genel ve (opsiyonel) host bazlı byte hız sınırları"""
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        host_rates: Optional[Dict[str, float]] = None
+    ):
+        # rate None ise genel sınır yok; öncelik yalnızca sınır varken anlamlı
+        self.rate = rate
+        self.host_rates = dict(host_rates or {})
+        self._global = ByteRateLimiter(rate) if rate else None
+        self._hosts: Dict[str, ByteRateLimiter] = {}
+        self._bytes = {name: 0 for name in PRIORITY_NAMES.values()}
+
+    def _host_limiter(self, url: str) -> Optional[ByteRateLimiter]:
+        host = urlsplit(url).netloc.lower()
+        rate = self.host_rates.get(host)
+        if not rate:
+            return None
+        if host not in self._hosts:
+            self._hosts[host] = ByteRateLimiter(rate)
+        return self._hosts[host]
+
+    async def consume(self, url: str, nbytes: int, priority: int = BATCH):
+        """Alınan `nbytes` için hem host hem genel bütçeden pay al"""
+        self._bytes[PRIORITY_NAMES.get(priority, "batch")] += nbytes
+
+        host_limiter = self._host_limiter(url)
+        if host_limiter is not None:
+            await host_limiter.consume(nbytes, priority)
+        if self._global is not None:
+            await self._global.consume(nbytes, priority)
+
+    def get_stats(self) -> dict:
+        return {
+            "rate": self.rate,
+            "host_rates": self.host_rates,
+            "bytes": dict(self._bytes),
+            "waiting": (self._global.waiting if self._global else 0)
+                       + sum(limiter.waiting for limiter in self._hosts.values()),
+        }
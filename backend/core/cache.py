@@ -0,0 +1,241 @@
+"""
+Upstream API yanıt önbelleği
+Bellekte sınırlı bir LRU, arkasında data/ altında SQLite deposu
+"""
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+# Proje kök dizini
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CACHE_DB_PATH = os.path.join(BASE_DIR, "data", "http_cache.db")
+
+# Kaynak bazlı yaşam süreleri (saniye)
+SOURCE_TTLS = {
+    "wikimedia": 6 * 3600,
+    "nara": 12 * 3600,
+    "archive_org": 12 * 3600,
+}
+DEFAULT_TTL = 3600
+
+
+def make_cache_key(url: str, params: Optional[dict] = None) -> str:
+    """URL ve parametreleri normalize ederek sabit bir anahtar üret"""
+    parts = urlsplit(url)
+    normalized_url = urlunsplit((
+        parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", "", ""
+    ))
+
+    items = []
+    for key in sorted((params or {}).keys()):
+        value = params[key]
+        # Liste parametreleri (ör. fl[]) sırası korunarak tek tek eklenir
+        values = value if isinstance(value, (list, tuple)) else [value]
+        items.extend((str(key), str(v)) for v in values)
+
+    raw = normalized_url + "?" + json.dumps(items, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """TTL'li, boyut sınırlı iki katmanlı (bellek + SQLite) önbellek"""
+
+    def __init__(
+        self,
+        db_path: str = CACHE_DB_PATH,
+        max_memory_entries: int = 512,
+        max_memory_bytes: int = 32 * 1024 * 1024,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        ttls: Optional[Dict[str, int]] = None
+    ):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.ttls = dict(SOURCE_TTLS, **(ttls or {}))
+
+        # key -> (expires_at, size, value)
+        self._memory: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes_since_evict = 0
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    def ttl_for(self, source: str) -> int:
+        return self.ttls.get(source, DEFAULT_TTL)
+
+    # ---------- Bellek katmanı ----------
+
+    def _memory_get(self, key: str) -> Optional[Any]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, size, value = entry
+        if expires_at < time.time():
+            self._memory_pop(key)
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _memory_put(self, key: str, value: Any, size: int, expires_at: float):
+        if size > self.max_memory_bytes:
+            return
+        self._memory_pop(key)
+        self._memory[key] = (expires_at, size, value)
+        self._memory_bytes += size
+
+        while (len(self._memory) > self.max_memory_entries
+               or self._memory_bytes > self.max_memory_bytes):
+            oldest = next(iter(self._memory))
+            self._memory_pop(oldest)
+            self.stats["evictions"] += 1
+
+    def _memory_pop(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+
+    # ---------- SQLite katmanı ----------
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_responses_accessed ON responses (accessed_at)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _disk_get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._db_lock:
+            conn = self._get_conn()
+            row = conn.execute(
+                "SELECT body, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            conn.commit()
+            return row[0], row[1]
+
+    def _disk_put(self, key: str, source: str, url: str, body: str, expires_at: float):
+        with self._db_lock:
+            conn = self._get_conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, source, url, body, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, source, url, body, len(body), expires_at, time.time())
+            )
+            conn.commit()
+
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= 50:
+                self._writes_since_evict = 0
+                self._evict_disk(conn)
+
+    def _evict_disk(self, conn: sqlite3.Connection):
+        """Süresi dolanları sil, boyut sınırı aşılırsa en eski erişilenleri at"""
+        conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+        if total > self.max_disk_bytes:
+            excess = total - self.max_disk_bytes
+            freed = 0
+            doomed = []
+            for key, size in conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+            ):
+                doomed.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+            self.stats["evictions"] += len(doomed)
+        conn.commit()
+
+    # ---------- Genel API ----------
+
+    async def get(self, url: str, params: Optional[dict] = None) -> Optional[Any]:
+        """Önbellekteki yanıtı döndür, yoksa None"""
+        key = make_cache_key(url, params)
+
+        value = self._memory_get(key)
+        if value is not None:
+            self.stats["memory_hits"] += 1
+            return value
+
+        row = await asyncio.to_thread(self._disk_get, key)
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+
+        body, expires_at = row
+        value = json.loads(body)
+        self._memory_put(key, value, len(body), expires_at)
+        self.stats["disk_hits"] += 1
+        return value
+
+    async def set(self, source: str, url: str, params: Optional[dict], value: Any):
+        """Yanıtı kaynağın TTL'i ile iki katmana da yaz"""
+        key = make_cache_key(url, params)
+        body = json.dumps(value, ensure_ascii=False)
+        expires_at = time.time() + self.ttl_for(source)
+
+        self._memory_put(key, value, len(body), expires_at)
+        await asyncio.to_thread(self._disk_put, key, source, url, body, expires_at)
+        self.stats["stores"] += 1
+
+    def get_stats(self) -> dict:
+        lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        return {
+            **self.stats,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+        }
+
+    def close(self):
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Tüm scraperların paylaştığı önbellek
+response_cache = ResponseCache()
@@ -0,0 +1,72 @@
+"""
+İstek süre bütçesi (deadline)
+Endpoint'te açılan bütçe contextvar ile tüm scraper çağrılarına taşınır
+"""
+import time
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+# Mutlak bitiş zamanı (time.monotonic), bütçe yoksa None
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """İstek bütçesi tükendi"""
+
+
+def partial_result(items_key: str = "images", **fields) -> dict:
+    """
+    Bütçe dolduğunda scraper'ın döndürdüğü yanıt: hata sayılmaz,
+    boş ve kısmi (partial) sonuç olarak işaretlenir.
+    """
+    return {"success": True, items_key: [], "total": 0, "partial": True, **fields}
+
+
+@contextmanager
+def deadline_scope(timeout_ms: Optional[int]):
+    """
+    Blok boyunca geçerli bir bütçe aç. İç içe kullanımda daha sıkı olan
+    bitiş zamanı geçerlidir; None bütçe eklemez.
+    """
+    if timeout_ms is None:
+        yield
+        return
+
+    new_deadline = time.monotonic() + timeout_ms / 1000
+    current = _deadline.get()
+    if current is not None:
+        new_deadline = min(current, new_deadline)
+
+    token = _deadline.set(new_deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Kalan süre (saniye); bütçe yoksa None"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+async def within_deadline(awaitable):
+    """Awaitable'ı kalan bütçe içinde bekle; süre dolarsa DeadlineExceeded"""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        # Başlatılmamış coroutine'i kapat (uyarı üretmesin)
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded()
+    try:
+        return await asyncio.wait_for(awaitable, timeout=left)
+    except asyncio.TimeoutError as e:
+        raise DeadlineExceeded() from e
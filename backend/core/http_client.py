@@ -0,0 +1,114 @@
+"""
+Ortak HTTP istemcisi
+Scraperlar ve indirme servisi host bazlı bağlantı havuzlarını paylaşır
+"""
+import asyncio
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+# Bütçe verilmemiş çağrılar için üst sınır
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=30, sock_connect=10)
+
+# Host başına eşzamanlı bağlantı sınırları
+HOST_CONNECTION_LIMITS = {
+    "commons.wikimedia.org": 8,
+    "upload.wikimedia.org": 6,
+    "catalog.archives.gov": 4,
+    "archive.org": 4,
+}
+DEFAULT_CONNECTION_LIMIT = 4
+
+# DNS çözümlemelerinin önbellekte tutulma süresi (saniye)
+DNS_CACHE_TTL = 300
+
+# Boştaki keep-alive bağlantılarının açık tutulma süresi (saniye)
+KEEPALIVE_TIMEOUT = 30
+
+
+def _host_of(url_or_host: str) -> str:
+    if "://" in url_or_host:
+        return urlsplit(url_or_host).netloc.lower()
+    return url_or_host.lower()
+
+
+class HttpClient:
+    """Host başına bağlantı havuzu ve başlık profili başına session yönetimi"""
+
+    def __init__(
+        self,
+        connection_limits: Optional[Dict[str, int]] = None,
+        dns_cache_ttl: int = DNS_CACHE_TTL,
+        keepalive_timeout: float = KEEPALIVE_TIMEOUT
+    ):
+        self.connection_limits = dict(HOST_CONNECTION_LIMITS, **(connection_limits or {}))
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+
+        self._connectors: Dict[str, aiohttp.TCPConnector] = {}
+        # (host, başlıklar) -> session; session'lar host'un havuzunu paylaşır
+        self._sessions: Dict[Tuple[str, tuple], aiohttp.ClientSession] = {}
+
+    def _connector(self, host: str) -> aiohttp.TCPConnector:
+        connector = self._connectors.get(host)
+        if connector is None or connector.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limits.get(host, DEFAULT_CONNECTION_LIMIT),
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._connectors[host] = connector
+        return connector
+
+    def session(
+        self,
+        url_or_host: str,
+        headers: Optional[Dict[str, str]] = None
+    ) -> aiohttp.ClientSession:
+        """
+        Host için paylaşılan session'ı döndür (yoksa oluştur).
+        Aynı host'a farklı başlıklarla giden session'lar aynı havuzu kullanır.
+        """
+        host = _host_of(url_or_host)
+        key = (host, tuple(sorted((headers or {}).items())))
+
+        session = self._sessions.get(key)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=self._connector(host),
+                connector_owner=False,
+                headers=headers,
+                timeout=DEFAULT_TIMEOUT
+            )
+            self._sessions[key] = session
+        return session
+
+    def get_stats(self) -> dict:
+        return {
+            "hosts": {
+                host: {
+                    "limit": connector.limit,
+                    "sessions": sum(1 for (h, _), s in self._sessions.items()
+                                    if h == host and not s.closed),
+                }
+                for host, connector in self._connectors.items() if not connector.closed
+            }
+        }
+
+    async def close(self):
+        """Tüm session'ları ve bağlantı havuzlarını kapat"""
+        await asyncio.gather(
+            *[session.close() for session in self._sessions.values() if not session.closed],
+            return_exceptions=True
+        )
+        await asyncio.gather(
+            *[connector.close() for connector in self._connectors.values() if not connector.closed],
+            return_exceptions=True
+        )
+        self._sessions.clear()
+        self._connectors.clear()
+
+
+# Uygulama genelinde paylaşılan istemci
+http_client = HttpClient()
@@ -0,0 +1,62 @@
+"""
+Olay döngüsü gecikme ölçümü
+Düzenli aralıklarla uyuyan bir görev, planlanandan ne kadar geç uyandığını
+kaydeder; bloklayan kod (disk, CPU) bu gecikmede görünür
+"""
+import time
+import asyncio
+from collections import deque
+from typing import Deque, Optional
+
+# Ölçüm aralığı (saniye) ve saklanan örnek sayısı (~1 dakika)
+SAMPLE_INTERVAL = 0.5
+WINDOW_SIZE = 120
+
+
+class LoopLagMonitor:
+    """Olay döngüsünün gecikmesini örnekleyen arka plan görevi"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, window: int = WINDOW_SIZE):
+        self.interval = interval
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - expected)
+            self._samples.append(lag)
+            self._max_lag = max(self._max_lag, lag)
+
+    def get_stats(self) -> dict:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"samples": 0}
+
+        def percentile(p: float) -> float:
+            return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+        return {
+            "samples": len(samples),
+            "last_ms": round(self._samples[-1] * 1000, 1),
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 1),
+            "p95_ms": round(percentile(0.95) * 1000, 1),
+            "max_ms": round(samples[-1] * 1000, 1),
+            "max_since_start_ms": round(self._max_lag * 1000, 1),
+        }
+
+
+# Uygulama genelinde tek ölçer
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,55 @@
+"""
+Host bazlı token-bucket hız sınırlayıcı
+Aynı upstream sunucuya giden tüm istekler tek bir bütçeyi paylaşır
+"""
+import asyncio
+import time
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Saniyede `rate` token üreten, en fazla `capacity` token biriktiren kova"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Yeterli token birikene kadar bekle ve tüket"""
+        # Lock FIFO olduğu için bekleyenler sırayla hizmet alır
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+# Host bazlı limitler: (saniyedeki istek, anlık patlama kapasitesi)
+HOST_LIMITS: Dict[str, Tuple[float, float]] = {
+    "commons.wikimedia.org": (8.0, 10.0),
+    "catalog.archives.gov": (2.0, 3.0),
+    "archive.org": (2.0, 3.0),
+}
+DEFAULT_LIMIT: Tuple[float, float] = (2.0, 2.0)
+
+_limiters: Dict[str, TokenBucket] = {}
+
+
+def get_rate_limiter(url_or_host: str) -> TokenBucket:
+    """Host için paylaşılan limiter'ı döndür (URL de verilebilir)"""
+    host = urlparse(url_or_host).hostname or url_or_host
+    if host not in _limiters:
+        rate, capacity = HOST_LIMITS.get(host, DEFAULT_LIMIT)
+        _limiters[host] = TokenBucket(rate, capacity)
+    return _limiters[host]
@@ -0,0 +1,38 @@
+"""
+Aynı anda yapılan özdeş çağrıları tek bir uçuştaki göreve bağlayan yardımcı
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Anahtar başına en fazla bir çalışan çağrı; diğerleri sonucunu paylaşır"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"calls": 0, "shared": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """fn'i çalıştır; aynı anahtarla süren bir çağrı varsa onun sonucunu bekle"""
+        self.stats["calls"] += 1
+
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        else:
+            self.stats["shared"] += 1
+
+        # Bir bekleyenin iptal edilmesi diğerlerinin sonucunu iptal etmesin
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Kimse beklemiyorsa "exception never retrieved" uyarısını engelle
+        if not future.cancelled():
+            future.exception()
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "in_flight": len(self._calls)}
@@ -0,0 +1,101 @@
+"""
+Stale-while-revalidate önbelleği
+Son başarılı sonucu anında döndürür, tazeliği geçmişse arka planda yeniler
+"""
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .cache import ResponseCache, response_cache
+
+# Eski sonuçların diskte tutulma süresi (saniye)
+SWR_RETENTION = 7 * 24 * 3600
+
+
+class StaleWhileRevalidate:
+    """Anahtar başına tek yenileme ile bayat-ama-hızlı sonuç sunumu"""
+
+    def __init__(
+        self,
+        namespace: str,
+        fresh_ttl: float,
+        store: ResponseCache = response_cache
+    ):
+        self.namespace = namespace
+        self.fresh_ttl = fresh_ttl
+        self.store = store
+        self.store.ttls.setdefault(f"swr:{namespace}", SWR_RETENTION)
+
+        # key -> (stored_at, value)
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def _store_url(self, key: str) -> str:
+        return f"swr://{self.namespace}/{key}"
+
+    async def _load_entry(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        # Yeniden başlatma sonrası diskteki son sonuç
+        persisted = await self.store.get(self._store_url(key))
+        if persisted is not None:
+            entry = (persisted["stored_at"], persisted["value"])
+            self._entries[key] = entry
+        return entry
+
+    def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Anahtar için tek bir yenileme görevi başlat (varsa mevcut olanı döndür)"""
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+
+        async def run():
+            try:
+                value = await loader()
+                if value.get("success"):
+                    stored_at = time.time()
+                    self._entries[key] = (stored_at, value)
+                    await self.store.set(
+                        f"swr:{self.namespace}",
+                        self._store_url(key),
+                        None,
+                        {"stored_at": stored_at, "value": value}
+                    )
+                return value
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.create_task(run())
+        task.add_done_callback(_log_refresh_error)
+        self._inflight[key] = task
+        return task
+
+    async def get(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[dict]]
+    ) -> Tuple[dict, dict]:
+        """
+        Sonucu ve önbellek bilgisini döndür.
+        Hiç sonuç yoksa yükleme beklenir; bayat sonuç varsa anında döner.
+        """
+        entry = await self._load_entry(key)
+
+        if entry is None:
+            value = await asyncio.shield(self._refresh(key, loader))
+            return value, {"stale": False, "age": 0}
+
+        stored_at, value = entry
+        age = time.time() - stored_at
+        stale = age > self.fresh_ttl
+        if stale:
+            self._refresh(key, loader)
+
+        return value, {"stale": stale, "age": int(age)}
+
+
+def _log_refresh_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Arka plan yenileme hatası: {task.exception()}")
@@ -0,0 +1,59 @@
+"""
+Upstream API çağrıları için ortak yardımcı
+Önbellek ve host bazlı hız sınırı tek noktada uygulanır
+"""
+from typing import Any, Optional, Tuple
+
+import aiohttp
+
+from .cache import make_cache_key, response_cache
+from .deadline import within_deadline
+from .rate_limiter import get_rate_limiter
+from .singleflight import SingleFlight
+
+# Scraper seviyesindeki özdeş HTTP çağrıları
+upstream_flights = SingleFlight()
+
+
+async def get_json(
+    session: aiohttp.ClientSession,
+    url: str,
+    params: Optional[dict] = None,
+    source: str = "default",
+    use_cache: bool = True
+) -> Tuple[int, Optional[Any]]:
+    """
+    GET isteği at ve (status, json) döndür.
+    Başarılı yanıtlar önbelleğe yazılır; önbellekten gelen yanıtlar 200 sayılır.
+    Aynı anda yapılan özdeş istekler tek bir upstream çağrısını paylaşır.
+    Etkin bir istek bütçesi varsa yalnızca kalan süre kadar beklenir ve
+    DeadlineExceeded fırlatılır; paylaşılan çağrı sürer ve önbelleği doldurur.
+    """
+    key = (make_cache_key(url, params), use_cache)
+    return await within_deadline(upstream_flights.do(
+        key, lambda: _fetch_json(session, url, params, source, use_cache)
+    ))
+
+
+async def _fetch_json(
+    session: aiohttp.ClientSession,
+    url: str,
+    params: Optional[dict],
+    source: str,
+    use_cache: bool
+) -> Tuple[int, Optional[Any]]:
+    if use_cache:
+        cached = await response_cache.get(url, params)
+        if cached is not None:
+            return 200, cached
+
+    await get_rate_limiter(url).acquire()
+
+    async with session.get(url, params=params) as response:
+        if response.status != 200:
+            return response.status, None
+        data = await response.json(content_type=None)
+
+    if use_cache:
+        await response_cache.set(source, url, params, data)
+    return 200, data
@@ -1,2 +1,4 @@
-from .database import init_db, get_db, get_db_session, SessionLocal
-from .models import Base, Category, Image, SearchHistory, DownloadQueue
+from .database import (
+    init_db, close_db, get_db, get_db_session, get_async_db, SessionLocal, AsyncSessionLocal
+)
+from .models import Base, Category, Image, SearchHistory, DownloadQueue, HarvestJob, CategorySyncState
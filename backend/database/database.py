@@ -2,12 +2,13 @@
 Veritabanı bağlantı yönetimi
 """
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from contextlib import contextmanager
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from contextlib import asynccontextmanager, contextmanager
 
 from .models import Base, Category
+from .migrations import run_migrations
 
 # Proje kök dizini
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -18,13 +19,64 @@ os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
 # SQLite bağlantısı
 DATABASE_URL = f"sqlite:///{DB_PATH}"
-engine = create_engine(DATABASE_URL, echo=False)
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DB_PATH}"
+
+# Bağlantı başına ayarlar: WAL okuyucuları yazara karşı bekletmez,
+# synchronous=NORMAL WAL'da yalnızca checkpoint'te fsync yapar
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # KiB cinsinden (~64 MB)
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": 30000,  # ms
+}
+
+# Havuz boyutları: senkron motor thread havuzundaki servisler, asenkron motor endpointler için
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.environ.get("DB_POOL_MAX_OVERFLOW", "10"))
+
+# Ayrı işçi süreçleri (backend.worker) aynı dosyaya yazar; kilit beklenir
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    connect_args={"timeout": 30},
+    pool_size=POOL_SIZE,
+    max_overflow=POOL_MAX_OVERFLOW,
+    pool_pre_ping=True
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Endpointler için aiosqlite motoru; commit sırasında olay döngüsü bloklanmaz
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    connect_args={"timeout": 30},
+    pool_size=POOL_SIZE,
+    max_overflow=POOL_MAX_OVERFLOW,
+    pool_pre_ping=True
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+event.listen(engine, "connect", _apply_pragmas)
+event.listen(async_engine.sync_engine, "connect", _apply_pragmas)
+
 
 def init_db():
     """Veritabanını ve tabloları oluştur"""
     Base.metadata.create_all(bind=engine)
+    # Eski tablolara eklenen sütunlar, indeksler ve veri dönüşümleri sürümlü adımlarla uygulanır
+    run_migrations(engine)
     
     # Varsayılan kategorileri ekle
     _create_default_categories()
@@ -77,3 +129,16 @@ def get_db_session():
         yield db
     finally:
         db.close()
+
+
+@asynccontextmanager
+async def get_async_db():
+    """Asenkron veritabanı oturumu context manager (async endpointler için)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def close_db():
+    """Havuzlardaki bağlantıları kapat (WAL checkpoint'i son bağlantıda yapılır)"""
+    await async_engine.dispose()
+    engine.dispose()
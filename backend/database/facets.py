@@ -0,0 +1,118 @@
+"""
+Katalog faset tanımları
+Her faset değeri images satırından bir SQL ifadesiyle türetilir. Sayaç
+tetikleyicileri (migrations.py) ve filtreli sayım sorguları aynı ifadeleri
+kullanır; bilinmeyen değerler boş metin ('') olarak sayılır.
+"""
+from typing import Dict, List, Tuple
+
+# Çözünürlük dilimleri: (genişlik üst sınırı, etiket); sonuncusu sınırsız
+RESOLUTION_BUCKETS: List[Tuple[int, str]] = [
+    (1024, "sd"),
+    (1920, "hd"),
+    (3840, "full_hd"),
+    (0, "uhd"),
+]
+
+# faset adı -> ham sütun
+FACET_COLUMNS = {
+    "source": "source",
+    "license": "license",
+    "author": "author",
+    "year": "year",
+    "mime_type": "mime_type",
+    "resolution": "width",
+}
+
+FACETS = tuple(FACET_COLUMNS)
+
+
+def resolution_range(bucket: str) -> Tuple[int, int]:
+    """Dilimin [alt, üst) genişlik aralığı; üst sınır 0 ise sınırsız"""
+    lower = 1
+    for upper, label in RESOLUTION_BUCKETS:
+        if label == bucket:
+            return lower, upper
+        lower = upper
+    raise ValueError(f"Bilinmeyen çözünürlük dilimi: {bucket}")
+
+
+def facet_expression(facet: str, row: str = "images") -> str:
+    """Satırın faset değerini veren SQL ifadesi (row: images, NEW veya OLD)"""
+    column = f"{row}.{FACET_COLUMNS[facet]}"
+    if facet == "resolution":
+        cases = " ".join(
+            f"WHEN {column} < {upper} THEN '{label}'"
+            for upper, label in RESOLUTION_BUCKETS if upper
+        )
+        return (
+            f"CASE WHEN {column} IS NULL OR {column} <= 0 THEN '' "
+            f"{cases} ELSE '{RESOLUTION_BUCKETS[-1][1]}' END"
+        )
+    if facet == "year":
+        return f"COALESCE(CAST({column} AS TEXT), '')"
+    return f"COALESCE({column}, '')"
+
+
+def facet_changed_sql() -> str:
+    """UPDATE tetikleyicisinde herhangi bir faset değeri değişti mi?"""
+    return " OR ".join(
+        f"({facet_expression(facet, 'OLD')}) IS NOT ({facet_expression(facet, 'NEW')})"
+        for facet in FACETS
+    )
+
+
+def _year_value(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Geçersiz yıl: {value}") from None
+
+
+def normalize_facet_value(facet: str, value: str) -> str:
+    """
+    Seçili değeri sayaçlarda tutulan biçime getir (yıl ' 1944' -> '1944' gibi);
+    geçersiz çözünürlük dilimi veya yıl için ValueError fırlatır.
+    """
+    if value == "":
+        return value
+    if facet == "resolution":
+        resolution_range(value)
+    elif facet == "year":
+        return str(_year_value(value))
+    return value
+
+
+def facet_filter_sql(facet: str, values: List[str], params: Dict[str, object]) -> str:
+    """
+    Fasetin seçili değerlerinden biriyle eşleşme koşulu. Ham sütun üzerinde
+    kurulur ki sütun indeksleri kullanılabilsin; bağlanan değerler params'a eklenir.
+    """
+    column = f"images.{FACET_COLUMNS[facet]}"
+    conditions = []
+    known = [value for value in values if value != ""]
+
+    if facet == "resolution":
+        for value in known:
+            lower, upper = resolution_range(value)
+            key = f"{facet}_{len(params)}"
+            params[f"{key}_lo"] = lower
+            if upper:
+                params[f"{key}_hi"] = upper
+                conditions.append(f"({column} >= :{key}_lo AND {column} < :{key}_hi)")
+            else:
+                conditions.append(f"{column} >= :{key}_lo")
+        if len(known) < len(values):
+            conditions.append(f"({column} IS NULL OR {column} <= 0)")
+        return "(" + " OR ".join(conditions) + ")"
+
+    if known:
+        names = []
+        for value in known:
+            key = f"{facet}_{len(params)}"
+            params[key] = _year_value(value) if facet == "year" else value
+            names.append(f":{key}")
+        conditions.append(f"{column} IN ({', '.join(names)})")
+    if len(known) < len(values):
+        conditions.append(f"{column} IS NULL" if facet == "year" else f"({column} IS NULL OR {column} = '')")
+    return "(" + " OR ".join(conditions) + ")"
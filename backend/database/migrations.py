@@ -0,0 +1,350 @@
+"""
+Sürümlü şema migrasyonları
+Uygulanan son sürüm SQLite'ın PRAGMA user_version alanında tutulur.
+Yeni veritabanlarında create_all aynı şemayı kurar; adımlar bu yüzden
+tekrar çalıştırılabilir (IF NOT EXISTS) yazılır.
+"""
+from typing import Callable, List, Tuple
+
+from sqlalchemy import text
+
+# create_all var olan tabloları değiştirmez; sonradan modele eklenen sütunlar
+# (tür ve varsayılanıyla) onları ilk kullanan adımda eski tablolara eklenir.
+# Sürüm takibinden önce eklenenler: v1'e ulaşmış her veritabanında vardır.
+_PRE_V1_COLUMNS = {
+    "images": (
+        ("sha1", "VARCHAR(40)"),
+    ),
+    "download_queue": (
+        ("job_id", "VARCHAR(32)"),
+        ("category_slug", "VARCHAR(100) DEFAULT 'diger'"),
+        ("refresh", "BOOLEAN DEFAULT 0"),
+        ("file_path", "VARCHAR(500)"),
+        ("lease_owner", "VARCHAR(100)"),
+        ("lease_expires_at", "DATETIME"),
+        ("attempts", "INTEGER DEFAULT 0"),
+        ("updated_at", "DATETIME"),
+    ),
+}
+
+# v4'teki faset indeksleri ve sayaçlarıyla birlikte eklenen sütun
+_V4_COLUMNS = {
+    "images": (
+        ("year", "INTEGER"),
+    ),
+}
+
+
+def _add_columns(conn, columns):
+    """Tablolarda olmayan sütunları ekle"""
+    for table, table_columns in columns.items():
+        existing = {row[1] for row in conn.execute(text(f'PRAGMA table_info("{table}")'))}
+        for name, ddl in table_columns:
+            if name not in existing:
+                conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN "{name}" {ddl}'))
+
+
+def _unique_image_sources(conn):
+    """Aynı (source, source_id) satırlarını en eskisinde birleştir, tekil indeksi kur"""
+    _add_columns(conn, _PRE_V1_COLUMNS)
+    conn.execute(text("DROP TABLE IF EXISTS temp.image_dupes"))
+    conn.execute(text("""
+        CREATE TEMP TABLE image_dupes AS
+        SELECT i.id AS dup_id, k.keep_id
+        FROM images i
+        JOIN (
+            SELECT source, source_id, MIN(id) AS keep_id
+            FROM images
+            WHERE source_id IS NOT NULL
+            GROUP BY source, source_id
+            HAVING COUNT(*) > 1
+        ) k ON i.source = k.source AND i.source_id = k.source_id
+        WHERE i.id != k.keep_id
+    """))
+    conn.execute(text("""
+        UPDATE download_queue
+        SET image_id = (SELECT keep_id FROM image_dupes WHERE dup_id = download_queue.image_id)
+        WHERE image_id IN (SELECT dup_id FROM image_dupes)
+    """))
+    # Favori / indirme bilgisi kopyalardan herhangi birinde varsa korunur
+    conn.execute(text("""
+        UPDATE images
+        SET is_favorite = 1
+        WHERE id IN (
+            SELECT d.keep_id FROM image_dupes d JOIN images i ON i.id = d.dup_id
+            WHERE i.is_favorite = 1
+        )
+    """))
+    conn.execute(text("""
+        UPDATE images
+        SET is_downloaded = 1,
+            file_path = COALESCE(file_path, (
+                SELECT i.file_path FROM image_dupes d JOIN images i ON i.id = d.dup_id
+                WHERE d.keep_id = images.id AND i.file_path IS NOT NULL LIMIT 1
+            ))
+        WHERE id IN (
+            SELECT d.keep_id FROM image_dupes d JOIN images i ON i.id = d.dup_id
+            WHERE i.is_downloaded = 1
+        )
+    """))
+    conn.execute(text("DELETE FROM images WHERE id IN (SELECT dup_id FROM image_dupes)"))
+    conn.execute(text("DROP TABLE image_dupes"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_images_source_source_id ON images (source, source_id)"
+    ))
+
+
+def _query_indexes(conn):
+    """Filtrelenen / sıralanan sütunlar için bileşik ve kısmi indeksler"""
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS ix_images_category_created ON images (category_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_images_source_url ON images (source_url)",
+        "CREATE INDEX IF NOT EXISTS ix_images_favorite ON images (created_at) WHERE is_favorite = 1",
+        "CREATE INDEX IF NOT EXISTS ix_images_downloaded ON images (file_path) WHERE is_downloaded = 1",
+        "CREATE INDEX IF NOT EXISTS ix_search_history_created_at ON search_history (created_at)",
+        # job_id tek başına indeksi bileşik indeksin önekiyle karşılanır
+        "DROP INDEX IF EXISTS ix_download_queue_job_id",
+        "CREATE INDEX IF NOT EXISTS ix_download_queue_job_status ON download_queue (job_id, status)",
+        "CREATE INDEX IF NOT EXISTS ix_download_queue_status_lease "
+        "ON download_queue (status, lease_expires_at)",
+        "CREATE INDEX IF NOT EXISTS ix_harvest_jobs_slug_status ON harvest_jobs (category_slug, status)",
+        "CREATE INDEX IF NOT EXISTS ix_category_sync_state_category_slug "
+        "ON category_sync_state (category_slug)",
+    ):
+        conn.execute(text(statement))
+    conn.execute(text("ANALYZE"))
+
+
+def _fts5_available(conn) -> bool:
+    options = conn.execute(text("PRAGMA compile_options")).scalars().all()
+    return "ENABLE_FTS5" in options
+
+
+def _catalog_fts(conn):
+    """
+    images üzerinde harici içerikli FTS5 indeksi; tetikleyiciler eşzamanlı tutar.
+    FTS5'siz SQLite derlemelerinde atlanır, arama upstream'e düşer.
+    """
+    if not _fts5_available(conn):
+        print("⚠️ SQLite FTS5 desteği yok; yerel tam metin araması kapalı")
+        return
+
+    conn.execute(text("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS images_fts USING fts5(
+            title, description, author, license,
+            content='images', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3 4'
+        )
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS images_fts_ai AFTER INSERT ON images BEGIN
+            INSERT INTO images_fts(rowid, title, description, author, license)
+            VALUES (new.id, new.title, new.description, new.author, new.license);
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS images_fts_ad AFTER DELETE ON images BEGIN
+            INSERT INTO images_fts(images_fts, rowid, title, description, author, license)
+            VALUES ('delete', old.id, old.title, old.description, old.author, old.license);
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS images_fts_au
+        AFTER UPDATE OF title, description, author, license ON images BEGIN
+            INSERT INTO images_fts(images_fts, rowid, title, description, author, license)
+            VALUES ('delete', old.id, old.title, old.description, old.author, old.license);
+            INSERT INTO images_fts(rowid, title, description, author, license)
+            VALUES (new.id, new.title, new.description, new.author, new.license);
+        END
+    """))
+    # Mevcut katalog satırlarını indekse al
+    conn.execute(text("INSERT INTO images_fts(images_fts) VALUES ('rebuild')"))
+
+
+# v4'te kurulan tetikleyicilerin faset tanımı. Uygulanmış bir adımın anlamı
+# değişmesin diye dondurulmuştur; facets.py'deki tanım değişirse yeni bir adım eklenir.
+_V4_FACET_COLUMNS = (
+    ("source", "source"),
+    ("license", "license"),
+    ("author", "author"),
+    ("year", "year"),
+    ("mime_type", "mime_type"),
+    ("resolution", "width"),
+)
+_V4_FACETS = tuple(facet for facet, _ in _V4_FACET_COLUMNS)
+
+
+def _v4_facet_expression(facet: str, row: str = "images") -> str:
+    column = f"{row}.{dict(_V4_FACET_COLUMNS)[facet]}"
+    if facet == "resolution":
+        return (
+            f"CASE WHEN {column} IS NULL OR {column} <= 0 THEN '' "
+            f"WHEN {column} < 1024 THEN 'sd' WHEN {column} < 1920 THEN 'hd' "
+            f"WHEN {column} < 3840 THEN 'full_hd' ELSE 'uhd' END"
+        )
+    if facet == "year":
+        return f"COALESCE(CAST({column} AS TEXT), '')"
+    return f"COALESCE({column}, '')"
+
+
+def _facet_counters(conn):
+    """
+    Faset sayaçları: faset başına ve faset çifti başına satır sayıları.
+    Tetikleyiciler her ekleme/silme/değişiklikte sayaçları artımlı günceller.
+    """
+    _add_columns(conn, _V4_COLUMNS)
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS facet_counts (
+            facet TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (facet, value)
+        ) WITHOUT ROWID
+    """))
+    # Tek fasete göre filtrelenmiş sayımlar: (facet, value) seçiliyken diğer fasetler
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS facet_pair_counts (
+            facet TEXT NOT NULL,
+            value TEXT NOT NULL,
+            other_facet TEXT NOT NULL,
+            other_value TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (facet, value, other_facet, other_value)
+        ) WITHOUT ROWID
+    """))
+    for statement in (
+        # Çoklu filtreli sayımlar tabloya inmeden bu indeksten taranır
+        "CREATE INDEX IF NOT EXISTS ix_images_facets "
+        "ON images (source, license, mime_type, year, width, author)",
+        "CREATE INDEX IF NOT EXISTS ix_images_author ON images (author)",
+        "CREATE INDEX IF NOT EXISTS ix_images_year ON images (year)",
+    ):
+        conn.execute(text(statement))
+
+    def counter_updates(row: str, delta: int) -> str:
+        singles = ", ".join(
+            f"('{facet}', {_v4_facet_expression(facet, row)}, {delta})" for facet in _V4_FACETS
+        )
+        pairs = ", ".join(
+            f"('{facet}', {_v4_facet_expression(facet, row)}, "
+            f"'{other}', {_v4_facet_expression(other, row)}, {delta})"
+            for facet in _V4_FACETS for other in _V4_FACETS if other != facet
+        )
+        return f"""
+            INSERT INTO facet_counts (facet, value, count) VALUES {singles}
+            ON CONFLICT (facet, value) DO UPDATE SET count = count + ({delta});
+            INSERT INTO facet_pair_counts (facet, value, other_facet, other_value, count)
+            VALUES {pairs}
+            ON CONFLICT (facet, value, other_facet, other_value)
+            DO UPDATE SET count = count + ({delta});
+        """
+
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS images_facets_ai AFTER INSERT ON images BEGIN
+            {counter_updates("NEW", 1)}
+        END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS images_facets_ad AFTER DELETE ON images BEGIN
+            {counter_updates("OLD", -1)}
+        END
+    """))
+    # Katalog upsert'i aynı değerleri yeniden yazar; yalnızca gerçek değişiklik sayılır
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS images_facets_au
+        AFTER UPDATE OF source, license, author, year, mime_type, width ON images
+        WHEN {" OR ".join(
+            f"({_v4_facet_expression(facet, 'OLD')}) IS NOT ({_v4_facet_expression(facet, 'NEW')})"
+            for facet in _V4_FACETS
+        )} BEGIN
+            {counter_updates("OLD", -1)}
+            {counter_updates("NEW", 1)}
+        END
+    """))
+
+    # Mevcut katalogdan sayaçları baştan hesapla
+    conn.execute(text("DELETE FROM facet_counts"))
+    conn.execute(text("DELETE FROM facet_pair_counts"))
+    conn.execute(text("DROP TABLE IF EXISTS temp.image_facet_values"))
+    conn.execute(text(f"""
+        CREATE TEMP TABLE image_facet_values AS
+        {" UNION ALL ".join(
+            f"SELECT id, '{facet}' AS facet, {_v4_facet_expression(facet)} AS value FROM images"
+            for facet in _V4_FACETS
+        )}
+    """))
+    conn.execute(text("""
+        INSERT INTO facet_counts (facet, value, count)
+        SELECT facet, value, COUNT(*) FROM image_facet_values GROUP BY facet, value
+    """))
+    conn.execute(text("CREATE INDEX temp.ix_image_facet_values_id ON image_facet_values (id)"))
+    conn.execute(text("""
+        INSERT INTO facet_pair_counts (facet, value, other_facet, other_value, count)
+        SELECT a.facet, a.value, b.facet, b.value, COUNT(*)
+        FROM image_facet_values a
+        JOIN image_facet_values b ON a.id = b.id AND a.facet != b.facet
+        GROUP BY a.facet, a.value, b.facet, b.value
+    """))
+    conn.execute(text("DROP TABLE image_facet_values"))
+
+
+def _guard_fts_update(conn):
+    """
+    Katalog upsert'i metin sütunlarını her seferinde yeniden yazar; FTS satırı
+    yalnızca değer gerçekten değişince yenilenir.
+    """
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'images_fts'"
+    )).scalar()
+    if not exists:
+        return
+
+    conn.execute(text("DROP TRIGGER IF EXISTS images_fts_au"))
+    conn.execute(text("""
+        CREATE TRIGGER images_fts_au
+        AFTER UPDATE OF title, description, author, license ON images
+        WHEN old.title IS NOT new.title
+          OR old.description IS NOT new.description
+          OR old.author IS NOT new.author
+          OR old.license IS NOT new.license
+        BEGIN
+            INSERT INTO images_fts(images_fts, rowid, title, description, author, license)
+            VALUES ('delete', old.id, old.title, old.description, old.author, old.license);
+            INSERT INTO images_fts(rowid, title, description, author, license)
+            VALUES (new.id, new.title, new.description, new.author, new.license);
+        END
+    """))
+
+
+# (sürüm, açıklama, adım) — yalnızca sona eklenir, mevcut adımlar değiştirilmez
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "images (source, source_id) tekil indeksi", _unique_image_sources),
+    (2, "Sorgu indeksleri", _query_indexes),
+    (3, "Katalog tam metin indeksi (FTS5)", _catalog_fts),
+    (4, "Faset sayaçları", _facet_counters),
+    (5, "FTS güncelleme tetikleyicisi yalnızca değişiklikte", _guard_fts_update),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn) -> int:
+    return conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+
+def run_migrations(engine) -> List[int]:
+    """Uygulanmamış adımları sırayla, her birini kendi işleminde uygula"""
+    with engine.connect() as conn:
+        current = get_schema_version(conn)
+
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(text(f"PRAGMA user_version = {version}"))
+        print(f"🔧 Şema v{version}: {description}")
+        applied.append(version)
+    return applied
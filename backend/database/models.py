@@ -1,10 +1,11 @@
 """
 Veritabanı modelleri - WW2 Görsel Arşivi
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
+import json
 
 Base = declarative_base()
 
@@ -52,12 +53,14 @@ class Image(Base):
     height = Column(Integer, nullable=True)
     file_size = Column(Integer, nullable=True)  # bytes
     mime_type = Column(String(50), nullable=True)
+    sha1 = Column(String(40), nullable=True)  # Kaynağın bildirdiği SHA-1 (Wikimedia)
     
     # Kaynak bilgileri
     source = Column(String(100), default="wikimedia")  # wikimedia, national_archives, etc.
     source_id = Column(String(255), nullable=True)  # Kaynaktaki benzersiz ID
     license = Column(String(100), nullable=True)
     author = Column(String(255), nullable=True)
+    year = Column(Integer, nullable=True)  # Çekim / yayın yılı (biliniyorsa)
     
     # Durum
     is_downloaded = Column(Boolean, default=False)
@@ -69,6 +72,21 @@ class Image(Base):
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     category = relationship("Category", back_populates="images")
 
+    # Şemaya eklenen indeksler mevcut veritabanlarına migrations.py ile uygulanır
+    __table_args__ = (
+        # Katalog aktarımı bu anahtarla ON CONFLICT upsert yapar
+        Index("ux_images_source_source_id", "source", "source_id", unique=True),
+        Index("ix_images_category_created", "category_id", "created_at"),
+        Index("ix_images_source_url", "source_url"),
+        # Kısmi indeksler: yalnızca favori / indirilmiş satırlar
+        Index("ix_images_favorite", "created_at", sqlite_where=text("is_favorite = 1")),
+        Index("ix_images_downloaded", "file_path", sqlite_where=text("is_downloaded = 1")),
+        # Filtreli faset sayımları (kapsayan indeks + seçici sütunlar)
+        Index("ix_images_facets", "source", "license", "mime_type", "year", "width", "author"),
+        Index("ix_images_author", "author"),
+        Index("ix_images_year", "year"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -84,6 +102,7 @@ class Image(Base):
             "source": self.source,
             "license": self.license,
             "author": self.author,
+            "year": self.year,
             "is_downloaded": self.is_downloaded,
             "is_favorite": self.is_favorite,
             "category_id": self.category_id,
@@ -100,7 +119,7 @@ class SearchHistory(Base):
     query = Column(String(500), nullable=False)
     results_count = Column(Integer, default=0)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     def to_dict(self):
         return {
@@ -117,20 +136,106 @@ class DownloadQueue(Base):
     __tablename__ = "download_queue"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String(32), nullable=True)  # Aynı istekle kuyruğa alınanlar
     image_id = Column(Integer, ForeignKey("images.id"), nullable=False)
-    status = Column(String(50), default="pending")  # pending, downloading, completed, failed
+    category_slug = Column(String(100), default="diger")
+    refresh = Column(Boolean, default=False)  # Mevcut dosyayı koşullu istekle yeniden doğrula
+    status = Column(String(50), default="pending")  # pending, downloading, completed, skipped, failed
     progress = Column(Integer, default=0)  # 0-100
     error_message = Column(Text, nullable=True)
+    file_path = Column(String(500), nullable=True)
+    
+    # Kiralama: işi alan işçi ve kiralamanın bitişi
+    lease_owner = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0)
+    
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
     
     image = relationship("Image")
 
+    __table_args__ = (
+        Index("ix_download_queue_job_status", "job_id", "status"),
+        # Kiralanabilir satır taraması: pending / süresi dolmuş downloading
+        Index("ix_download_queue_status_lease", "status", "lease_expires_at"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
+            "job_id": self.job_id,
             "image_id": self.image_id,
+            "title": self.image.title if self.image else None,
             "status": self.status,
             "progress": self.progress,
-            "error_message": self.error_message
+            "error_message": self.error_message,
+            "file_path": self.file_path,
+            "refresh": bool(self.refresh),
+            "attempts": self.attempts
+        }
+
+
+class HarvestJob(Base):
+    """Wikimedia kategori ağacı tarama işi (kaldığı yerden devam edebilir)"""
+    __tablename__ = "harvest_jobs"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    category_slug = Column(String(100), nullable=False)
+    max_depth = Column(Integer, default=3)
+    status = Column(String(50), default="pending")  # pending, running, completed, failed
+    
+    # Kontrol noktası: kuyruk, ziyaret edilenler ve yarım kalan kategori (JSON)
+    state = Column(Text, nullable=True)
+    
+    categories_done = Column(Integer, default=0)
+    files_seen = Column(Integer, default=0)
+    files_added = Column(Integer, default=0)
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_harvest_jobs_slug_status", "category_slug", "status"),
+    )
+
+    def to_dict(self):
+        state = json.loads(self.state) if self.state else {}
+        return {
+            "id": self.id,
+            "category_slug": self.category_slug,
+            "max_depth": self.max_depth,
+            "status": self.status,
+            "categories_done": self.categories_done,
+            "categories_queued": len(state.get("queue", [])),
+            "current_category": (state.get("current") or {}).get("category"),
+            "files_seen": self.files_seen,
+            "files_added": self.files_added,
+            "error_message": self.error_message,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None
+        }
+
+
+class CategorySyncState(Base):
+    """Wikimedia kategorisi başına artımlı senkron yüksek su işareti"""
+    __tablename__ = "category_sync_state"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    wiki_category = Column(String(500), nullable=False, unique=True)
+    category_slug = Column(String(100), nullable=False, index=True)
+    high_water_mark = Column(String(32), nullable=True)  # ISO 8601 (UTC)
+    files_synced = Column(Integer, default=0)
+    last_synced_at = Column(DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "wiki_category": self.wiki_category,
+            "category_slug": self.category_slug,
+            "high_water_mark": self.high_water_mark,
+            "files_synced": self.files_synced,
+            "last_synced_at": self.last_synced_at.isoformat() if self.last_synced_at else None
         }
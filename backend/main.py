@@ -4,23 +4,36 @@ Ana uygulama dosyası
 """
 import os
 import sys
+import json
+import asyncio
 from pathlib import Path
 from typing import Optional, List
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 
 # Proje yolunu ayarla
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR))
 
-from backend.database import init_db, get_db, Category, Image, SearchHistory
+from sqlalchemy import delete, select
+from sqlalchemy.orm import selectinload
+
+from backend.database import init_db, close_db, get_async_db, Category, Image, SearchHistory
 from backend.scrapers import WikimediaScraper, NationalArchivesScraper, ArchiveOrgScraper
-from backend.services import DownloadService
+from backend.scrapers.wikimedia import encode_cursor, decode_cursor
+from backend.services import (
+    DownloadService, DownloadQueueWorker, CategoryHarvester, FederatedSearch, SearchDownloadPipeline,
+    CatalogIngest, CatalogSearch, CatalogFacets
+)
+from backend.core import (
+    response_cache, StaleWhileRevalidate, SingleFlight, upstream_flights, deadline_scope,
+    http_client, loop_monitor
+)
 
 # FastAPI uygulaması
 app = FastAPI(
@@ -57,11 +70,40 @@ if DOWNLOADS_DIR.exists():
 wikimedia_scraper = WikimediaScraper()
 nara_scraper = NationalArchivesScraper()
 archive_scraper = ArchiveOrgScraper()
-download_service = DownloadService()
+# Toplu + tekil indirmelerin toplam bant genişliği (KB/s); tanımsızsa sınırsız
+_bandwidth_kbps = os.environ.get("DOWNLOAD_BANDWIDTH_KBPS")
+download_service = DownloadService(
+    bandwidth_limit=int(_bandwidth_kbps) * 1024 if _bandwidth_kbps else None
+)
+download_queue = DownloadQueueWorker(download_service, wikimedia_scraper)
+harvester = CategoryHarvester(wikimedia_scraper)
+federated_search = FederatedSearch({
+    "wikimedia": wikimedia_scraper,
+    "nara": nara_scraper,
+    "archive_org": archive_scraper,
+})
+# Kategori/arama sonuçlarını tarayıcıya uğramadan indirme kuyruğuna aktarır
+search_pipeline = SearchDownloadPipeline({
+    "wikimedia": wikimedia_scraper,
+    "nara": nara_scraper,
+    "archive_org": archive_scraper,
+}, download_queue)
+# Arama sonuçlarını yanıtı bekletmeden Image kataloğuna toplu yazar
+catalog_ingest = CatalogIngest(wikimedia_scraper)
+# Kataloğa alınmış görseller üzerinde yerel tam metin araması (FTS5)
+catalog_search = CatalogSearch()
+# Artımlı sayaçlarla faset sayımları
+catalog_facets = CatalogFacets()
 
 # Backward compatibility
 scraper = wikimedia_scraper
 
+# Kategori listeleri: 15 dakika taze, sonrasında arka planda yenilenir
+category_listings = StaleWhileRevalidate("category-images", fresh_ttl=15 * 60)
+
+# Aynı anda gelen özdeş endpoint isteklerini tek hesaplamada birleştir
+endpoint_flights = SingleFlight()
+
 
 # Pydantic modelleri
 class SearchRequest(BaseModel):
@@ -76,6 +118,15 @@ class DownloadRequest(BaseModel):
     category_slug: str = "diger"
 
 
+class PipelineRequest(BaseModel):
+    category_slug: Optional[str] = None
+    query: Optional[str] = None
+    sources: List[str] = ["wikimedia"]
+    limit: int = Field(500, ge=1, le=5000)
+    min_width: int = Field(0, ge=0)
+    mime_types: Optional[List[str]] = None
+
+
 class ImageResponse(BaseModel):
     id: int
     title: str
@@ -92,13 +143,34 @@ async def startup_event():
     """Uygulama başlangıcında veritabanını hazırla"""
     init_db()
     print("✅ Veritabanı hazırlandı")
+    
+    # Olay döngüsü gecikmesini ölç (/api/metrics)
+    loop_monitor.start()
+    
+    # Yarıda kalan kategori taramalarını sürdür
+    await harvester.resume_unfinished()
+    
+    # Metadata'sız kataloğa alınmış görsellerin yıl/lisans/yazar bilgisini tamamla
+    catalog_ingest.start_backfill()
+    
+    # Kalıcı indirme kuyruğunu boşaltan işçi; indirmeler yalnızca ayrı
+    # işçi süreçlerinde (python -m backend.worker) yapılacaksa kapatılabilir
+    if os.environ.get("EMBEDDED_DOWNLOAD_WORKER", "1") != "0":
+        download_queue.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Uygulama kapatılırken kaynakları temizle"""
-    await scraper.close()
-    await download_service.close()
+    await loop_monitor.stop()
+    await harvester.close()
+    await search_pipeline.close()
+    await download_queue.close()
+    await catalog_ingest.close()
+    # Scraperların ve indirme servisinin tüm session/bağlantı havuzları
+    await http_client.close()
+    response_cache.close()
+    await close_db()
 
 
 @app.get("/")
@@ -120,13 +192,41 @@ async def health_check():
     }
 
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """Olay döngüsü gecikmesi ve indirme kuyruğu yükü"""
+    return {
+        "success": True,
+        "event_loop_lag": loop_monitor.get_stats(),
+        "downloads": {
+            **download_queue.get_stats(),
+            "bandwidth": download_service.bandwidth.get_stats()
+        },
+        "catalog": catalog_ingest.get_stats()
+    }
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Upstream yanıt önbelleği istatistikleri"""
+    return {
+        "success": True,
+        "cache": response_cache.get_stats(),
+        "singleflight": {
+            "upstream": upstream_flights.get_stats(),
+            "endpoints": endpoint_flights.get_stats()
+        },
+        "http": http_client.get_stats()
+    }
+
+
 # ==================== KATEGORİLER ====================
 
 @app.get("/api/categories")
 async def get_categories():
     """Tüm kategorileri getir"""
-    with get_db() as db:
-        categories = db.query(Category).all()
+    async with get_async_db() as db:
+        categories = (await db.scalars(select(Category))).all()
         return {
             "success": True,
             "categories": [cat.to_dict() for cat in categories]
@@ -136,8 +236,8 @@ async def get_categories():
 @app.get("/api/categories/{slug}")
 async def get_category(slug: str):
     """Belirli bir kategoriyi getir"""
-    with get_db() as db:
-        category = db.query(Category).filter(Category.slug == slug).first()
+    async with get_async_db() as db:
+        category = await db.scalar(select(Category).where(Category.slug == slug))
         if not category:
             raise HTTPException(status_code=404, detail="Kategori bulunamadı")
         return {
@@ -153,51 +253,182 @@ async def search_images(
     q: str = Query(..., description="Arama terimi"),
     category: Optional[str] = Query(None, description="Kategori slug"),
     limit: int = Query(100, ge=1, le=200, description="Sonuç limiti"),
-    min_width: int = Query(600, ge=100, description="Minimum genişlik (HD filtresi)")
+    min_width: int = Query(600, ge=100, description="Minimum genişlik (HD filtresi)"),
+    cursor: Optional[str] = Query(None, description="Sonraki sayfa için next_cursor değeri"),
+    timeout_ms: int = Query(8000, ge=100, le=30000, description="İstek süre bütçesi"),
+    source: str = Query("auto", pattern="^(auto|local|upstream)$",
+                        description="auto: önce yerel katalog, eksik kalan upstream'den")
 ):
-    """Wikimedia'da görsel ara"""
-    result = await scraper.search_images(
-        query=q,
-        category_slug=category,
-        limit=limit,
-        min_width=min_width
-    )
+    """
+    Görsel ara. Yerel katalog (FTS5) önce sorgulanır; sayfa dolmazsa eksik
+    kısım Wikimedia'dan tamamlanır (bütçe dolarsa yetişenler partial döner).
+    """
+    # Yerel aşamanın cursor'ı {"l": offset | None, "m": max_id, "u": upstream cursor} taşır;
+    # "l" None ise yerel sonuçlar bitmiştir. "l" içermeyen cursor doğrudan upstream'e aittir.
+    local_offset, max_id, upstream_cursor = None, None, None
+    if cursor:
+        try:
+            state = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if "l" in state:
+            local_offset, max_id, upstream_cursor = state["l"], state.get("m"), state.get("u")
+            valid = (
+                (local_offset is None or (type(local_offset) is int and local_offset >= 0))
+                and (max_id is None or (type(max_id) is int and max_id >= 0))
+                and (upstream_cursor is None or isinstance(upstream_cursor, str))
+            )
+            if not valid:
+                raise HTTPException(status_code=400, detail="Geçersiz cursor")
+        else:
+            upstream_cursor = cursor
+    elif source != "upstream":
+        local_offset = 0
     
-    if not result["success"]:
-        raise HTTPException(status_code=500, detail=result.get("error", "Arama hatası"))
+    images, source_status = [], {}
+    partial, next_cursor = False, None
+    
+    if local_offset is not None:
+        local = await catalog_search.search(
+            q, limit=limit, min_width=min_width, offset=local_offset,
+            category_slug=category, max_id=max_id
+        )
+        images, max_id = local["images"], local["max_id"]
+        source_status["local"] = {"status": "ok", "count": local["total"], "elapsed_ms": local["elapsed_ms"]}
+        if len(images) == limit:
+            next_cursor = encode_cursor({"l": local_offset + limit, "m": max_id, "u": upstream_cursor})
+    
+    if source != "local" and len(images) < limit:
+        # Yerel sonuçlar bitti: upstream kaldığı yerden, yalnızca açık kadar sorgulanır
+        upstream_limit = limit - len(images)
+        try:
+            with deadline_scope(timeout_ms):
+                result = await endpoint_flights.do(
+                    ("search", q, category, upstream_limit, min_width, upstream_cursor, timeout_ms),
+                    lambda: scraper.search_images(
+                        query=q,
+                        category_slug=category,
+                        limit=upstream_limit,
+                        min_width=min_width,
+                        cursor=upstream_cursor
+                    )
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        if result["success"]:
+            catalog_ingest.submit(result["images"], category)
+            # Yerel sayfalarda gösterilmiş (ya da bu sayfadaki) sonuçlar tekrarlanmaz
+            seen = {(img["source"], img["source_id"]) for img in images}
+            if max_id:
+                seen |= await catalog_search.matching_keys(
+                    q, result["images"], min_width=min_width,
+                    category_slug=category, max_id=max_id
+                )
+            images = images + [
+                img for img in result["images"]
+                if (img.get("source", "wikimedia"), str(img.get("source_id"))) not in seen
+            ]
+            partial = result["partial"]
+            next_cursor = result["next_cursor"]
+            if next_cursor and max_id is not None:
+                next_cursor = encode_cursor({"l": None, "m": max_id, "u": next_cursor})
+            source_status["wikimedia"] = {
+                "status": "partial" if partial else "ok",
+                "count": result["total"]
+            }
+        elif not images:
+            raise HTTPException(status_code=500, detail=result.get("error", "Arama hatası"))
+        else:
+            # Yerel sonuçlar yine de döner; sonraki sayfa upstream'i aynı yerden dener
+            partial = True
+            if max_id is not None:
+                next_cursor = encode_cursor({"l": None, "m": max_id, "u": upstream_cursor})
+            source_status["wikimedia"] = {"status": "error", "error": result.get("error", "Arama hatası")}
+    
+    result = {
+        "success": True,
+        "images": images,
+        "total": len(images),
+        "query": q,
+        "partial": partial,
+        "next_cursor": next_cursor,
+        "source_status": source_status
+    }
+    
+    # Sonraki sayfalar yeni arama sayılmaz
+    if cursor:
+        return result
     
     # Arama geçmişine kaydet
-    with get_db() as db:
-        category_obj = None
+    async with get_async_db() as db:
+        category_id = None
         if category:
-            category_obj = db.query(Category).filter(Category.slug == category).first()
+            category_id = await db.scalar(select(Category.id).where(Category.slug == category))
         
         history = SearchHistory(
             query=q,
             results_count=result["total"],
-            category_id=category_obj.id if category_obj else None
+            category_id=category_id
         )
         db.add(history)
-        db.commit()
+        await db.commit()
     
     return result
 
 
+@app.get("/api/image-metadata")
+async def get_image_metadata(
+    titles: List[str] = Query(..., description="Wikimedia dosya başlıkları (File:...)")
+):
+    """Detay görünümü için açıklama, lisans ve yazar bilgisini toplu getir"""
+    if len(titles) > 500:
+        raise HTTPException(status_code=400, detail="En fazla 500 başlık istenebilir")
+    
+    metadata = await wikimedia_scraper.get_metadata(titles)
+    return {
+        "success": True,
+        "metadata": metadata
+    }
+
+
 @app.get("/api/category-images/{slug}")
 async def get_category_images(
     slug: str,
-    limit: int = Query(100, ge=1, le=200)
+    limit: int = Query(100, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Sonraki sayfa için next_cursor değeri")
 ):
-    """Kategori bazlı görseller getir"""
-    result = await scraper.get_category_images(
-        category_slug=slug,
-        limit=limit
-    )
+    """Kategori bazlı görseller getir (ilk sayfada son başarılı liste anında döner)"""
+    if cursor:
+        try:
+            result = await endpoint_flights.do(
+                ("category-images", slug, limit, cursor),
+                lambda: scraper.get_category_images(
+                    category_slug=slug,
+                    limit=limit,
+                    cursor=cursor
+                )
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if result["success"]:
+            catalog_ingest.submit(result["images"], slug)
+        cache_info = None
+    else:
+        async def load_listing():
+            # Tazeliği SWR yönetir: yenileme upstream yanıt önbelleğini atlar ve
+            # arka planda yenilenen listeler de kataloğa alınır
+            listing = await scraper.get_category_images(category_slug=slug, limit=limit, use_cache=False)
+            if listing["success"]:
+                catalog_ingest.submit(listing["images"], slug)
+            return listing
+        
+        result, cache_info = await category_listings.get(f"{slug}:{limit}", load_listing)
     
     if not result["success"]:
         raise HTTPException(status_code=500, detail=result.get("error", "Hata"))
     
-    return result
+    return {**result, "cache": cache_info}
 
 
 @app.get("/api/bulk-search/{slug}")
@@ -206,60 +437,74 @@ async def bulk_search_images(
     limit: int = Query(200, ge=1, le=500)
 ):
     """Toplu arama - Maksimum görsel bulmak için"""
-    result = await scraper.bulk_search(
-        category_slug=slug,
-        limit=limit
+    result = await endpoint_flights.do(
+        ("bulk-search", slug, limit),
+        lambda: scraper.bulk_search(
+            category_slug=slug,
+            limit=limit
+        )
     )
     
     if not result["success"]:
         raise HTTPException(status_code=500, detail=result.get("error", "Hata"))
     
+    catalog_ingest.submit(result["images"], slug)
     return result
 
 
 @app.get("/api/search-all")
 async def search_all_sources(
     q: str = Query(..., description="Arama terimi"),
-    limit: int = Query(100, ge=1, le=300)
+    limit: int = Query(100, ge=1, le=300),
+    timeout_ms: int = Query(8000, ge=100, le=30000, description="İstek süre bütçesi")
 ):
-    """Tüm kaynaklarda arama (Wikimedia + NARA + Archive.org)"""
-    all_images = []
-    sources_searched = []
+    """
+    Tüm kaynaklarda arama (Wikimedia + NARA + Archive.org)
+    Kaynaklar eşzamanlı sorgulanır; bütçe dolarsa yetişen sonuçlar
+    partial: true döner. sources sonuç veren kaynakların listesidir,
+    kaynak bazlı durum source_status'ta.
+    """
+    result = await endpoint_flights.do(
+        ("search-all", q, limit, timeout_ms),
+        lambda: federated_search.search(q, limit=limit, timeout_ms=timeout_ms)
+    )
+    catalog_ingest.submit(result["images"])
+    return result
+
+
+@app.get("/api/search-all/stream")
+async def stream_search_all_sources(
+    q: str = Query(..., description="Arama terimi"),
+    limit: int = Query(100, ge=1, le=300),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$", description="ndjson veya sse"),
+    deadline_ms: Optional[int] = Query(None, ge=100, le=30000, description="Kaynak başına süre sınırı")
+):
+    """Tüm kaynaklarda arama - her kaynağın sonucu geldikçe akış olarak gönderilir"""
     
-    # Wikimedia
-    try:
-        wiki_result = await wikimedia_scraper.search_images(q, limit=limit//3)
-        if wiki_result["success"]:
-            all_images.extend(wiki_result["images"])
-            sources_searched.append("wikimedia")
-    except Exception as e:
-        print(f"Wikimedia hatası: {e}")
+    async def events():
+        async for event in federated_search.stream(q, limit=limit, deadline_ms=deadline_ms):
+            if event["event"] == "results":
+                catalog_ingest.submit(event["images"])
+            yield event
     
-    # National Archives
-    try:
-        nara_result = await nara_scraper.search_images(q, limit=limit//3)
-        if nara_result["success"]:
-            all_images.extend(nara_result["images"])
-            sources_searched.append("nara")
-    except Exception as e:
-        print(f"NARA hatası: {e}")
+    async def ndjson_events():
+        async for event in events():
+            yield json.dumps(event, ensure_ascii=False) + "\n"
     
-    # Archive.org
-    try:
-        archive_result = await archive_scraper.search_images(q, limit=limit//3)
-        if archive_result["success"]:
-            all_images.extend(archive_result["images"])
-            sources_searched.append("archive_org")
-    except Exception as e:
-        print(f"Archive.org hatası: {e}")
+    async def sse_events():
+        async for event in events():
+            yield f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
     
-    return {
-        "success": True,
-        "images": all_images[:limit],
-        "total": len(all_images),
-        "sources": sources_searched,
-        "query": q
-    }
+    if format == "sse":
+        body, media_type = sse_events(), "text/event-stream"
+    else:
+        body, media_type = ndjson_events(), "application/x-ndjson"
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.get("/api/videos")
@@ -268,7 +513,10 @@ async def search_videos(
     limit: int = Query(30, ge=1, le=100)
 ):
     """WW2 video klipleri ara (Archive.org)"""
-    result = await archive_scraper.search_videos(q, limit=limit)
+    result = await endpoint_flights.do(
+        ("videos", q, limit),
+        lambda: archive_scraper.search_videos(q, limit=limit)
+    )
     
     if not result["success"]:
         raise HTTPException(status_code=500, detail=result.get("error", "Video arama hatası"))
@@ -282,7 +530,10 @@ async def get_category_videos(
     limit: int = Query(20, ge=1, le=50)
 ):
     """Kategori bazlı videolar getir"""
-    result = await archive_scraper.get_category_videos(category, limit=limit)
+    result = await endpoint_flights.do(
+        ("category-videos", category, limit),
+        lambda: archive_scraper.get_category_videos(category, limit=limit)
+    )
     
     if not result["success"]:
         raise HTTPException(status_code=500, detail=result.get("error", "Hata"))
@@ -290,13 +541,119 @@ async def get_category_videos(
     return result
 
 
+# ==================== FASETLER ====================
+
+@app.get("/api/facets")
+async def get_facets(
+    source: List[str] = Query([], description="Kaynak (wikimedia, nara, archive_org)"),
+    license: List[str] = Query([], description="Lisans"),
+    author: List[str] = Query([], description="Yazar"),
+    year: List[str] = Query([], description="Yıl"),
+    mime_type: List[str] = Query([], description="MIME türü"),
+    resolution: List[str] = Query([], description="Çözünürlük dilimi (sd, hd, full_hd, uhd)"),
+    limit: int = Query(20, ge=1, le=100, description="Faset başına değer sayısı"),
+    page_size: int = Query(0, ge=0, le=200, description="Süzülmüş görsellerden döndürülecek sayı"),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Katalog faset sayımları. Aynı fasette birden fazla değer VEYA, farklı
+    fasetler VE ile birleşir; boş değer ('') bilinmeyenleri seçer.
+    """
+    try:
+        return await catalog_facets.get_facets(
+            {
+                "source": source,
+                "license": license,
+                "author": author,
+                "year": year,
+                "mime_type": mime_type,
+                "resolution": resolution,
+            },
+            limit=limit,
+            page_size=page_size,
+            offset=offset
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ==================== KATALOG TARAMA ====================
+
+@app.post("/api/harvest/{slug}")
+async def start_harvest(
+    slug: str,
+    max_depth: int = Query(3, ge=0, le=10, description="Alt kategori derinlik sınırı")
+):
+    """Kategori ağacını arka planda tarayıp kataloğa ekle"""
+    result = await harvester.start(slug, max_depth=max_depth)
+    
+    if not result["success"]:
+        status_code = 404 if result["error"] == "Kategori bulunamadı" else 409
+        raise HTTPException(status_code=status_code, detail=result["error"])
+    
+    return result
+
+
+@app.get("/api/harvest")
+async def list_harvest_jobs(limit: int = Query(20, ge=1, le=100)):
+    """Tarama işlerini listele"""
+    return {
+        "success": True,
+        "jobs": await asyncio.to_thread(harvester.list_jobs, limit)
+    }
+
+
+@app.get("/api/harvest/jobs/{job_id}")
+async def get_harvest_job(job_id: int):
+    """Tarama işinin durumunu getir"""
+    job = await asyncio.to_thread(harvester.get_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="İş bulunamadı")
+    return {"success": True, "job": job}
+
+
+@app.post("/api/harvest/jobs/{job_id}/resume")
+async def resume_harvest_job(job_id: int):
+    """Hata almış tarama işini kaldığı yerden sürdür"""
+    result = await harvester.resume(job_id)
+    
+    if not result["success"]:
+        status_code = 404 if result["error"] == "İş bulunamadı" else 409
+        raise HTTPException(status_code=status_code, detail=result["error"])
+    
+    return result
+
+
+@app.post("/api/sync/{slug}")
+async def start_category_sync(slug: str):
+    """Son senkrondan beri eklenen dosyaları arka planda kataloğa al"""
+    result = harvester.start_sync(slug)
+    
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["error"])
+    
+    return result
+
+
+@app.get("/api/sync/{slug}")
+async def get_category_sync_state(slug: str):
+    """Kategorinin alt kategori bazlı senkron durumunu getir"""
+    return {
+        "success": True,
+        "category_slug": slug,
+        "states": await asyncio.to_thread(harvester.get_sync_states, slug)
+    }
+
+
 # ==================== İNDİRME ====================
 
 @app.post("/api/download")
 async def download_single_image(
     url: str = Query(..., description="Görsel URL'i"),
     category: str = Query("diger", description="Hedef kategori"),
-    title: Optional[str] = Query(None, description="Dosya adı")
+    title: Optional[str] = Query(None, description="Dosya adı"),
+    sha1: Optional[str] = Query(None, description="Kaynağın bildirdiği SHA-1 (depoda varsa indirilmez)"),
+    refresh: bool = Query(False, description="Mevcut dosyayı kaynağa göre yeniden doğrula")
 ):
     """Tek görsel indir"""
     filename = None
@@ -313,34 +670,95 @@ async def download_single_image(
     result = await download_service.download_image(
         url=url,
         category_slug=category,
-        filename=filename
+        filename=filename,
+        expected_sha1=sha1,
+        refresh=refresh
     )
     
     if not result["success"]:
         raise HTTPException(status_code=500, detail=result.get("error"))
     
+    # Katalogdaki satır indirilmiş işaretlenir, lisans/yazar/yıl arka planda tamamlanır
+    catalog_ingest.record_download(url, result)
+    
     return result
 
 
 @app.post("/api/download-batch")
-async def download_batch(request: DownloadRequest, background_tasks: BackgroundTasks):
-    """Toplu görsel indirme (arka planda)"""
+async def download_batch(request: DownloadRequest):
+    """
+    Toplu görsel indirme (arka planda)
+    Görseller kalıcı kuyruğa alınır, iş kimliği hemen döner
+    """
+    result = await download_queue.enqueue(request.images, request.category_slug)
     
-    async def do_download():
-        return await download_service.download_multiple(
-            images=request.images,
-            category_slug=request.category_slug
-        )
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    
+    return result
+
+
+@app.post("/api/download-jobs/refresh")
+async def refresh_downloads(
+    category: Optional[str] = Query(None, description="Yalnızca bu kategori")
+):
+    """
+    İndirilmiş görselleri kaynağa göre yeniden doğrula (arka planda).
+    Değişmeyenler 304 ile atlanır; yalnızca değişenler yeniden indirilir.
+    """
+    result = await download_queue.enqueue_refresh(category)
     
-    # Hemen başlat ve sonucu döndür
-    result = await download_service.download_multiple(
-        images=request.images,
-        category_slug=request.category_slug
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["error"])
+    
+    return result
+
+
+@app.post("/api/pipeline")
+async def start_search_pipeline(request: PipelineRequest):
+    """
+    Arama + indirme işini sunucuda başlat.
+    Sonuçlar sayfa sayfa indirme kuyruğuna akar; indirmeler arama
+    sürerken başlar. Durum: GET /api/pipeline/{job_id}
+    """
+    result = search_pipeline.start(
+        category_slug=request.category_slug,
+        query=request.query,
+        sources=request.sources,
+        limit=request.limit,
+        min_width=request.min_width,
+        mime_types=request.mime_types
     )
     
+    if not result["success"]:
+        status_code = 404 if result["error"] == "Kategori bulunamadı" else 400
+        raise HTTPException(status_code=status_code, detail=result["error"])
+    
     return result
 
 
+@app.get("/api/pipeline/{job_id}")
+async def get_search_pipeline(job_id: str):
+    """Arama + indirme işinin durumunu getir"""
+    job = await asyncio.to_thread(search_pipeline.get_job, job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="İş bulunamadı")
+    
+    return {"success": True, **job}
+
+
+@app.get("/api/download-jobs/{job_id}")
+async def get_download_job(job_id: str):
+    """Toplu indirme işinin durumunu getir"""
+    job = await asyncio.to_thread(download_queue.get_job, job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="İş bulunamadı")
+    
+    return {"success": True, **job}
+
+
 # ==================== İNDİRİLMİŞ GÖRSELLER ====================
 
 @app.get("/api/downloaded")
@@ -348,7 +766,8 @@ async def get_downloaded_images(
     category: Optional[str] = Query(None, description="Kategori filtresi")
 ):
     """İndirilmiş görselleri listele"""
-    images = download_service.get_downloaded_images(category_slug=category)
+    # Dizin taraması diske takılırsa diğer istekler beklemesin
+    images = await asyncio.to_thread(download_service.get_downloaded_images, category)
     
     # Görsellerin web URL'lerini oluştur
     for img in images:
@@ -405,12 +824,12 @@ async def open_downloads_folder():
 @app.get("/api/stats")
 async def get_statistics():
     """İstatistikleri getir"""
-    with get_db() as db:
+    async with get_async_db() as db:
         # Kategori istatistikleri
-        categories = db.query(Category).all()
+        categories = (await db.scalars(select(Category))).all()
         
         # Toplam indirilen görsel sayısı
-        downloaded_images = download_service.get_downloaded_images()
+        downloaded_images = await asyncio.to_thread(download_service.get_downloaded_images)
         
         # Kategori bazlı dağılım
         category_stats = {}
@@ -435,10 +854,10 @@ async def get_statistics():
 @app.get("/api/history")
 async def get_search_history(limit: int = Query(20, ge=1, le=100)):
     """Arama geçmişini getir"""
-    with get_db() as db:
-        history = db.query(SearchHistory).order_by(
-            SearchHistory.created_at.desc()
-        ).limit(limit).all()
+    async with get_async_db() as db:
+        history = (await db.scalars(
+            select(SearchHistory).order_by(SearchHistory.created_at.desc()).limit(limit)
+        )).all()
         
         return {
             "success": True,
@@ -449,9 +868,9 @@ async def get_search_history(limit: int = Query(20, ge=1, le=100)):
 @app.delete("/api/history")
 async def clear_search_history():
     """Arama geçmişini temizle"""
-    with get_db() as db:
-        db.query(SearchHistory).delete()
-        db.commit()
+    async with get_async_db() as db:
+        await db.execute(delete(SearchHistory))
+        await db.commit()
         return {"success": True, "message": "Geçmiş temizlendi"}
 
 
@@ -460,13 +879,13 @@ async def clear_search_history():
 @app.post("/api/favorites/{image_id}")
 async def toggle_favorite(image_id: int):
     """Favori durumunu değiştir"""
-    with get_db() as db:
-        image = db.query(Image).filter(Image.id == image_id).first()
+    async with get_async_db() as db:
+        image = await db.get(Image, image_id)
         if not image:
             raise HTTPException(status_code=404, detail="Görsel bulunamadı")
         
         image.is_favorite = not image.is_favorite
-        db.commit()
+        await db.commit()
         
         return {
             "success": True,
@@ -477,8 +896,11 @@ async def toggle_favorite(image_id: int):
 @app.get("/api/favorites")
 async def get_favorites():
     """Favori görselleri getir"""
-    with get_db() as db:
-        favorites = db.query(Image).filter(Image.is_favorite == True).all()
+    async with get_async_db() as db:
+        # to_dict kategori adını okur; asenkron oturumda tembel yükleme yapılamaz
+        favorites = (await db.scalars(
+            select(Image).options(selectinload(Image.category)).where(Image.is_favorite == True)
+        )).all()
         return {
             "success": True,
             "images": [img.to_dict() for img in favorites],
@@ -489,21 +911,19 @@ async def get_favorites():
 @app.get("/api/debug-download")
 async def debug_download(url: str = Query(..., description="Test URL")):
     """Debug indirme testi"""
-    import aiohttp
-    
     headers = {
         "User-Agent": "WW2ImageArchive/1.0 (https://ww2-archive.onrender.com; contact@example.com)",
         "Referer": "https://commons.wikimedia.org/"
     }
     
     try:
-        async with aiohttp.ClientSession(headers=headers) as session:
-            async with session.get(url) as response:
-                return {
-                    "status": response.status,
-                    "headers": dict(response.headers),
-                    "url": url
-                }
+        session = http_client.session(url, headers=headers)
+        async with session.get(url) as response:
+            return {
+                "status": response.status,
+                "headers": dict(response.headers),
+                "url": url
+            }
     except Exception as e:
         return {"error": str(e)}
 
@@ -7,6 +7,10 @@ import asyncio
 from typing import Dict, Any, Optional, List
 import re
 
+from ..core.deadline import DeadlineExceeded, partial_result
+from ..core.http_client import http_client
+from ..core.upstream import get_json
+
 
 class ArchiveOrgScraper:
     """Internet Archive üzerinden WW2 video ve görselleri arama"""
@@ -34,20 +38,10 @@ class ArchiveOrgScraper:
         "liderler": ["eisenhower speech", "churchill", "roosevelt address"]
     }
     
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
-        self.rate_limit_delay = 0.5
+    HEADERS = {"User-Agent": "WW2ImageArchive/1.0"}
     
     async def _get_session(self) -> aiohttp.ClientSession:
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(
-                headers={"User-Agent": "WW2ImageArchive/1.0"}
-            )
-        return self.session
-    
-    async def close(self):
-        if self.session and not self.session.closed:
-            await self.session.close()
+        return http_client.session(self.SEARCH_URL, headers=self.HEADERS)
     
     async def search_videos(
         self,
@@ -70,44 +64,43 @@ class ArchiveOrgScraper:
         }
         
         try:
-            async with session.get(self.SEARCH_URL, params=params) as response:
-                if response.status != 200:
-                    return {"success": False, "error": f"API error: {response.status}", "videos": []}
-                
-                data = await response.json()
-                
-                if "response" not in data or "docs" not in data["response"]:
-                    return {"success": True, "videos": [], "total": 0}
-                
-                videos = []
-                for doc in data["response"]["docs"]:
-                    identifier = doc.get("identifier", "")
-                    
-                    video = {
-                        "source_id": f"archive_{identifier}",
-                        "title": self._clean_title(doc.get("title", "Untitled")),
-                        "description": (doc.get("description", "") or "")[:500],
-                        "year": doc.get("year", ""),
-                        "creator": doc.get("creator", "Unknown"),
-                        "downloads": doc.get("downloads", 0),
-                        "thumbnail_url": f"https://archive.org/services/img/{identifier}",
-                        "page_url": f"https://archive.org/details/{identifier}",
-                        "embed_url": f"https://archive.org/embed/{identifier}",
-                        "download_url": f"https://archive.org/download/{identifier}",
-                        "source": "archive_org",
-                        "media_type": "video"
-                    }
-                    videos.append(video)
-                
-                await asyncio.sleep(self.rate_limit_delay)
+            status, data = await get_json(session, self.SEARCH_URL, params, source="archive_org")
+            if status != 200:
+                return {"success": False, "error": f"API error: {status}", "videos": []}
+            
+            if "response" not in data or "docs" not in data["response"]:
+                return {"success": True, "videos": [], "total": 0}
+            
+            videos = []
+            for doc in data["response"]["docs"]:
+                identifier = doc.get("identifier", "")
                 
-                return {
-                    "success": True,
-                    "videos": videos,
-                    "total": data["response"].get("numFound", len(videos)),
-                    "query": query
+                video = {
+                    "source_id": f"archive_{identifier}",
+                    "title": self._clean_title(doc.get("title", "Untitled")),
+                    "description": (doc.get("description", "") or "")[:500],
+                    "year": doc.get("year", ""),
+                    "creator": doc.get("creator", "Unknown"),
+                    "downloads": doc.get("downloads", 0),
+                    "thumbnail_url": f"https://archive.org/services/img/{identifier}",
+                    "page_url": f"https://archive.org/details/{identifier}",
+                    "embed_url": f"https://archive.org/embed/{identifier}",
+                    "download_url": f"https://archive.org/download/{identifier}",
+                    "source": "archive_org",
+                    "media_type": "video"
                 }
-                
+                videos.append(video)
+            
+            return {
+                "success": True,
+                "videos": videos,
+                "total": data["response"].get("numFound", len(videos)),
+                "query": query,
+                "partial": False
+            }
+            
+        except DeadlineExceeded:
+            return partial_result("videos", query=query)
         except Exception as e:
             return {"success": False, "error": str(e), "videos": []}
     
@@ -131,44 +124,44 @@ class ArchiveOrgScraper:
         }
         
         try:
-            async with session.get(self.SEARCH_URL, params=params) as response:
-                if response.status != 200:
-                    return {"success": False, "error": f"API error: {response.status}", "images": []}
-                
-                data = await response.json()
-                
-                if "response" not in data or "docs" not in data["response"]:
-                    return {"success": True, "images": [], "total": 0}
-                
-                images = []
-                for doc in data["response"]["docs"]:
-                    identifier = doc.get("identifier", "")
-                    
-                    image = {
-                        "source_id": f"archive_{identifier}",
-                        "title": self._clean_title(doc.get("title", "Untitled")),
-                        "description": (doc.get("description", "") or "")[:500],
-                        "source_url": f"https://archive.org/download/{identifier}/{identifier}.jpg",
-                        "thumbnail_url": f"https://archive.org/services/img/{identifier}",
-                        "width": 0,
-                        "height": 0,
-                        "file_size": 0,
-                        "mime_type": "image/jpeg",
-                        "license": "Public Domain",
-                        "author": doc.get("creator", "Unknown"),
-                        "source": "archive_org"
-                    }
-                    images.append(image)
-                
-                await asyncio.sleep(self.rate_limit_delay)
+            status, data = await get_json(session, self.SEARCH_URL, params, source="archive_org")
+            if status != 200:
+                return {"success": False, "error": f"API error: {status}", "images": []}
+            
+            if "response" not in data or "docs" not in data["response"]:
+                return {"success": True, "images": [], "total": 0}
+            
+            images = []
+            for doc in data["response"]["docs"]:
+                identifier = doc.get("identifier", "")
                 
-                return {
-                    "success": True,
-                    "images": images,
-                    "total": len(images),
-                    "query": query
+                image = {
+                    "source_id": f"archive_{identifier}",
+                    "title": self._clean_title(doc.get("title", "Untitled")),
+                    "description": (doc.get("description", "") or "")[:500],
+                    "source_url": f"https://archive.org/download/{identifier}/{identifier}.jpg",
+                    "thumbnail_url": f"https://archive.org/services/img/{identifier}",
+                    "width": 0,
+                    "height": 0,
+                    "file_size": 0,
+                    "mime_type": "image/jpeg",
+                    "license": "Public Domain",
+                    "author": doc.get("creator", "Unknown"),
+                    "year": doc.get("year"),
+                    "source": "archive_org"
                 }
-                
+                images.append(image)
+            
+            return {
+                "success": True,
+                "images": images,
+                "total": len(images),
+                "query": query,
+                "partial": False
+            }
+            
+        except DeadlineExceeded:
+            return partial_result(query=query)
         except Exception as e:
             return {"success": False, "error": str(e), "images": []}
     
@@ -184,13 +177,16 @@ class ArchiveOrgScraper:
         all_videos = []
         queries = self.WW2_QUERIES[category_slug][:2]
         
-        for query in queries:
-            if len(all_videos) >= limit:
-                break
-            
-            result = await self.search_videos(query, limit=limit//len(queries))
+        # Sorgular eşzamanlı çalışır, hız sınırını limiter uygular
+        results = await asyncio.gather(*[
+            self.search_videos(query, limit=limit//len(queries))
+            for query in queries
+        ])
+        partial = False
+        for result in results:
             if result["success"]:
                 all_videos.extend(result["videos"])
+                partial = partial or result.get("partial", False)
         
         # Duplicate'leri kaldır
         seen = set()
@@ -203,7 +199,8 @@ class ArchiveOrgScraper:
         return {
             "success": True,
             "videos": unique_videos[:limit],
-            "total": len(unique_videos)
+            "total": len(unique_videos),
+            "partial": partial
         }
     
     def _clean_title(self, title: str) -> str:
@@ -7,6 +7,10 @@ import asyncio
 from typing import Dict, Any, Optional, List
 import re
 
+from ..core.deadline import DeadlineExceeded, partial_result
+from ..core.http_client import http_client
+from ..core.upstream import get_json
+
 
 class NationalArchivesScraper:
     """National Archives Catalog API üzerinden WW2 görselleri arama"""
@@ -25,20 +29,10 @@ class NationalArchivesScraper:
         "liderler": ["eisenhower", "patton", "macarthur", "roosevelt war"]
     }
     
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
-        self.rate_limit_delay = 0.5
+    HEADERS = {"User-Agent": "WW2ImageArchive/1.0"}
     
     async def _get_session(self) -> aiohttp.ClientSession:
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(
-                headers={"User-Agent": "WW2ImageArchive/1.0"}
-            )
-        return self.session
-    
-    async def close(self):
-        if self.session and not self.session.closed:
-            await self.session.close()
+        return http_client.session(self.BASE_URL, headers=self.HEADERS)
     
     async def search_images(
         self,
@@ -61,48 +55,47 @@ class NationalArchivesScraper:
         }
         
         try:
-            async with session.get(f"{self.BASE_URL}/search", params=params) as response:
-                if response.status != 200:
-                    return {"success": False, "error": f"API error: {response.status}", "images": []}
-                
-                data = await response.json()
-                
-                if "results" not in data or "result" not in data["results"]:
-                    return {"success": True, "images": [], "total": 0}
-                
-                for item in data["results"]["result"]:
-                    # Görsel URL'sini bul
-                    image_url = self._extract_image_url(item)
-                    if not image_url:
-                        continue
-                    
-                    desc = item.get("description", {})
-                    
-                    image = {
-                        "source_id": f"nara_{item.get('naId', '')}",
-                        "title": self._clean_title(desc.get("title", item.get("title", "Untitled"))),
-                        "description": desc.get("scopeAndContentNote", "")[:500] if desc.get("scopeAndContentNote") else "",
-                        "source_url": image_url,
-                        "thumbnail_url": self._get_thumbnail_url(image_url),
-                        "width": 0,  # NARA API boyut vermez
-                        "height": 0,
-                        "file_size": 0,
-                        "mime_type": "image/jpeg",
-                        "license": "Public Domain",
-                        "author": "National Archives",
-                        "source": "nara"
-                    }
-                    all_images.append(image)
+            status, data = await get_json(session, f"{self.BASE_URL}/search", params, source="nara")
+            if status != 200:
+                return {"success": False, "error": f"API error: {status}", "images": []}
+            
+            if "results" not in data or "result" not in data["results"]:
+                return {"success": True, "images": [], "total": 0}
+            
+            for item in data["results"]["result"]:
+                # Görsel URL'sini bul
+                image_url = self._extract_image_url(item)
+                if not image_url:
+                    continue
                 
-                await asyncio.sleep(self.rate_limit_delay)
+                desc = item.get("description", {})
                 
-                return {
-                    "success": True,
-                    "images": all_images[:limit],
-                    "total": len(all_images),
-                    "query": search_query
+                image = {
+                    "source_id": f"nara_{item.get('naId', '')}",
+                    "title": self._clean_title(desc.get("title", item.get("title", "Untitled"))),
+                    "description": desc.get("scopeAndContentNote", "")[:500] if desc.get("scopeAndContentNote") else "",
+                    "source_url": image_url,
+                    "thumbnail_url": self._get_thumbnail_url(image_url),
+                    "width": 0,  # NARA API boyut vermez
+                    "height": 0,
+                    "file_size": 0,
+                    "mime_type": "image/jpeg",
+                    "license": "Public Domain",
+                    "author": "National Archives",
+                    "source": "nara"
                 }
-                
+                all_images.append(image)
+            
+            return {
+                "success": True,
+                "images": all_images[:limit],
+                "total": len(all_images),
+                "query": search_query,
+                "partial": False
+            }
+            
+        except DeadlineExceeded:
+            return partial_result(query=search_query)
         except Exception as e:
             return {"success": False, "error": str(e), "images": []}
     
@@ -118,13 +111,16 @@ class NationalArchivesScraper:
         all_images = []
         queries = self.WW2_QUERIES[category_slug][:3]
         
-        for query in queries:
-            if len(all_images) >= limit:
-                break
-            
-            result = await self.search_images(query, limit=limit//len(queries))
+        # Sorgular eşzamanlı çalışır, hız sınırını limiter uygular
+        results = await asyncio.gather(*[
+            self.search_images(query, limit=limit//len(queries))
+            for query in queries
+        ])
+        partial = False
+        for result in results:
             if result["success"]:
                 all_images.extend(result["images"])
+                partial = partial or result.get("partial", False)
         
         # Duplicate'leri kaldır
         seen = set()
@@ -137,7 +133,8 @@ class NationalArchivesScraper:
         return {
             "success": True,
             "images": unique_images[:limit],
-            "total": len(unique_images)
+            "total": len(unique_images),
+            "partial": partial
         }
     
     def _extract_image_url(self, item: dict) -> Optional[str]:
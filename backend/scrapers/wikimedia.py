@@ -4,15 +4,44 @@ Daha fazla görsel için optimize edildi
 """
 import aiohttp
 import asyncio
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from urllib.parse import quote
 import re
+import json
+import base64
+
+from ..core.cache import response_cache
+from ..core.deadline import DeadlineExceeded
+from ..core.http_client import http_client
+from ..core.upstream import get_json
+
+# Detay görünümü için gereken extmetadata alanları
+METADATA_FIELDS = "ImageDescription|LicenseShortName|Artist|DateTimeOriginal"
+
+
+def encode_cursor(state: dict) -> str:
+    """Sayfalama durumunu opak, URL-güvenli bir cursor'a çevir"""
+    raw = json.dumps(state, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Cursor'ı çöz; bozuk cursor için ValueError fırlatır"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as e:
+        raise ValueError("Geçersiz cursor") from e
+    if not isinstance(state, dict):
+        raise ValueError("Geçersiz cursor")
+    return state
 
 
 class WikimediaScraper:
     """Wikimedia Commons API üzerinden WW2 görselleri arama ve indirme"""
     
     BASE_URL = "https://commons.wikimedia.org/w/api.php"
+    METADATA_CACHE_URL = "wikimedia-meta://extmetadata"
     
     # WW2 ile ilgili Wikimedia kategorileri - GENİŞLETİLMİŞ
     WW2_CATEGORIES = {
@@ -207,24 +236,185 @@ class WikimediaScraper:
         ]
     }
     
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
-        self.rate_limit_delay = 0.3  # Daha hızlı API çağrıları
+    HEADERS = {
+        "User-Agent": "WW2ImageArchive/1.0 (https://ww2-archive.onrender.com; contact@example.com)"
+    }
     
-    async def _get_session(self) -> aiohttp.ClientSession:
-        """HTTP session oluştur veya mevcut olanı döndür"""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(
-                headers={
-                    "User-Agent": "WW2ImageArchive/1.0 (https://ww2-archive.onrender.com; contact@example.com)"
-                }
-            )
-        return self.session
+    async def _get_session(self, url: Optional[str] = None) -> aiohttp.ClientSession:
+        """Hedef host'un paylaşılan bağlantı havuzundaki session'ı döndür"""
+        return http_client.session(url or self.BASE_URL, headers=self.HEADERS)
+    
+    async def _query(self, params: dict, use_cache: bool = True) -> Optional[dict]:
+        """
+        API'ye istek at; başarısız istekte (429/5xx, API hatası) None döndür.
+        Sonuç yoksa API "query" alanını hiç göndermez; bu durumda yanıt yine döner.
+        use_cache=False yanıt önbelleğini atlayıp kaynağa gider.
+        """
+        session = await self._get_session()
+        status, data = await get_json(
+            session, self.BASE_URL, params, source="wikimedia", use_cache=use_cache
+        )
+        
+        if status != 200 or not isinstance(data, dict) or "error" in data:
+            return None
+        
+        return data
+    
+    def _parse_pages(self, pages: dict, min_width: int) -> List[Dict[str, Any]]:
+        """imageinfo içeren sayfaları görsel sözlüklerine çevir"""
+        images = []
+        
+        for page_id, page_data in pages.items():
+            if "imageinfo" not in page_data:
+                continue
+            
+            info = page_data["imageinfo"][0]
+            
+            width = info.get("width", 0)
+            if width < min_width:
+                continue
+            
+            mime = info.get("mime", "")
+            if not mime.startswith("image/"):
+                continue
+            
+            image = {
+                "source_id": str(page_id),
+                "title": self._clean_title(page_data.get("title", "")),
+                "page_title": page_data.get("title", ""),
+                "source_url": info.get("url", ""),
+                "thumbnail_url": info.get("thumburl", info.get("url", "")),
+                "width": width,
+                "height": info.get("height", 0),
+                "file_size": info.get("size", 0),
+                "mime_type": mime,
+                "sha1": info.get("sha1"),
+                "source": "wikimedia"
+            }
+            # Hafif sorgularda extmetadata yoktur; get_metadata ile sonradan doldurulur
+            image.update(self._parse_metadata(info.get("extmetadata")))
+            images.append(image)
+        
+        return images
     
-    async def close(self):
-        """Session'ı kapat"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+    def _merge_unique(
+        self,
+        batches: List[List[Dict[str, Any]]],
+        seen_ids: Optional[set] = None
+    ) -> List[Dict[str, Any]]:
+        """Sorgu sonuçlarını sırayı koruyarak birleştir, tekrarları at"""
+        seen_ids = seen_ids if seen_ids is not None else set()
+        merged = []
+        for batch in batches:
+            for img in batch:
+                if img["source_id"] not in seen_ids:
+                    seen_ids.add(img["source_id"])
+                    merged.append(img)
+        return merged
+    
+    async def _search_query(
+        self,
+        search_query: str,
+        limit: int,
+        offset: int,
+        min_width: int,
+        use_cache: bool = True
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Tek bir gsrsearch sorgusu çalıştır; (görseller, sonraki offset) döndür"""
+        params = {
+            "action": "query",
+            "format": "json",
+            "generator": "search",
+            "gsrsearch": f"filetype:bitmap {search_query}",
+            "gsrlimit": min(50, limit),
+            "gsroffset": offset,
+            "gsrnamespace": 6,
+            "prop": "imageinfo",
+            "iiprop": "url|size|mime|sha1",
+            "iiurlwidth": 400,
+        }
+        
+        try:
+            data = await self._query(params, use_cache)
+            if data is None:
+                # Geçici hata: akış tükenmiş sayılmaz, aynı konumdan tekrar denenir
+                return [], offset
+            next_offset = data.get("continue", {}).get("gsroffset")
+            return self._parse_pages(data.get("query", {}).get("pages", {}), min_width), next_offset
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Arama hatası ({search_query}): {e}")
+            # Hata durumunda aynı konumdan tekrar denenebilsin
+            return [], offset
+    
+    async def _category_members(
+        self,
+        wiki_category: str,
+        limit: int = 50,
+        continue_token: Optional[str] = None,
+        use_cache: bool = True
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Tek bir Wikimedia kategorisinin dosyalarını getir; (görseller, gcmcontinue) döndür"""
+        params = {
+            "action": "query",
+            "format": "json",
+            "generator": "categorymembers",
+            "gcmtitle": f"Category:{wiki_category}",
+            "gcmtype": "file",
+            "gcmlimit": min(50, limit),
+            "prop": "imageinfo",
+            "iiprop": "url|size|mime|sha1",
+            "iiurlwidth": 400,
+        }
+        
+        if continue_token:
+            params["gcmcontinue"] = continue_token
+        
+        try:
+            data = await self._query(params, use_cache)
+            if data is None:
+                # Geçici hata: akış tükenmiş sayılmaz, aynı konumdan tekrar denenir
+                return [], continue_token or ""
+            next_token = data.get("continue", {}).get("gcmcontinue")
+            # Minimum genişlik düşürüldü - 300px
+            return self._parse_pages(data.get("query", {}).get("pages", {}), 300), next_token
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Kategori hatası ({wiki_category}): {e}")
+            return [], continue_token or ""
+    
+    async def _fill_from_searches(
+        self,
+        terms: List[str],
+        all_images: List[Dict[str, Any]],
+        seen_ids: set,
+        limit: int,
+        per_term: int = 30,
+        use_cache: bool = True
+    ) -> bool:
+        """
+        Eksik kalan görselleri arama terimleriyle tamamla.
+        Terimler, kalan ihtiyaç kadar genişlikte dalgalar halinde eşzamanlı aranır.
+        İstek bütçesi dolduğu için eksik kalındıysa True döner.
+        """
+        terms = list(terms)
+        while terms and len(all_images) < limit:
+            wave_size = -(-(limit - len(all_images)) // per_term)
+            wave, terms = terms[:wave_size], terms[wave_size:]
+            
+            results = await asyncio.gather(*[
+                self.search_images(query=term, limit=per_term, min_width=600, use_cache=use_cache)
+                for term in wave
+            ])
+            all_images.extend(self._merge_unique(
+                [r["images"] for r in results if r["success"]],
+                seen_ids
+            ))
+            if any(r.get("partial") for r in results):
+                return True
+        return False
     
     async def search_images(
         self, 
@@ -232,16 +422,16 @@ class WikimediaScraper:
         category_slug: Optional[str] = None,
         limit: int = 100,  # Artırıldı
         offset: int = 0,
-        min_width: int = 600  # Düşürüldü - daha fazla sonuç
+        min_width: int = 600,  # Düşürüldü - daha fazla sonuç
+        cursor: Optional[str] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Görsel arama - Geliştirilmiş versiyon
-        Birden fazla arama terimi ile arama yapar
+        Birden fazla arama terimi ile arama yapar.
+        cursor her alt sorgunun kaldığı offset'i taşır; sonraki sayfa için
+        dönen next_cursor kullanılır.
         """
-        session = await self._get_session()
-        all_images = []
-        seen_ids = set()
-        
         # Arama sorgularını hazırla
         search_queries = [f"World War II {query}", f"WW2 {query}", f"WWII {query}"]
         
@@ -251,197 +441,122 @@ class WikimediaScraper:
             for term in extra_terms:
                 search_queries.append(f"{query} {term}")
         
-        # Her sorgu için arama yap
-        for search_query in search_queries[:6]:  # Maksimum 6 sorgu
-            if len(all_images) >= limit:
-                break
-                
-            params = {
-                "action": "query",
-                "format": "json",
-                "generator": "search",
-                "gsrsearch": f"filetype:bitmap {search_query}",
-                "gsrlimit": min(50, limit - len(all_images)),
-                "gsroffset": offset,
-                "gsrnamespace": 6,
-                "prop": "imageinfo",
-                "iiprop": "url|size|mime|extmetadata",
-                "iiurlwidth": 400,
+        search_queries = search_queries[:6]  # Maksimum 6 sorgu
+        positions = decode_cursor(cursor).get("s", {}) if cursor else {}
+        
+        # Tükenmiş (None) sorgular atlanır
+        active = [q for q in search_queries if positions.get(q, offset) is not None]
+        if not active:
+            return {
+                "success": True,
+                "images": [],
+                "total": 0,
+                "query": query,
+                "partial": False,
+                "next_cursor": None
             }
-            
-            try:
-                async with session.get(self.BASE_URL, params=params) as response:
-                    if response.status != 200:
-                        continue
-                    
-                    data = await response.json()
-                    
-                    if "query" not in data or "pages" not in data["query"]:
-                        continue
-                    
-                    for page_id, page_data in data["query"]["pages"].items():
-                        if page_id in seen_ids:
-                            continue
-                        seen_ids.add(page_id)
-                        
-                        if "imageinfo" not in page_data:
-                            continue
-                        
-                        info = page_data["imageinfo"][0]
-                        
-                        width = info.get("width", 0)
-                        if width < min_width:
-                            continue
-                        
-                        mime = info.get("mime", "")
-                        if not mime.startswith("image/"):
-                            continue
-                        
-                        extmeta = info.get("extmetadata", {})
-                        
-                        image = {
-                            "source_id": str(page_id),
-                            "title": self._clean_title(page_data.get("title", "")),
-                            "description": self._get_meta_value(extmeta, "ImageDescription"),
-                            "source_url": info.get("url", ""),
-                            "thumbnail_url": info.get("thumburl", info.get("url", "")),
-                            "width": width,
-                            "height": info.get("height", 0),
-                            "file_size": info.get("size", 0),
-                            "mime_type": mime,
-                            "license": self._get_meta_value(extmeta, "LicenseShortName"),
-                            "author": self._get_meta_value(extmeta, "Artist"),
-                            "source": "wikimedia"
-                        }
-                        all_images.append(image)
-                
-                await asyncio.sleep(self.rate_limit_delay)
-                
-            except Exception as e:
-                print(f"Arama hatası ({search_query}): {e}")
-                continue
+        
+        # Sayfa bütçesi aktif sorgulara bölünür; kesilen sonuç olmadığı için
+        # cursor hiçbir görseli atlamaz
+        per_query = -(-limit // len(active))
+        
+        # Sorgular eşzamanlı çalışır, hız sınırını limiter uygular.
+        # Bütçe dolarsa yetişen sorguların sonuçları döner (partial)
+        results = await asyncio.gather(*[
+            self._search_query(q, per_query, positions.get(q, offset), min_width, use_cache)
+            for q in active
+        ], return_exceptions=True)
+        batches, partial = self._collect(active, results, positions)
+        all_images = self._merge_unique(batches)
         
         return {
             "success": True,
-            "images": all_images[:limit],
+            "images": all_images,
             "total": len(all_images),
-            "query": query
+            "query": query,
+            "partial": partial,
+            "next_cursor": self._next_cursor({"s": positions}, search_queries, "s")
         }
     
     async def get_category_images(
         self,
         category_slug: str,
         limit: int = 100,  # Artırıldı
-        continue_token: Optional[str] = None
+        cursor: Optional[str] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Wikimedia kategorisinden görseller getir - Geliştirilmiş versiyon
-        Daha fazla kategori tarar
+        Daha fazla kategori tarar.
+        cursor her alt kategorinin gcmcontinue konumunu taşır. Arama ile
+        tamamlama yalnızca ilk sayfada yapılır. use_cache=False listeyi
+        yanıt önbelleğine bakmadan kaynaktan yeniler.
         """
         if category_slug not in self.WW2_CATEGORIES:
             return {"success": False, "error": "Kategori bulunamadı", "images": []}
         
-        session = await self._get_session()
-        all_images = []
         seen_ids = set()
+        positions = decode_cursor(cursor).get("c", {}) if cursor else {}
         
-        # Kategorideki TÜM alt kategorileri kullan (önceden sadece 3 idi)
-        categories = self.WW2_CATEGORIES[category_slug][:10]  # İlk 10 kategori
-        
-        for wiki_category in categories:
-            if len(all_images) >= limit:
-                break
-                
-            params = {
-                "action": "query",
-                "format": "json",
-                "generator": "categorymembers",
-                "gcmtitle": f"Category:{wiki_category}",
-                "gcmtype": "file",
-                "gcmlimit": 50,  # Her kategoriden 50 görsel
-                "prop": "imageinfo",
-                "iiprop": "url|size|mime|extmetadata",
-                "iiurlwidth": 400,
-            }
-            
-            if continue_token:
-                params["gcmcontinue"] = continue_token
-            
-            try:
-                async with session.get(self.BASE_URL, params=params) as response:
-                    if response.status != 200:
-                        continue
-                    
-                    data = await response.json()
-                    
-                    if "query" not in data or "pages" not in data["query"]:
-                        continue
-                    
-                    for page_id, page_data in data["query"]["pages"].items():
-                        if page_id in seen_ids:
-                            continue
-                        seen_ids.add(page_id)
-                        
-                        if "imageinfo" not in page_data:
-                            continue
-                        
-                        info = page_data["imageinfo"][0]
-                        
-                        # Minimum genişlik düşürüldü - 300px
-                        if info.get("width", 0) < 300:
-                            continue
-                        
-                        mime = info.get("mime", "")
-                        if not mime.startswith("image/"):
-                            continue
-                        
-                        extmeta = info.get("extmetadata", {})
-                        
-                        image = {
-                            "source_id": str(page_id),
-                            "title": self._clean_title(page_data.get("title", "")),
-                            "description": self._get_meta_value(extmeta, "ImageDescription"),
-                            "source_url": info.get("url", ""),
-                            "thumbnail_url": info.get("thumburl", info.get("url", "")),
-                            "width": info.get("width", 0),
-                            "height": info.get("height", 0),
-                            "file_size": info.get("size", 0),
-                            "mime_type": mime,
-                            "license": self._get_meta_value(extmeta, "LicenseShortName"),
-                            "author": self._get_meta_value(extmeta, "Artist"),
-                            "source": "wikimedia"
-                        }
-                        all_images.append(image)
-                
-                await asyncio.sleep(self.rate_limit_delay)
-                
-            except Exception as e:
-                print(f"Kategori hatası ({wiki_category}): {e}")
-                continue
+        # Tükenmemiş ilk 10 alt kategori taranır; bitenlerin yerini sıradakiler alır
+        wiki_categories = self.WW2_CATEGORIES[category_slug]
+        active = [c for c in wiki_categories if positions.get(c, "") is not None][:10]
+        
+        all_images = []
+        partial = False
+        if active:
+            per_category = -(-limit // len(active))
+            results = await asyncio.gather(*[
+                self._category_members(c, per_category, positions.get(c), use_cache)
+                for c in active
+            ], return_exceptions=True)
+            batches, partial = self._collect(active, results, positions)
+            all_images = self._merge_unique(batches, seen_ids)
         
         # Arama ile de görseller ekle
-        if len(all_images) < limit and category_slug in self.SEARCH_TERMS:
-            search_terms = self.SEARCH_TERMS[category_slug][:3]
-            for term in search_terms:
-                if len(all_images) >= limit:
-                    break
-                search_result = await self.search_images(
-                    query=term,
-                    limit=30,
-                    min_width=600
-                )
-                if search_result["success"]:
-                    for img in search_result["images"]:
-                        if img["source_id"] not in seen_ids:
-                            seen_ids.add(img["source_id"])
-                            all_images.append(img)
+        if cursor is None and not partial and category_slug in self.SEARCH_TERMS:
+            partial = await self._fill_from_searches(
+                self.SEARCH_TERMS[category_slug][:3], all_images, seen_ids, limit,
+                use_cache=use_cache
+            )
         
         return {
             "success": True,
-            "images": all_images[:limit],
-            "total": len(all_images)
+            "images": all_images,
+            "total": len(all_images),
+            "partial": partial,
+            "next_cursor": self._next_cursor({"c": positions}, wiki_categories, "c")
         }
     
+    def _collect(
+        self,
+        streams: List[str],
+        results: list,
+        positions: dict
+    ) -> Tuple[List[List[Dict[str, Any]]], bool]:
+        """
+        gather sonuçlarından görsel gruplarını ayır ve cursor konumlarını ilerlet.
+        Bütçe dolduğu için biten akışların konumu değişmez, bir sonraki
+        sayfada aynı yerden devam edilir.
+        """
+        batches = []
+        partial = False
+        for name, result in zip(streams, results):
+            if isinstance(result, BaseException):
+                partial = True
+                continue
+            images, next_position = result
+            batches.append(images)
+            positions[name] = next_position
+        return batches, partial
+    
+    def _next_cursor(self, state: dict, streams: List[str], kind: str) -> Optional[str]:
+        """Tüm alt akışlar tükendiyse None, aksi halde yeni cursor"""
+        positions = state[kind]
+        if all(positions.get(name, "") is None for name in streams):
+            return None
+        return encode_cursor(state)
+    
     async def bulk_search(
         self,
         category_slug: str,
@@ -451,42 +566,104 @@ class WikimediaScraper:
         Toplu arama - Maksimum görsel bulmak için
         Hem kategori hem de arama terimlerini kullanır
         """
-        all_images = []
         seen_ids = set()
         
         # Önce kategori görselleri
+        all_images = []
+        partial = False
         cat_result = await self.get_category_images(category_slug, limit=limit//2)
         if cat_result["success"]:
-            for img in cat_result["images"]:
-                if img["source_id"] not in seen_ids:
-                    seen_ids.add(img["source_id"])
-                    all_images.append(img)
+            all_images = self._merge_unique([cat_result["images"]], seen_ids)
+            partial = cat_result["partial"]
         
         # Sonra arama terimleri ile
-        if category_slug in self.SEARCH_TERMS:
-            for term in self.SEARCH_TERMS[category_slug]:
-                if len(all_images) >= limit:
-                    break
-                search_result = await self.search_images(
-                    query=term,
-                    limit=30,
-                    min_width=600
-                )
-                if search_result["success"]:
-                    for img in search_result["images"]:
-                        if img["source_id"] not in seen_ids:
-                            seen_ids.add(img["source_id"])
-                            all_images.append(img)
+        if not partial and category_slug in self.SEARCH_TERMS:
+            partial = await self._fill_from_searches(
+                self.SEARCH_TERMS[category_slug], all_images, seen_ids, limit
+            )
         
         return {
             "success": True,
             "images": all_images[:limit],
-            "total": len(all_images)
+            "total": len(all_images),
+            "partial": partial
         }
     
+    async def get_subcategories(self, wiki_category: str) -> List[str]:
+        """Kategorinin doğrudan alt kategorilerini getir (ağaç tarama için)"""
+        session = await self._get_session()
+        params = {
+            "action": "query",
+            "format": "json",
+            "list": "categorymembers",
+            "cmtitle": f"Category:{wiki_category}",
+            "cmtype": "subcat",
+            "cmlimit": 500,
+        }
+        subcategories = []
+        
+        while True:
+            status, data = await get_json(
+                session, self.BASE_URL, params, source="wikimedia", use_cache=False
+            )
+            if status != 200:
+                raise RuntimeError(f"API error: {status}")
+            
+            for member in data.get("query", {}).get("categorymembers", []):
+                subcategories.append(re.sub(r'^Category:', '', member["title"]))
+            
+            if "continue" not in data:
+                return subcategories
+            params = {**params, **data["continue"]}
+    
+    async def get_category_files_page(
+        self,
+        wiki_category: str,
+        continue_params: Optional[dict] = None,
+        min_width: int = 0,
+        since: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[dict]]:
+        """
+        Kategorinin dosyalarından bir sayfa (50 dosya, imageinfo toplu) getir.
+        Dönen continue parametreleri bir sonraki çağrıya aynen verilir;
+        None kategorinin bittiğini gösterir. Hatalar yukarı fırlatılır.
+        since (ISO 8601) verilirse yalnızca o andan sonra kategoriye eklenen
+        dosyalar, eklenme zamanına göre sıralı döner (artımlı senkron).
+        """
+        session = await self._get_session()
+        params = {
+            "action": "query",
+            "format": "json",
+            "generator": "categorymembers",
+            "gcmtitle": f"Category:{wiki_category}",
+            "gcmtype": "file",
+            "gcmlimit": 50,
+            "prop": "imageinfo",
+            "iiprop": "url|size|mime|sha1|extmetadata",
+            "iiextmetadatafilter": METADATA_FIELDS,
+            "iiurlwidth": 400,
+        }
+        
+        if since:
+            params.update({"gcmsort": "timestamp", "gcmdir": "newer", "gcmstart": since})
+        
+        params.update(continue_params or {})
+        
+        status, data = await get_json(
+            session, self.BASE_URL, params, source="wikimedia", use_cache=False
+        )
+        if status != 200:
+            raise RuntimeError(f"API error: {status}")
+        
+        images = []
+        if "query" in data and "pages" in data["query"]:
+            images = self._parse_pages(data["query"]["pages"], min_width)
+        
+        return images, data.get("continue")
+    
     async def download_image(self, url: str) -> Optional[bytes]:
         """Görsel indir"""
-        session = await self._get_session()
+        session = await self._get_session(url)
         
         try:
             async with session.get(url) as response:
@@ -497,6 +674,84 @@ class WikimediaScraper:
             print(f"İndirme hatası: {e}")
             return None
     
+    async def get_metadata(self, titles: List[str]) -> Dict[str, Dict[str, str]]:
+        """
+        Dosya başlıkları (File:...) için açıklama, lisans ve yazar bilgisini getir.
+        Önbellekte olmayanlar 50'lik gruplar halinde eşzamanlı sorgulanır.
+        """
+        titles = list(dict.fromkeys(t for t in titles if t))
+        metadata: Dict[str, Dict[str, str]] = {}
+        
+        missing = []
+        for title in titles:
+            cached = await response_cache.get(self.METADATA_CACHE_URL, {"title": title})
+            if cached is not None:
+                metadata[title] = cached
+            else:
+                missing.append(title)
+        
+        batches = [missing[i:i + 50] for i in range(0, len(missing), 50)]
+        results = await asyncio.gather(*[self._fetch_metadata(batch) for batch in batches])
+        
+        for fetched in results:
+            for title, meta in fetched.items():
+                metadata[title] = meta
+                await response_cache.set(
+                    "wikimedia", self.METADATA_CACHE_URL, {"title": title}, meta
+                )
+        
+        return metadata
+    
+    async def _fetch_metadata(self, titles: List[str]) -> Dict[str, Dict[str, str]]:
+        """Tek istekte en fazla 50 başlığın extmetadata'sını getir"""
+        session = await self._get_session()
+        params = {
+            "action": "query",
+            "format": "json",
+            "titles": "|".join(titles),
+            "prop": "imageinfo",
+            "iiprop": "extmetadata",
+            "iiextmetadatafilter": METADATA_FIELDS,
+        }
+        
+        try:
+            status, data = await get_json(
+                session, self.BASE_URL, params, source="wikimedia", use_cache=False
+            )
+        except Exception as e:
+            print(f"Metadata hatası: {e}")
+            return {}
+        
+        if status != 200 or "query" not in data:
+            return {}
+        
+        # API başlıkları normalize edebilir (ör. "_" -> " "); istenen başlığa geri eşle
+        requested = {
+            item["to"]: item["from"] for item in data["query"].get("normalized", [])
+        }
+        
+        metadata = {}
+        for page_data in data["query"].get("pages", {}).values():
+            if "imageinfo" not in page_data:
+                continue
+            title = page_data.get("title", "")
+            extmeta = page_data["imageinfo"][0].get("extmetadata", {})
+            metadata[requested.get(title, title)] = self._parse_metadata(extmeta)
+        
+        return metadata
+    
+    def _parse_metadata(self, extmeta: Optional[dict]) -> Dict[str, Any]:
+        """extmetadata'dan açıklama/lisans/yazar/tarih alanlarını çıkar"""
+        if not extmeta:
+            return {"description": "", "license": "", "author": "", "date": "", "metadata_loaded": False}
+        return {
+            "description": self._get_meta_value(extmeta, "ImageDescription"),
+            "license": self._get_meta_value(extmeta, "LicenseShortName"),
+            "author": self._get_meta_value(extmeta, "Artist"),
+            "date": self._get_meta_value(extmeta, "DateTimeOriginal"),
+            "metadata_loaded": True,
+        }
+    
     def _clean_title(self, title: str) -> str:
         """Başlığı temizle"""
         title = re.sub(r'^File:', '', title)
@@ -1 +1,8 @@
 from .download_service import DownloadService
+from .download_queue import DownloadQueueWorker
+from .harvester import CategoryHarvester
+from .federated_search import FederatedSearch
+from .pipeline import SearchDownloadPipeline
+from .catalog import CatalogIngest, bulk_upsert_images
+from .catalog_search import CatalogSearch
+from .facets import CatalogFacets
@@ -0,0 +1,398 @@
+"""
+Katalog aktarımı
+Scraper sonuçlarını Image tablosuna (source, source_id) anahtarıyla toplu
+ekler/günceller. Endpointler sonuçları yalnızca tampona bırakır; arka plan
+görevi biriken satırları toplu INSERT ... ON CONFLICT ile yazar.
+"""
+import re
+import time
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..database import get_db, Category, Image
+
+# Tek execute çağrısındaki satır sayısı
+UPSERT_CHUNK = 500
+
+# Tampon bu kadar satıra ulaşınca ya da bu kadar süre geçince yazılır
+FLUSH_ROWS = 2000
+FLUSH_INTERVAL = 0.5
+
+# Yazılmayı bekleyen en fazla satır; aşılırsa yeni sonuçlar kataloğa alınmaz
+MAX_PENDING_ROWS = 50000
+
+# Metadata'sı eksik eski satırlar bu büyüklükte gruplarla tamamlanır
+BACKFILL_BATCH = 200
+
+# Kaynakta boş gelebilen alanlar: boş değer mevcut bilgiyi ezmez
+_KEEP_EXISTING = ("description", "license", "author", "sha1", "year")
+
+# Her çakışmada kaynaktaki son değerle güncellenen alanlar
+_REFRESHED = ("title", "source_url", "thumbnail_url", "width", "height", "file_size", "mime_type")
+
+
+def _text(value) -> Optional[str]:
+    """Archive.org gibi kaynaklar bazı alanları liste döndürür"""
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value)
+    return str(value)
+
+
+_YEAR_RE = re.compile(r"\b(1[89]\d\d|20\d\d)\b")
+
+
+def _year(value) -> Optional[int]:
+    """"1944", 1944 ya da "1944-06-06 10:00" gibi değerlerden yılı çıkar"""
+    if value is None:
+        return None
+    match = _YEAR_RE.search(_text(value))
+    return int(match.group(1)) if match else None
+
+
+def _catalog_row(img: dict, category_id: Optional[int]) -> Optional[dict]:
+    if not img.get("source_id") or not img.get("source_url"):
+        return None
+    return {
+        "title": _text(img.get("title")) or img["source_url"].rsplit("/", 1)[-1],
+        "description": _text(img.get("description")),
+        "source_url": img["source_url"],
+        "thumbnail_url": img.get("thumbnail_url"),
+        "width": img.get("width"),
+        "height": img.get("height"),
+        "file_size": img.get("file_size"),
+        "mime_type": img.get("mime_type"),
+        "sha1": img.get("sha1"),
+        "source": img.get("source", "wikimedia"),
+        "source_id": str(img["source_id"]),
+        "license": _text(img.get("license")),
+        "author": _text(img.get("author")),
+        "year": _year(img.get("year") or img.get("date")),
+        "category_id": category_id,
+    }
+
+
+def bulk_upsert_images(db, images: List[dict], category_id: Optional[int] = None) -> int:
+    """
+    Görselleri (source, source_id) anahtarıyla toplu ekle/güncelle.
+    Mevcut satırın kategori, favori ve indirme bilgisi korunur.
+    Commit çağırana bırakılır; yazılan satır sayısını döndürür.
+    """
+    rows: Dict[Tuple[str, str], dict] = {}
+    for img in images:
+        row = _catalog_row(img, category_id)
+        if row is not None:
+            rows[(row["source"], row["source_id"])] = row
+    if not rows:
+        return 0
+
+    # Derlenen ifade önbelleğe alınır; satırlar executemany ile gönderilir
+    stmt = sqlite_insert(Image)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Image.source, Image.source_id],
+        set_={
+            **{name: excluded[name] for name in _REFRESHED},
+            **{
+                name: func.coalesce(func.nullif(excluded[name], ""), Image.__table__.c[name])
+                for name in _KEEP_EXISTING
+            },
+            "category_id": func.coalesce(Image.category_id, excluded.category_id),
+        }
+    )
+    rows_list = list(rows.values())
+    for start in range(0, len(rows_list), UPSERT_CHUNK):
+        db.execute(stmt, rows_list[start:start + UPSERT_CHUNK])
+    return len(rows_list)
+
+
+async def with_metadata(scraper, images: List[dict]) -> List[dict]:
+    """
+    Açıklama/lisans/yazar/tarih bilgisi henüz yüklenmemiş Wikimedia
+    görsellerini scraper.get_metadata ile tamamla. Hata olursa görseller
+    olduğu gibi döner.
+    """
+    titles = [
+        img["page_title"] for img in images
+        if img.get("page_title") and img.get("metadata_loaded") is False
+    ]
+    if not titles or scraper is None:
+        return images
+
+    try:
+        metadata = await scraper.get_metadata(titles)
+    except Exception as e:
+        print(f"Metadata alınamadı: {e}")
+        return images
+
+    return [
+        {**img, **metadata.get(img.get("page_title"), {})}
+        for img in images
+    ]
+
+
+def _missing_metadata():
+    """Metadata'sı hiç yüklenmemiş Wikimedia satırları (yıl, lisans ve yazar boş)"""
+    return (
+        (Image.source == "wikimedia")
+        & Image.year.is_(None)
+        & (func.coalesce(Image.license, "") == "")
+        & (func.coalesce(Image.author, "") == "")
+    )
+
+
+def _page_title(source_url: str) -> str:
+    """upload.wikimedia.org/.../Tiger_I_1944.jpg -> File:Tiger I 1944.jpg"""
+    return "File:" + unquote(source_url.rsplit("/", 1)[-1]).replace("_", " ")
+
+
+class CatalogIngest:
+    """Arama sonuçlarını yanıtı bekletmeden kataloğa yazan arka plan aşaması"""
+
+    def __init__(
+        self,
+        scraper=None,
+        flush_rows: int = FLUSH_ROWS,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_pending_rows: int = MAX_PENDING_ROWS
+    ):
+        # Verilirse metadata'sı yüklenmemiş sonuçlar yazılmadan önce tamamlanır
+        # (yıl, lisans ve yazar fasetleri boş kalmasın)
+        self.scraper = scraper
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_pending_rows = max_pending_rows
+
+        # kategori slug'ı -> bekleyen görseller
+        self._pending: Dict[Optional[str], List[dict]] = {}
+        self._pending_rows = 0
+        self._category_ids: Dict[str, Optional[int]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._backfill_task: Optional[asyncio.Task] = None
+        self._downloads: Set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+
+        self.stats = {
+            "submitted": 0,
+            "written": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "errors": 0,
+            "last_flush_ms": 0.0,
+            "backfilled": 0,
+        }
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "pending": self._pending_rows,
+            "running": self._task is not None and not self._task.done(),
+        }
+
+    def submit(self, images: List[dict], category_slug: Optional[str] = None):
+        """Sonuçları tampona al (bloklamaz)"""
+        images = [img for img in images or [] if img.get("source_id")]
+        if not images:
+            return
+        if self._pending_rows + len(images) > self.max_pending_rows:
+            self.stats["dropped"] += len(images)
+            return
+
+        self._pending.setdefault(category_slug, []).extend(images)
+        self._pending_rows += len(images)
+        self.stats["submitted"] += len(images)
+
+        self.start()
+        if self._pending_rows >= self.flush_rows:
+            self._wakeup.set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def start_backfill(self):
+        """Metadata'sı hiç yüklenmemiş Wikimedia satırlarını arka planda tamamla"""
+        if self.scraper is None:
+            return
+        if self._backfill_task is None or self._backfill_task.done():
+            self._backfill_task = asyncio.create_task(self._backfill())
+
+    def record_download(self, source_url: str, result: dict):
+        """
+        Tekil indirmeyi kataloğa işle (bloklamaz): aynı source_url'li satırlar
+        indirilmiş işaretlenir, metadata'sı eksik olanlar toplu indirmedeki
+        gibi tamamlanır.
+        """
+        task = asyncio.create_task(self._record_download(source_url, result))
+        task.add_done_callback(self._downloads.discard)
+        self._downloads.add(task)
+
+    async def close(self):
+        """Arka plan görevlerini durdur ve tamponda kalanları yaz"""
+        for task in self._downloads:
+            task.cancel()
+        await asyncio.gather(*self._downloads, return_exceptions=True)
+        if self._backfill_task is not None:
+            self._backfill_task.cancel()
+            await asyncio.gather(self._backfill_task, return_exceptions=True)
+            self._backfill_task = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        self._pending_rows = 0
+
+        started = time.perf_counter()
+        try:
+            if self.scraper is not None:
+                for category_slug, images in pending.items():
+                    pending[category_slug] = await with_metadata(self.scraper, images)
+            written = await asyncio.to_thread(self._write, pending)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Katalog yazma hatası: {e}")
+            return
+        self.stats["written"] += written
+        self.stats["flushes"] += 1
+        self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _write(self, pending: Dict[Optional[str], List[dict]]) -> int:
+        written = 0
+        with get_db() as db:
+            for category_slug, images in pending.items():
+                written += bulk_upsert_images(db, images, self._category_id(db, category_slug))
+            db.commit()
+        return written
+
+    def _category_id(self, db, category_slug: Optional[str]) -> Optional[int]:
+        if not category_slug:
+            return None
+        if category_slug not in self._category_ids:
+            self._category_ids[category_slug] = db.scalar(
+                select(Category.id).where(Category.slug == category_slug)
+            )
+        return self._category_ids[category_slug]
+
+    async def _backfill(self):
+        """
+        Aramadan gelen satırlar metadata'sız (yıl/lisans/yazar boş) yazılmış
+        olabilir; id sırasıyla gruplar halinde get_metadata ile doldurulur.
+        """
+        after_id = 0
+        while True:
+            try:
+                rows = await asyncio.to_thread(self._backfill_candidates, after_id)
+                if not rows:
+                    return
+                after_id = rows[-1][0]
+
+                self.stats["backfilled"] += await self._fill_metadata(rows)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Katalog metadata tamamlama hatası: {e}")
+                return
+
+    async def _record_download(self, source_url: str, result: dict):
+        try:
+            # Satır henüz tamponda olabilir
+            await self.flush()
+            rows = await asyncio.to_thread(self._mark_downloaded, source_url, result)
+            if rows and self.scraper is not None:
+                await self._fill_metadata(rows)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"İndirme kataloğa işlenemedi: {e}")
+
+    async def _fill_metadata(self, rows: List[Tuple[int, str]]) -> int:
+        """(id, source_url) satırlarını get_metadata ile tamamla; güncellenen sayısı"""
+        titles = {image_id: _page_title(source_url) for image_id, source_url in rows}
+        metadata = await self.scraper.get_metadata(list(titles.values()))
+        updates = []
+        for image_id, title in titles.items():
+            meta = metadata.get(title)
+            if meta and meta.get("metadata_loaded"):
+                updates.append({
+                    "id": image_id,
+                    "description": _text(meta.get("description")),
+                    "license": _text(meta.get("license")),
+                    "author": _text(meta.get("author")),
+                    "year": _year(meta.get("date")),
+                })
+        if updates:
+            await asyncio.to_thread(self._apply_metadata, updates)
+        return len(updates)
+
+    def _backfill_candidates(self, after_id: int) -> List[Tuple[int, str]]:
+        with get_db() as db:
+            return db.execute(
+                select(Image.id, Image.source_url)
+                .where(_missing_metadata(), Image.id > after_id)
+                .order_by(Image.id).limit(BACKFILL_BATCH)
+            ).all()
+
+    def _mark_downloaded(self, source_url: str, result: dict) -> List[Tuple[int, str]]:
+        """Satırları indirilmiş işaretle; metadata'sı eksik olanları döndür"""
+        with get_db() as db:
+            db.execute(
+                update(Image).where(Image.source_url == source_url).values(
+                    is_downloaded=True,
+                    file_path=result.get("file_path"),
+                    file_name=result.get("filename"),
+                    download_date=func.coalesce(Image.download_date, datetime.utcnow()),
+                )
+            )
+            rows = db.execute(
+                select(Image.id, Image.source_url)
+                .where(Image.source_url == source_url, _missing_metadata())
+            ).all()
+            db.commit()
+            return rows
+
+    def _apply_metadata(self, updates: List[dict]):
+        # Boş değer mevcut bilgiyi ezmez (upsert'teki _KEEP_EXISTING ile aynı kural)
+        stmt = update(Image).where(Image.id == bindparam("image_id")).values(
+            description=func.coalesce(func.nullif(bindparam("new_description"), ""), Image.description),
+            license=func.coalesce(func.nullif(bindparam("new_license"), ""), Image.license),
+            author=func.coalesce(func.nullif(bindparam("new_author"), ""), Image.author),
+            year=func.coalesce(bindparam("new_year"), Image.year),
+        )
+        with get_db() as db:
+            db.connection().execute(stmt, [
+                {
+                    "image_id": row["id"],
+                    "new_description": row["description"],
+                    "new_license": row["license"],
+                    "new_author": row["author"],
+                    "new_year": row["year"],
+                }
+                for row in updates
+            ])
+            db.commit()
@@ -0,0 +1,181 @@
+"""
+Yerel katalog araması
+Image tablosu üzerindeki FTS5 indeksini (images_fts) BM25 sıralamasıyla
+sorgular. Upstream'e gitmeden, çevrimdışı da yanıt verir.
+"""
+import re
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+from ..database import get_async_db
+
+# bm25 sütun ağırlıkları: title, description, author, license
+BM25_WEIGHTS = (10.0, 2.0, 4.0, 1.0)
+
+# Sorguda dikkate alınan en fazla terim
+MAX_TERMS = 8
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# Liste yanıtlarında döndürülen Image sütunları
+CATALOG_COLUMNS = """
+    images.id, images.title, images.description, images.source_url,
+    images.thumbnail_url, images.width, images.height, images.file_size,
+    images.mime_type, images.sha1, images.source, images.source_id,
+    images.license, images.author, images.year, images.is_downloaded, images.is_favorite
+"""
+
+# Eşleşme koşulu; max_id sayfalama boyunca sonradan eklenen satırları dışarıda tutar
+_MATCH_WHERE = """
+    images_fts MATCH :match
+    AND images.width >= :min_width
+    AND images.id <= :max_id
+    AND (:category IS NULL OR images.category_id = (
+        SELECT id FROM categories WHERE slug = :category
+    ))
+"""
+
+_SEARCH_SQL = text(f"""
+    SELECT {CATALOG_COLUMNS},
+           bm25(images_fts, {", ".join(str(w) for w in BM25_WEIGHTS)}) AS score
+    FROM images_fts
+    JOIN images ON images.id = images_fts.rowid
+    WHERE {_MATCH_WHERE}
+    ORDER BY score
+    LIMIT :limit OFFSET :offset
+""")
+
+_MATCHING_SQL = f"""
+    SELECT images.source, images.source_id
+    FROM images_fts
+    JOIN images ON images.id = images_fts.rowid
+    WHERE {_MATCH_WHERE}
+      AND images.source_id IN ({{source_ids}})
+"""
+
+
+def build_match(query: str) -> Optional[str]:
+    """
+    Kullanıcı sorgusunu FTS5 ifadesine çevir: her terim tırnaklanır
+    (operatör enjeksiyonu olmaz) ve önek araması için * eklenir.
+    """
+    terms = _TERM_RE.findall(query)[:MAX_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def catalog_image(row) -> Dict[str, Any]:
+    """Image satırını scraper sonuçlarıyla aynı sözlük biçimine çevir"""
+    return {
+        "id": row["id"],
+        "source_id": row["source_id"],
+        "title": row["title"],
+        "source_url": row["source_url"],
+        "thumbnail_url": row["thumbnail_url"],
+        "width": row["width"],
+        "height": row["height"],
+        "file_size": row["file_size"],
+        "mime_type": row["mime_type"],
+        "sha1": row["sha1"],
+        "source": row["source"],
+        "description": row["description"] or "",
+        "license": row["license"] or "",
+        "author": row["author"] or "",
+        "year": row["year"],
+        "is_downloaded": bool(row["is_downloaded"]),
+        "is_favorite": bool(row["is_favorite"]),
+    }
+
+
+class CatalogSearch:
+    """Yerel katalog üzerinde tam metin araması"""
+
+    def __init__(self):
+        # FTS5 tablosu yoksa (eski SQLite derlemesi) arama devre dışı kalır
+        self._available: Optional[bool] = None
+
+    async def is_available(self) -> bool:
+        if self._available is None:
+            async with get_async_db() as db:
+                self._available = (await db.scalar(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'images_fts'"
+                ))) is not None
+        return self._available
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 100,
+        min_width: int = 0,
+        offset: int = 0,
+        category_slug: Optional[str] = None,
+        max_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        BM25'e göre sıralı sonuçlar; scraper sonuçlarıyla aynı sözlük biçiminde.
+        max_id verilmezse kataloğun o anki son id'si kullanılır ve yanıtta döner;
+        sonraki sayfalar aynı değerle istenirse sıralama kaymaz.
+        """
+        started = time.perf_counter()
+        match = build_match(query)
+        if match is None or not await self.is_available():
+            return {
+                "success": True, "images": [], "total": 0, "max_id": max_id or 0, "elapsed_ms": 0.0
+            }
+
+        async with get_async_db() as db:
+            if max_id is None:
+                max_id = await db.scalar(text("SELECT COALESCE(MAX(id), 0) FROM images"))
+            rows = (await db.execute(_SEARCH_SQL, {
+                "match": match,
+                "min_width": min_width,
+                "max_id": max_id,
+                "category": category_slug,
+                "limit": limit,
+                "offset": offset
+            })).mappings().all()
+
+        images = [catalog_image(row) for row in rows]
+        return {
+            "success": True,
+            "images": images,
+            "total": len(images),
+            "max_id": max_id,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    async def matching_keys(
+        self,
+        query: str,
+        images: List[dict],
+        min_width: int = 0,
+        category_slug: Optional[str] = None,
+        max_id: int = 0
+    ) -> Set[Tuple[str, str]]:
+        """
+        images içinden aynı yerel aramayla (max_id'ye kadar) zaten eşleşen
+        (source, source_id) anahtarları; upstream sonuçlarını yerel sayfalarla
+        tekrarlamamak için kullanılır.
+        """
+        match = build_match(query)
+        source_ids = list({str(img["source_id"]) for img in images if img.get("source_id")})
+        if match is None or not source_ids or not max_id or not await self.is_available():
+            return set()
+
+        params: Dict[str, Any] = {
+            "match": match,
+            "min_width": min_width,
+            "max_id": max_id,
+            "category": category_slug,
+        }
+        names = []
+        for index, source_id in enumerate(source_ids):
+            params[f"source_id_{index}"] = source_id
+            names.append(f":source_id_{index}")
+
+        async with get_async_db() as db:
+            rows = await db.execute(text(_MATCHING_SQL.format(source_ids=", ".join(names))), params)
+            return {(row.source, row.source_id) for row in rows}
@@ -0,0 +1,518 @@
+"""
+Kalıcı indirme kuyruğu
+Toplu indirmeler DownloadQueue tablosuna yazılır, arka plan işçisi
+kiralama (lease) ile satırları sahiplenip indirir
+"""
+import os
+import time
+import uuid
+import socket
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import DateTime, and_, case, func, insert, literal, or_, select, update
+from sqlalchemy.orm import selectinload
+
+from ..database import get_db, Category, Image, DownloadQueue
+from ..scrapers.wikimedia import WikimediaScraper
+from .download_service import DownloadService
+from .catalog import bulk_upsert_images, with_metadata
+
+# Kiralama süresi; işçi bu sürenin üçte birinde bir kiralamayı yeniler
+LEASE_SECONDS = 60
+
+# Boşta iken kuyruğun yoklanma aralığı (saniye)
+POLL_INTERVAL = 2.0
+
+# Kiralaması düşen (işçisi çöken) bir satırın en fazla kaç kez yeniden alınacağı
+MAX_ATTEMPTS = 3
+
+
+def _claimable(now: datetime):
+    """Bekleyen ya da kiralaması dolmuş satırlar"""
+    return or_(
+        DownloadQueue.status == "pending",
+        and_(
+            DownloadQueue.status == "downloading",
+            DownloadQueue.lease_expires_at < now
+        )
+    )
+
+
+class DownloadQueueWorker:
+    """DownloadQueue satırlarını kiralayıp indiren arka plan işçisi"""
+
+    def __init__(
+        self,
+        download_service: DownloadService,
+        scraper: Optional[WikimediaScraper] = None,
+        worker_id: Optional[str] = None,
+        lease_seconds: int = LEASE_SECONDS,
+        max_active: Optional[int] = None
+    ):
+        self.download_service = download_service
+        self.scraper = scraper
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        # Host kotalarının dolu tutulabilmesi için işçi sayısından fazla satır alınır
+        self.max_active = max_active or download_service.max_workers * 2
+
+        self._task: Optional[asyncio.Task] = None
+        self._active: Dict[int, asyncio.Task] = {}
+        self._progress: Dict[int, int] = {}
+        self._wakeup = asyncio.Event()
+        self._enrichments: Set[asyncio.Task] = set()
+
+    # ---------- Kuyruğa alma ----------
+
+    async def enqueue(
+        self,
+        images: List[dict],
+        category_slug: str = "diger",
+        job_id: Optional[str] = None
+    ) -> dict:
+        """
+        Görselleri kuyruğa al ve iş kimliğini döndür.
+        job_id verilirse görseller mevcut işe eklenir (parça parça besleme).
+        """
+        images = [img for img in images if img.get("source_url")]
+        if not images:
+            return {"success": False, "error": "İndirilecek görsel yok"}
+
+        job_id = job_id or uuid.uuid4().hex
+        total = await asyncio.to_thread(self._insert_job, job_id, images, category_slug)
+
+        self._wakeup.set()
+        # Açıklama/lisans/yazar bilgisi yanıtı bekletmeden arka planda tamamlanır
+        self.enrich_later(images)
+        return {"success": True, "job_id": job_id, "total": total}
+
+    def enrich_later(self, images: List[dict]):
+        """Metadata'sı yüklenmemiş görselleri arka planda tamamlayıp kataloğa yaz"""
+        pending = [
+            img for img in images
+            if img.get("page_title") and img.get("metadata_loaded") is False
+        ]
+        if not pending or self.scraper is None:
+            return
+        task = asyncio.create_task(self._enrich(pending))
+        task.add_done_callback(self._enrichments.discard)
+        self._enrichments.add(task)
+
+    async def _enrich(self, images: List[dict]):
+        enriched = [
+            img for img in await with_metadata(self.scraper, images) if img.get("metadata_loaded")
+        ]
+        if not enriched:
+            return
+        try:
+            await asyncio.to_thread(self._store_metadata, enriched)
+        except Exception as e:
+            print(f"Metadata kaydedilemedi: {e}")
+
+    def _store_metadata(self, images: List[dict]):
+        with get_db() as db:
+            # Kategori verilmez; mevcut satırın kategorisi korunur
+            bulk_upsert_images(db, images)
+            db.commit()
+
+    def _insert_job(self, job_id: str, images: List[dict], category_slug: str) -> int:
+        with get_db() as db:
+            category = db.query(Category).filter(Category.slug == category_slug).first()
+            category_id = category.id if category else None
+
+            # Kaynak kimliği olanlar tek seferde kataloğa yazılır
+            bulk_upsert_images(db, images, category_id)
+            image_ids = self._catalog_ids(db, images)
+
+            rows = []
+            for img in images:
+                image_id = image_ids.get((img.get("source", "wikimedia"), str(img.get("source_id"))))
+                if image_id is None:
+                    image_id = self._image_by_url(db, img, category_id)
+                rows.append({
+                    "job_id": job_id,
+                    "image_id": image_id,
+                    "category_slug": category_slug,
+                    "status": "pending",
+                    "created_at": datetime.utcnow()
+                })
+            db.execute(insert(DownloadQueue), rows)
+            db.commit()
+        return len(images)
+
+    def _catalog_ids(self, db, images: List[dict]) -> Dict[tuple, int]:
+        """(source, source_id) -> Image.id"""
+        by_source: Dict[str, List[str]] = {}
+        for img in images:
+            if img.get("source_id"):
+                by_source.setdefault(img.get("source", "wikimedia"), []).append(str(img["source_id"]))
+
+        ids = {}
+        for source, source_ids in by_source.items():
+            for start in range(0, len(source_ids), 500):
+                for source_id, image_id in db.execute(
+                    select(Image.source_id, Image.id).where(
+                        Image.source == source,
+                        Image.source_id.in_(source_ids[start:start + 500])
+                    )
+                ):
+                    ids[(source, source_id)] = image_id
+        return ids
+
+    def _image_by_url(self, db, img: dict, category_id: Optional[int]) -> int:
+        """Kaynak kimliği olmayan görseli URL'siyle bul ya da oluştur"""
+        image = db.query(Image).filter(Image.source_url == img["source_url"]).first()
+        if image is None:
+            image = Image(
+                title=img.get("title") or img["source_url"].rsplit("/", 1)[-1],
+                source_url=img["source_url"],
+                thumbnail_url=img.get("thumbnail_url"),
+                width=img.get("width"),
+                height=img.get("height"),
+                file_size=img.get("file_size"),
+                mime_type=img.get("mime_type"),
+                sha1=img.get("sha1"),
+                source=img.get("source", "wikimedia"),
+                category_id=category_id
+            )
+            db.add(image)
+
+        for field in ("description", "license", "author", "sha1"):
+            if img.get(field) and not getattr(image, field):
+                setattr(image, field, img[field])
+        db.flush()
+        return image.id
+
+    async def enqueue_refresh(self, category_slug: Optional[str] = None) -> dict:
+        """
+        İndirilmiş görselleri koşullu istekle yeniden doğrulayan iş oluştur.
+        Kaynakta değişmeyenler 304 ile atlanır, değişenler yeniden indirilir.
+        """
+        job_id = uuid.uuid4().hex
+        total = await asyncio.to_thread(self._insert_refresh_job, job_id, category_slug)
+        if not total:
+            return {"success": False, "error": "Yenilenecek indirme yok"}
+
+        self._wakeup.set()
+        return {"success": True, "job_id": job_id, "total": total}
+
+    def _insert_refresh_job(self, job_id: str, category_slug: Optional[str]) -> int:
+        """İndirilmiş satırları tek INSERT ... SELECT ile kuyruğa kopyala"""
+        # Kategori, dosyanın bulunduğu klasörden okunur: dirname'in son parçası
+        path = Image.file_path
+        directory = func.rtrim(path, func.replace(path, os.sep, ""))
+        parent = func.substr(directory, 1, func.length(directory) - 1)
+        folder = func.substr(parent, func.length(func.rtrim(parent, func.replace(parent, os.sep, ""))) + 1)
+
+        rows = select(
+            literal(job_id),
+            Image.id,
+            folder,
+            literal(True),
+            literal("pending"),
+            literal(0),
+            literal(0),
+            literal(datetime.utcnow(), DateTime)
+        ).where(Image.is_downloaded == True, Image.file_path.isnot(None))
+        if category_slug:
+            rows = rows.where(folder == category_slug)
+
+        with get_db() as db:
+            total = db.execute(insert(DownloadQueue).from_select(
+                ["job_id", "image_id", "category_slug", "refresh", "status",
+                 "progress", "attempts", "created_at"],
+                rows
+            )).rowcount
+            if total:
+                db.commit()
+            return total
+
+    # ---------- İş durumu ----------
+
+    def get_job(self, job_id: str, include_items: bool = True) -> Optional[dict]:
+        with get_db() as db:
+            # Sayaçlar (job_id, status) indeksinden gruplanır; satırlar yüklenmez
+            finished_statuses = ("completed", "skipped", "failed")
+            rows = db.execute(
+                select(
+                    DownloadQueue.status,
+                    func.count(),
+                    func.sum(case(
+                        (DownloadQueue.status.in_(finished_statuses), 100),
+                        else_=func.coalesce(DownloadQueue.progress, 0)
+                    ))
+                ).where(DownloadQueue.job_id == job_id).group_by(DownloadQueue.status)
+            ).all()
+            if not rows:
+                return None
+
+            counts = {"pending": 0, "downloading": 0, "completed": 0, "skipped": 0, "failed": 0}
+            total = progress = 0
+            for status, count, status_progress in rows:
+                counts[status] = counts.get(status, 0) + count
+                total += count
+                progress += status_progress or 0
+            finished = sum(counts[status] for status in finished_statuses)
+
+            items = []
+            if include_items:
+                items = [
+                    item.to_dict() for item in db.query(DownloadQueue).options(
+                        selectinload(DownloadQueue.image).load_only(Image.title)
+                    ).filter(DownloadQueue.job_id == job_id).order_by(DownloadQueue.id)
+                ]
+
+            return {
+                "job_id": job_id,
+                "total": total,
+                **counts,
+                "downloaded": counts["completed"],
+                "progress": int(progress / total),
+                "done": finished == total,
+                "items": items
+            }
+
+    def count_unfinished(self, job_id: str) -> int:
+        """İşin henüz bitmemiş (bekleyen ya da inen) satır sayısı"""
+        with get_db() as db:
+            return db.query(DownloadQueue).filter(
+                DownloadQueue.job_id == job_id,
+                DownloadQueue.status.in_(("pending", "downloading"))
+            ).count()
+
+    # ---------- İşçi ----------
+
+    def get_stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "active": len(self._active),
+            "max_active": self.max_active,
+            "running": self._task is not None and not self._task.done(),
+        }
+
+    def start(self):
+        """Arka plan işçisini başlat (çöken işçinin satırları kiralaması dolunca alınır)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """İşçiyi durdur; yarım kalan satırlar beklemeden diğer işçilere bırakılır"""
+        active_ids = list(self._active)
+        tasks = list(self._active.values())
+        if self._task is not None:
+            tasks.append(self._task)
+        tasks.extend(self._enrichments)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._active.clear()
+
+        if active_ids:
+            await asyncio.to_thread(self._release, active_ids)
+
+    async def _run(self):
+        last_heartbeat = 0.0
+        while True:
+            try:
+                free = self.max_active - len(self._active)
+                if free > 0:
+                    for item in await asyncio.to_thread(self._claim, free):
+                        self._spawn(item)
+
+                if self._active and time.monotonic() - last_heartbeat >= self.lease_seconds / 3:
+                    lost = await asyncio.to_thread(self._heartbeat, dict(self._progress))
+                    last_heartbeat = time.monotonic()
+                    # Kiralaması başka işçiye geçen indirmeler iki kez yapılmasın
+                    for queue_id in lost:
+                        task = self._active.get(queue_id)
+                        if task is not None:
+                            task.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"İndirme kuyruğu hatası: {e}")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def _spawn(self, item: dict):
+        queue_id = item["id"]
+        self._progress[queue_id] = 0
+        task = asyncio.create_task(self._process(item))
+
+        def done(_):
+            self._active.pop(queue_id, None)
+            self._progress.pop(queue_id, None)
+            self._wakeup.set()
+
+        task.add_done_callback(done)
+        self._active[queue_id] = task
+
+    async def _process(self, item: dict):
+        queue_id = item["id"]
+
+        def on_progress(percent: int):
+            self._progress[queue_id] = percent
+
+        try:
+            result = await self.download_service.download_limited(
+                item["url"], item["category_slug"],
+                progress_callback=on_progress,
+                expected_sha1=item["sha1"],
+                filename=item["filename"],
+                refresh=item["refresh"]
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        await asyncio.to_thread(self._complete, queue_id, item["image_id"], result)
+
+    def _claim(self, limit: int) -> List[dict]:
+        """
+        Bekleyen veya kiralaması dolmuş satırları tek UPDATE ile sahiplen.
+        Koşul UPDATE içinde yeniden değerlendirildiği için aynı satırı iki
+        işçi alamaz.
+        """
+        now = datetime.utcnow()
+        with get_db() as db:
+            # İşçisi defalarca düşen satırlar sonsuza dek dönmesin
+            db.execute(
+                update(DownloadQueue)
+                .where(
+                    DownloadQueue.status == "downloading",
+                    DownloadQueue.lease_expires_at < now,
+                    DownloadQueue.attempts >= MAX_ATTEMPTS
+                )
+                .values(
+                    status="failed",
+                    error_message="İşçi yanıt vermedi (deneme sınırı aşıldı)",
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    updated_at=now
+                )
+            )
+
+            candidates = (
+                select(DownloadQueue.id)
+                .where(_claimable(now))
+                .order_by(DownloadQueue.id)
+                .limit(limit)
+                .scalar_subquery()
+            )
+            db.execute(
+                update(DownloadQueue)
+                .where(DownloadQueue.id.in_(candidates), _claimable(now))
+                .values(
+                    status="downloading",
+                    lease_owner=self.worker_id,
+                    lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                    attempts=DownloadQueue.attempts + 1,
+                    updated_at=now
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+            rows = db.execute(
+                select(DownloadQueue.id, DownloadQueue.image_id, DownloadQueue.category_slug,
+                       DownloadQueue.refresh, Image.source_url, Image.sha1, Image.file_name)
+                .join(Image, DownloadQueue.image_id == Image.id)
+                .where(
+                    DownloadQueue.status == "downloading",
+                    DownloadQueue.lease_owner == self.worker_id,
+                    DownloadQueue.id.notin_(list(self._active))
+                )
+            ).all()
+
+        return [
+            {"id": row.id, "image_id": row.image_id,
+             "category_slug": row.category_slug or "diger", "url": row.source_url,
+             "sha1": row.sha1, "filename": row.file_name, "refresh": bool(row.refresh)}
+            for row in rows
+        ]
+
+    def _heartbeat(self, progress: Dict[int, int]) -> List[int]:
+        """
+        Elimizdeki satırların kiralamasını uzat ve ilerlemelerini yaz.
+        Kiralaması artık bizde olmayan satırları döndürür.
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        lost = []
+        with get_db() as db:
+            for queue_id, percent in progress.items():
+                result = db.execute(
+                    update(DownloadQueue)
+                    .where(
+                        DownloadQueue.id == queue_id,
+                        DownloadQueue.status == "downloading",
+                        DownloadQueue.lease_owner == self.worker_id
+                    )
+                    .values(lease_expires_at=expires_at, progress=percent, updated_at=now)
+                )
+                if result.rowcount == 0:
+                    lost.append(queue_id)
+            db.commit()
+        return lost
+
+    def _release(self, queue_ids: List[int]):
+        """Kapanırken yarım kalan satırları deneme hakkı düşmeden kuyruğa geri koy"""
+        with get_db() as db:
+            db.execute(
+                update(DownloadQueue)
+                .where(
+                    DownloadQueue.id.in_(queue_ids),
+                    DownloadQueue.status == "downloading",
+                    DownloadQueue.lease_owner == self.worker_id
+                )
+                .values(
+                    status="pending",
+                    progress=0,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    attempts=DownloadQueue.attempts - 1,
+                    updated_at=datetime.utcnow()
+                )
+            )
+            db.commit()
+
+    def _complete(self, queue_id: int, image_id: int, result: dict):
+        now = datetime.utcnow()
+        with get_db() as db:
+            item = db.query(DownloadQueue).filter(
+                DownloadQueue.id == queue_id,
+                DownloadQueue.lease_owner == self.worker_id
+            ).first()
+            if item is None:
+                # Kiralama başka bir işçiye geçmiş
+                return
+
+            if result.get("success"):
+                item.status = "skipped" if result.get("already_exists") else "completed"
+                item.progress = 100
+                item.file_path = result.get("file_path")
+                item.error_message = None
+
+                image = db.query(Image).filter(Image.id == image_id).first()
+                if image:
+                    image.is_downloaded = True
+                    image.file_path = result.get("file_path")
+                    image.file_name = result.get("filename")
+                    image.download_date = image.download_date or now
+            else:
+                item.status = "failed"
+                item.error_message = result.get("error", "İndirme hatası")
+
+            item.lease_owner = None
+            item.lease_expires_at = None
+            item.updated_at = now
+            item.completed_at = now
+            db.commit()
@@ -2,22 +2,94 @@
 Görsel indirme servisi
 """
 import os
+import re
+import json
+import time
+import shutil
+import tempfile
 import asyncio
+import weakref
 import aiohttp
-from typing import Optional, Callable
+import contextlib
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
 from datetime import datetime
+from email.utils import formatdate
 import hashlib
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from ..core.bandwidth import BandwidthGovernor, BATCH, INTERACTIVE
+from ..core.http_client import http_client, DEFAULT_CONNECTION_LIMIT
+
 # Proje kök dizini
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DOWNLOADS_DIR = os.path.join(BASE_DIR, "downloads")
 
+# İçerik adresli depo: downloads/.blobs/sha256/<ilk 2 hane>/<sha256>
+# Kategori klasörlerindeki dosyalar bu bloblara hardlink'tir
+BLOBS_DIRNAME = ".blobs"
+
+# Görsel sunucularının tarayıcı dışı istekleri reddetmemesi için
+DOWNLOAD_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    # Range ve Content-Length sıkıştırılmamış gövdeye göre hesaplanır
+    "Accept-Encoding": "identity",
+    "Referer": "https://commons.wikimedia.org/",
+}
+
+# Büyük TIFF'ler dakikalar sürebilir; toplam süre yerine takılmaya bakılır
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60)
+
+# Kopan bir indirmenin aynı çağrı içinde kaç kez kaldığı yerden sürdürüleceği
+RESUME_ATTEMPTS = 3
+
+# Diske tek seferde yazılan tampon: dosya boyutunun ~1/16'sı, bu sınırlar içinde
+MIN_WRITE_BUFFER = 256 * 1024
+MAX_WRITE_BUFFER = 4 * 1024 * 1024
+
+# Toplu indirmede aynı anda çalışan en fazla indirme sayısı
+DOWNLOAD_WORKERS = 8
+
+# Aynı dosyayı başka bir süreç indiriyorsa kilidin yoklanma aralığı (saniye)
+FILE_LOCK_POLL_INTERVAL = 0.5
+
+# Toplu işler host'un bağlantı havuzunu doldurmasın; arayüzden gelen tekil
+# indirmeler için bu kadar bağlantı boş bırakılır
+INTERACTIVE_RESERVED_CONNECTIONS = 1
+
 
 class DownloadService:
     """Görsel indirme yönetimi"""
     
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
+    def __init__(
+        self,
+        max_workers: int = DOWNLOAD_WORKERS,
+        host_limits: Optional[Dict[str, int]] = None,
+        bandwidth_limit: Optional[float] = None,
+        host_bandwidth_limits: Optional[Dict[str, float]] = None
+    ):
+        self.max_workers = max_workers
+        # Varsayılan host sınırları bağlantı havuzlarından ayrılan pay kadar küçüktür
+        self.host_limits = {
+            host: max(1, limit - INTERACTIVE_RESERVED_CONNECTIONS)
+            for host, limit in http_client.connection_limits.items()
+        }
+        self.host_limits.update(host_limits or {})
+        
+        # İndirilen tüm byte'lar (byte/s) genel ve host bazlı sınırlara tabidir
+        self.bandwidth = BandwidthGovernor(bandwidth_limit, host_bandwidth_limits)
+        
+        # Tüm toplu indirmeler aynı işçi ve host kotalarını paylaşır
+        self._workers = asyncio.Semaphore(max_workers)
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._path_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
         self._ensure_download_dirs()
     
     def _ensure_download_dirs(self):
@@ -30,38 +102,100 @@ class DownloadService:
             path = os.path.join(DOWNLOADS_DIR, category)
             os.makedirs(path, exist_ok=True)
     
-    async def _get_session(self) -> aiohttp.ClientSession:
-        """HTTP session oluştur"""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(
-                headers={
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                    "Referer": "https://commons.wikimedia.org/"
-                },
-                timeout=aiohttp.ClientTimeout(total=60)
-            )
-        return self.session
+    def _get_session(self, url: str) -> aiohttp.ClientSession:
+        """Görselin host'u için paylaşılan (keep-alive) session"""
+        return http_client.session(url, headers=DOWNLOAD_HEADERS)
+    
+    def _path_lock(self, file_path: str) -> asyncio.Lock:
+        lock = self._path_locks.get(file_path)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._path_locks[file_path] = lock
+        return lock
+    
+    @contextlib.asynccontextmanager
+    async def _file_lock(self, file_path: str):
+        """
+        Hedef dosya için süreçler arası kilit: aynı URL'yi alan iki işçi süreci
+        aynı .part'a yazmasın. Süreç içinde önce asyncio kilidi beklenir;
+        işletim sistemi kilidi süreç ölünce kendiliğinden bırakılır.
+        """
+        async with self._path_lock(file_path):
+            lock_path = _lock_path(file_path)
+            while True:
+                fd = await asyncio.to_thread(_try_lock_file, lock_path)
+                if fd is not None:
+                    break
+                await asyncio.sleep(FILE_LOCK_POLL_INTERVAL)
+            try:
+                yield
+            finally:
+                _unlock_file(fd)
+    
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.host_limits.get(
+                host, max(1, DEFAULT_CONNECTION_LIMIT - INTERACTIVE_RESERVED_CONNECTIONS)
+            ))
+        return self._host_slots[host]
     
-    async def close(self):
-        """Session'ı kapat"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+    async def download_limited(
+        self,
+        url: str,
+        category_slug: str = "diger",
+        progress_callback: Optional[Callable[[int], None]] = None,
+        expected_sha1: Optional[str] = None,
+        filename: Optional[str] = None,
+        refresh: bool = False
+    ) -> dict:
+        """
+        İşçi ve host kotaları içinde indir. Önce host kotası, sonra genel
+        işçi kotası alınır: yoğun bir host'u bekleyen indirmeler diğer
+        host'ların işçilerini meşgul etmez.
+        """
+        async with self._host_slot(url):
+            async with self._workers:
+                return await self.download_image(
+                    url, category_slug,
+                    filename=filename,
+                    progress_callback=progress_callback,
+                    expected_sha1=expected_sha1,
+                    priority=BATCH,
+                    refresh=refresh
+                )
     
     async def download_image(
         self,
         url: str,
         category_slug: str = "diger",
         filename: Optional[str] = None,
-        progress_callback: Optional[Callable[[int], None]] = None
+        progress_callback: Optional[Callable[[int], None]] = None,
+        expected_sha1: Optional[str] = None,
+        priority: int = INTERACTIVE,
+        refresh: bool = False
     ) -> dict:
         """
         Görsel indir
         
+        Veri önce <dosya>.part'a yazılır; bağlantı koparsa kaldığı byte'tan
+        Range isteğiyle devam edilir. Boyut (ve verildiyse SHA-1) doğrulanınca
+        içerik SHA-256 adıyla blob deposuna taşınır ve kategori klasörüne
+        hardlink'lenir; yarım dosya asla tamamlanmış sayılmaz. SHA-1'i bilinen
+        ve depoda bulunan içerik hiç indirilmez.
+        
+        Her indirmenin ETag / Last-Modified / Content-Length bilgisi saklanır.
+        refresh=True ile mevcut dosya koşullu istekle yeniden doğrulanır;
+        yalnızca kaynakta değişmişse (304 dışı yanıt) yeniden indirilir.
+        
         Args:
             url: Görsel URL'i
             category_slug: Kategori klasörü
             filename: Dosya adı (opsiyonel, yoksa URL'den çıkarılır)
             progress_callback: İlerleme bildirimi fonksiyonu
+            expected_sha1: Kaynağın bildirdiği SHA-1 (opsiyonel)
+            priority: Bant genişliği önceliği (INTERACTIVE toplu işlerin önündedir)
+            refresh: Mevcut dosyayı kaynağa göre yeniden doğrula
         
         Returns:
             İndirme sonucu
@@ -73,136 +207,224 @@ class DownloadService:
             
             # Dosya yolunu oluştur
             category_dir = os.path.join(DOWNLOADS_DIR, category_slug)
-            os.makedirs(category_dir, exist_ok=True)
-            
             file_path = os.path.join(category_dir, filename)
+            part_path = file_path + ".part"
             
-            # Dosya zaten var mı kontrol et
-            if os.path.exists(file_path):
-                return {
-                    "success": True,
-                    "file_path": file_path,
-                    "filename": filename,
-                    "message": "Dosya zaten mevcut",
-                    "already_exists": True
-                }
-            
-            # Her indirme için yeni session oluştur - headers ile
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Connection": "keep-alive",
-                "Referer": "https://commons.wikimedia.org/",
-            }
-            
-            timeout = aiohttp.ClientTimeout(total=120)
-            
-            async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
+            # Aynı dosyaya (başka süreçlerden de) eşzamanlı iki yazım olmasın
+            async with self._file_lock(file_path):
+                # Son adıyla yalnızca doğrulanmış dosyalar bulunur
+                exists = await asyncio.to_thread(_prepare_target, category_dir, file_path)
+                if exists and not refresh:
+                    return {
+                        "success": True,
+                        "file_path": file_path,
+                        "filename": filename,
+                        "message": "Dosya zaten mevcut",
+                        "already_exists": True
+                    }
+                
+                conditional = None
+                if exists:
+                    conditional = await asyncio.to_thread(_conditional_headers, url, file_path)
+                
+                # Aynı içerik başka bir kategori için zaten indirilmiş
+                elif expected_sha1:
+                    linked = await asyncio.to_thread(_link_known_blob, expected_sha1, file_path)
+                    if linked:
+                        sha256, file_size = linked
                         return {
-                            "success": False,
-                            "error": f"HTTP Error: {response.status}",
-                            "url": url
+                            "success": True,
+                            "file_path": file_path,
+                            "filename": filename,
+                            "file_size": file_size,
+                            "sha256": sha256,
+                            "deduplicated": True,
+                            "already_exists": False
                         }
-                    
-                    # Dosya boyutunu al
-                    total_size = int(response.headers.get('content-length', 0))
-                    downloaded = 0
-                    
-                    # Dosyaya yaz
-                    with open(file_path, 'wb') as f:
-                        async for chunk in response.content.iter_chunked(8192):
-                            f.write(chunk)
-                            downloaded += len(chunk)
-                            
-                            # İlerleme bildirimi
-                            if progress_callback and total_size > 0:
-                                progress = int((downloaded / total_size) * 100)
-                                progress_callback(progress)
-                    
-                    # Dosya boyutunu al
-                    file_size = os.path.getsize(file_path)
-                    
+                
+                for attempt in range(RESUME_ATTEMPTS):
+                    try:
+                        outcome = await self._fetch_to_part(
+                            url, part_path, progress_callback, priority, conditional
+                        )
+                        break
+                    except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError,
+                            asyncio.TimeoutError):
+                        # .part korunur; sonraki deneme kaldığı yerden sürer
+                        if attempt == RESUME_ATTEMPTS - 1:
+                            raise
+                        await asyncio.sleep(2 ** attempt)
+                
+                if "error" in outcome:
+                    return {
+                        "success": False,
+                        "error": outcome["error"],
+                        "url": url
+                    }
+                
+                if outcome.get("not_modified"):
+                    await asyncio.to_thread(_touch_http_meta, url)
                     return {
                         "success": True,
                         "file_path": file_path,
                         "filename": filename,
-                        "file_size": file_size,
-                        "already_exists": False
+                        "message": "Kaynakta değişmemiş",
+                        "already_exists": True,
+                        "not_modified": True
+                    }
+                
+                # Yenilemede kaynağın bildirdiği SHA-1 eski içeriğe ait olabilir
+                committed = await asyncio.to_thread(
+                    _commit_part, part_path, file_path,
+                    None if exists else expected_sha1, exists
+                )
+                if committed is None:
+                    return {
+                        "success": False,
+                        "error": "Sağlama toplamı uyuşmuyor",
+                        "url": url
                     }
                 
+                sha256, deduplicated, file_size = committed
+                await asyncio.to_thread(_save_http_meta, url, {
+                    "etag": outcome.get("etag"),
+                    "last_modified": outcome.get("last_modified"),
+                    "content_length": file_size,
+                    "sha256": sha256
+                })
+                return {
+                    "success": True,
+                    "file_path": file_path,
+                    "filename": filename,
+                    "file_size": file_size,
+                    "sha256": sha256,
+                    "resumed": outcome["resumed"],
+                    "deduplicated": deduplicated,
+                    "updated": exists,
+                    "already_exists": False
+                }
+                
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e)
             }
     
-    async def download_multiple(
+    async def _fetch_to_part(
         self,
-        images: list,
-        category_slug: str = "diger",
-        progress_callback: Optional[Callable[[int, int, str], None]] = None
+        url: str,
+        part_path: str,
+        progress_callback: Optional[Callable[[int], None]],
+        priority: int = INTERACTIVE,
+        conditional: Optional[Dict[str, str]] = None
     ) -> dict:
         """
-        Birden fazla görsel indir
-        
-        Args:
-            images: Görsel listesi [{"source_url": "...", "title": "..."}]
-            category_slug: Kategori klasörü
-            progress_callback: İlerleme bildirimi (current, total, filename)
-        
-        Returns:
-            Toplu indirme sonucu
+        .part dosyasını tamamla. Eksik gövdede ClientPayloadError fırlatılır
+        (.part yerinde kalır); HTTP hatası {"error": ...} olarak döner.
+        conditional başlıkları verilmişse 304 yanıtı {"not_modified": True} olur.
         """
-        results = {
-            "success": True,
-            "total": len(images),
-            "downloaded": 0,
-            "failed": 0,
-            "skipped": 0,
-            "details": []
-        }
+        offset, validator = await asyncio.to_thread(_part_state, part_path)
         
-        for i, image in enumerate(images):
-            url = image.get("source_url", "")
-            title = image.get("title", "unknown")
-            
-            if not url:
-                results["failed"] += 1
-                continue
-            
-            # İlerleme bildirimi
-            if progress_callback:
-                progress_callback(i + 1, len(images), title)
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            # Dosya sunucuda değiştiyse Range yok sayılır ve tamamı (200) gelir
+            if validator:
+                headers["If-Range"] = validator
+        elif conditional:
+            headers.update(conditional)
+        
+        session = self._get_session(url)
+        async with session.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT) as response:
+            if response.status == 304 and conditional:
+                return {"not_modified": True}
             
-            # İndir
-            result = await self.download_image(url, category_slug)
+            if response.status == 416 and offset:
+                # .part zaten tamamlanmış olabilir
+                if _content_range_total(response.headers.get("Content-Range")) == offset:
+                    await asyncio.to_thread(_drop_validator, part_path)
+                    return {"resumed": True}
+                await asyncio.to_thread(_discard_part, part_path)
+                return await self._fetch_to_part(
+                    url, part_path, progress_callback, priority, conditional
+                )
             
-            if result.get("success"):
-                if result.get("already_exists"):
-                    results["skipped"] += 1
-                else:
-                    results["downloaded"] += 1
-                results["details"].append({
-                    "title": title,
-                    "status": "success",
-                    "file_path": result.get("file_path")
-                })
+            if response.status == 206:
+                if _content_range_start(response.headers.get("Content-Range")) != offset:
+                    await asyncio.to_thread(_discard_part, part_path)
+                    return await self._fetch_to_part(
+                        url, part_path, progress_callback, priority, conditional
+                    )
+                mode = "ab"
+                total = _content_range_total(response.headers.get("Content-Range"))
+                if total is None and response.content_length is not None:
+                    total = offset + response.content_length
+            elif response.status == 200:
+                # Baştan yazılır (ilk indirme, Range desteği yok ya da dosya değişmiş)
+                offset = 0
+                mode = "wb"
+                total = response.content_length
+                await asyncio.to_thread(_write_validator, part_path, response.headers)
             else:
-                results["failed"] += 1
-                results["details"].append({
-                    "title": title,
-                    "status": "failed",
-                    "error": result.get("error")
-                })
+                return {"error": f"HTTP Error: {response.status}"}
             
-            # Rate limiting
-            await asyncio.sleep(0.3)
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            downloaded = await self._write_body(
+                response, part_path, mode, offset, total, progress_callback, priority
+            )
         
-        return results
+        if total is not None and downloaded != total:
+            raise aiohttp.ClientPayloadError(f"Eksik indirme: {downloaded}/{total} byte")
+        
+        await asyncio.to_thread(_drop_validator, part_path)
+        return {"resumed": mode == "ab", "etag": etag, "last_modified": last_modified}
+    
+    async def _write_body(
+        self,
+        response: aiohttp.ClientResponse,
+        part_path: str,
+        mode: str,
+        offset: int,
+        total: Optional[int],
+        progress_callback: Optional[Callable[[int], None]],
+        priority: int
+    ) -> int:
+        """
+        Gövdeyi write-behind tamponla yaz: bir tampon iş parçacığında diske
+        yazılırken sonraki veri ağdan okunur, olay döngüsü diski beklemez.
+        Hata olsa da alınan veri .part'a yazılır. Toplam byte'ı döndürür.
+        """
+        flush_size = _flush_size(total)
+        downloaded = offset
+        buffer = bytearray()
+        pending: Optional[asyncio.Future] = None
+        
+        f = await asyncio.to_thread(open, part_path, mode)
+        try:
+            async for chunk in response.content.iter_any():
+                # Bant genişliği aşılıyorsa okumayı yavaşlat (TCP geri basıncı)
+                await self.bandwidth.consume(str(response.url), len(chunk), priority)
+                buffer += chunk
+                downloaded += len(chunk)
+                
+                # İlerleme bildirimi
+                if progress_callback and total:
+                    progress_callback(int((downloaded / total) * 100))
+                
+                if len(buffer) >= flush_size:
+                    if pending is not None:
+                        await pending
+                    pending = asyncio.ensure_future(asyncio.to_thread(f.write, bytes(buffer)))
+                    buffer.clear()
+        finally:
+            if pending is not None:
+                await pending
+            if buffer:
+                await asyncio.to_thread(f.write, bytes(buffer))
+            await asyncio.to_thread(_close_synced, f)
+        
+        return downloaded
     
     def _extract_filename(self, url: str) -> str:
         """URL'den dosya adını çıkar"""
@@ -242,7 +464,8 @@ class DownloadService:
         
         for cat in categories:
             cat_path = os.path.join(DOWNLOADS_DIR, cat)
-            if not os.path.isdir(cat_path):
+            # Blob deposu kategori değildir (dosyalar kategori klasörlerinde hardlink)
+            if cat == BLOBS_DIRNAME or not os.path.isdir(cat_path):
                 continue
             
             for filename in os.listdir(cat_path):
@@ -262,3 +485,298 @@ class DownloadService:
                         })
         
         return images
+
+
+def _flush_size(total: Optional[int]) -> int:
+    """Büyük dosyalarda daha büyük tamponla daha az sayıda disk yazımı"""
+    return min(MAX_WRITE_BUFFER, max(MIN_WRITE_BUFFER, (total or 0) // 16))
+
+
+def _close_synced(f) -> None:
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+
+
+def _part_state(part_path: str) -> Tuple[int, Optional[str]]:
+    """Mevcut .part boyutu ve If-Range doğrulayıcısı"""
+    if not os.path.exists(part_path):
+        return 0, None
+    return os.path.getsize(part_path), _read_validator(part_path)
+
+
+def _lock_path(file_path: str) -> str:
+    """Kilit dosyaları kategori klasörlerini kirletmesin diye depoda tutulur"""
+    key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+    return os.path.join(DOWNLOADS_DIR, BLOBS_DIRNAME, "locks", key[:2], key + ".lock")
+
+
+def _try_lock_file(lock_path: str) -> Optional[int]:
+    """Kilidi beklemeden almayı dene; alınırsa dosya tanıtıcısını döndür"""
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _unlock_file(fd: int) -> None:
+    # Kilit dosyası silinmez: silmek, bekleyen sürecin eski dosyayı kilitlemesine yol açar
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+def _prepare_target(category_dir: str, file_path: str) -> bool:
+    """Kategori klasörünü oluştur; doğrulanmış dosya zaten varsa True"""
+    os.makedirs(category_dir, exist_ok=True)
+    return os.path.exists(file_path)
+
+
+def _content_range_start(value: Optional[str]) -> Optional[int]:
+    """'bytes 100-199/500' -> 100"""
+    match = re.match(r"bytes (\d+)-\d+/", value or "")
+    return int(match.group(1)) if match else None
+
+
+def _content_range_total(value: Optional[str]) -> Optional[int]:
+    """'bytes 100-199/500' veya 'bytes */500' -> 500"""
+    match = re.match(r"bytes (?:\d+-\d+|\*)/(\d+)", value or "")
+    return int(match.group(1)) if match else None
+
+
+def _validator_path(part_path: str) -> str:
+    return part_path + ".validator"
+
+
+def _read_validator(part_path: str) -> Optional[str]:
+    try:
+        with open(_validator_path(part_path), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _write_validator(part_path: str, headers) -> None:
+    """If-Range için güçlü ETag, yoksa Last-Modified sakla"""
+    etag = headers.get("ETag")
+    validator = etag if etag and not etag.startswith("W/") else headers.get("Last-Modified")
+    if validator:
+        with open(_validator_path(part_path), "w", encoding="utf-8") as f:
+            f.write(validator)
+    else:
+        _drop_validator(part_path)
+
+
+def _drop_validator(part_path: str) -> None:
+    try:
+        os.remove(_validator_path(part_path))
+    except OSError:
+        pass
+
+
+def _discard_part(part_path: str) -> None:
+    for path in (part_path, _validator_path(part_path)):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _file_digests(path: str) -> Tuple[str, str]:
+    """Dosyanın (sha256, sha1) özetleri, tek okumada"""
+    sha256, sha1 = hashlib.sha256(), hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(block)
+            sha1.update(block)
+    return sha256.hexdigest(), sha1.hexdigest()
+
+
+# ---------- İçerik adresli depo ----------
+
+def _blob_path(sha256: str) -> str:
+    return os.path.join(DOWNLOADS_DIR, BLOBS_DIRNAME, "sha256", sha256[:2], sha256)
+
+
+def _sha1_index_path(sha1: str) -> str:
+    return os.path.join(DOWNLOADS_DIR, BLOBS_DIRNAME, "sha1", sha1[:2], sha1)
+
+
+def _blob_for_sha1(sha1: str) -> Optional[str]:
+    """SHA-1'i bilinen içerik depodaysa SHA-256'sını döndür"""
+    try:
+        with open(_sha1_index_path(sha1.lower()), encoding="utf-8") as f:
+            sha256 = f.read().strip()
+    except OSError:
+        return None
+    return sha256 if os.path.exists(_blob_path(sha256)) else None
+
+
+def _store_blob(part_path: str, sha256: str, sha1: str) -> bool:
+    """
+    Doğrulanmış .part'ı depoya taşı ve SHA-1 dizinini güncelle.
+    İçerik zaten depodaysa .part silinir ve True döner.
+    """
+    blob_path = _blob_path(sha256)
+    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+
+    exists = os.path.exists(blob_path)
+    if exists:
+        os.remove(part_path)
+    else:
+        os.replace(part_path, blob_path)
+
+    _atomic_write_text(_sha1_index_path(sha1), sha256)
+
+    return exists
+
+
+def _atomic_write_text(path: str, text: str) -> None:
+    """Eşzamanlı yazıcılar birbirinin geçici dosyasını ezmesin diye benzersiz ad"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+def _link_known_blob(sha1: str, file_path: str) -> Optional[Tuple[str, int]]:
+    """SHA-1'i depodaki bir bloba karşılık geliyorsa onu bağla: (sha256, boyut)"""
+    sha256 = _blob_for_sha1(sha1)
+    if not sha256:
+        return None
+    _link_blob(_blob_path(sha256), file_path)
+    return sha256, os.path.getsize(file_path)
+
+
+def _commit_part(
+    part_path: str,
+    file_path: str,
+    expected_sha1: Optional[str],
+    replace: bool = False
+) -> Optional[Tuple[str, bool, int]]:
+    """
+    Tamamlanmış .part'ı doğrula, depoya taşı ve kategori klasörüne bağla:
+    (sha256, depoda zaten vardı mı, boyut). SHA-1 uyuşmazsa .part silinir, None.
+    replace=True ise mevcut dosya atomik olarak yeni içerikle değiştirilir;
+    eski içeriğin blobuna başka bağlantı kalmadıysa depodan silinir.
+    """
+    sha256, sha1 = _file_digests(part_path)
+    if expected_sha1 and sha1 != expected_sha1.lower():
+        os.remove(part_path)
+        return None
+
+    previous = _linked_blob(file_path) if replace else None
+    deduplicated = _store_blob(part_path, sha256, sha1)
+    _link_blob(_blob_path(sha256), file_path, replace)
+    if previous and previous[0] != sha256:
+        _release_blob(*previous)
+    return sha256, deduplicated, os.path.getsize(file_path)
+
+
+def _linked_blob(file_path: str) -> Optional[Tuple[str, str]]:
+    """Dosya depodaki bir bloba hardlink'liyse o blobun (sha256, sha1) özetleri"""
+    try:
+        if os.stat(file_path).st_nlink < 2:
+            return None
+    except FileNotFoundError:
+        return None
+    sha256, sha1 = _file_digests(file_path)
+    try:
+        return (sha256, sha1) if os.path.samefile(file_path, _blob_path(sha256)) else None
+    except FileNotFoundError:
+        return None
+
+
+def _release_blob(sha256: str, sha1: str) -> None:
+    """Hiçbir kategori dosyası artık bağlı değilse blobu ve SHA-1 kaydını sil"""
+    blob_path = _blob_path(sha256)
+    try:
+        if os.stat(blob_path).st_nlink > 1:
+            return
+        os.remove(blob_path)
+    except FileNotFoundError:
+        return
+
+    index_path = _sha1_index_path(sha1)
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            if f.read().strip() != sha256:
+                return
+        os.remove(index_path)
+    except FileNotFoundError:
+        pass
+
+
+def _link_blob(blob_path: str, target_path: str, replace: bool = False) -> None:
+    """Blobu kategori klasörüne hardlink'le; desteklenmiyorsa kopyala"""
+    if replace:
+        # Önce geçici ada bağla, sonra atomik olarak eskisinin yerine koy
+        temp_path = target_path + ".link"
+        _discard_part(temp_path)
+        _link_blob(blob_path, temp_path)
+        os.replace(temp_path, target_path)
+        return
+    
+    try:
+        os.link(blob_path, target_path)
+    except FileExistsError:
+        pass
+    except OSError:
+        shutil.copy2(blob_path, target_path + ".part")
+        os.replace(target_path + ".part", target_path)
+
+
+# ---------- HTTP doğrulayıcıları (koşullu yeniden doğrulama) ----------
+
+def _http_meta_path(url: str) -> str:
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(DOWNLOADS_DIR, BLOBS_DIRNAME, "http", key[:2], key + ".json")
+
+
+def _load_http_meta(url: str) -> Optional[dict]:
+    try:
+        with open(_http_meta_path(url), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_http_meta(url: str, meta: dict) -> None:
+    """URL'nin son indirmesindeki ETag / Last-Modified / Content-Length bilgisini sakla"""
+    meta = {"url": url, **meta, "checked_at": time.time()}
+    _atomic_write_text(_http_meta_path(url), json.dumps(meta))
+
+
+def _touch_http_meta(url: str) -> None:
+    meta = _load_http_meta(url)
+    if meta is not None:
+        _save_http_meta(url, {k: v for k, v in meta.items() if k not in ("url", "checked_at")})
+
+
+def _conditional_headers(url: str, file_path: str) -> Dict[str, str]:
+    """
+    Saklanan doğrulayıcılardan If-None-Match / If-Modified-Since üret.
+    Bilgi yoksa (eski indirmeler) dosyanın değiştirilme zamanı kullanılır.
+    """
+    meta = _load_http_meta(url) or {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    if not headers:
+        headers["If-Modified-Since"] = formatdate(os.path.getmtime(file_path), usegmt=True)
+    return headers
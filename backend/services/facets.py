@@ -0,0 +1,162 @@
+"""
+Katalog fasetleri
+Kaynak, lisans, yazar, yıl, MIME türü ve çözünürlük dilimine göre sayımlar.
+Filtresiz ve tek fasete göre filtreli sayımlar tetikleyicilerle artımlı tutulan
+sayaç tablolarından okunur; birden fazla fasete göre filtrelemede sütun
+indeksleri üzerinden GROUP BY yapılır.
+"""
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+
+from ..database import get_async_db
+from ..database.facets import FACETS, facet_expression, facet_filter_sql, normalize_facet_value
+from .catalog_search import CATALOG_COLUMNS, catalog_image
+
+# Faset başına döndürülen en fazla değer
+DEFAULT_VALUE_LIMIT = 20
+
+_TOP_VALUES_SQL = text("""
+    SELECT facet, value, count FROM (
+        SELECT facet, value, count,
+               ROW_NUMBER() OVER (PARTITION BY facet ORDER BY count DESC, value) AS position
+        FROM facet_counts
+        WHERE count > 0
+    )
+    WHERE position <= :limit
+""")
+
+_PAIR_VALUES_SQL = """
+    SELECT other_facet AS facet, other_value AS value, count FROM (
+        SELECT other_facet, other_value, SUM(count) AS count,
+               ROW_NUMBER() OVER (
+                   PARTITION BY other_facet ORDER BY SUM(count) DESC, other_value
+               ) AS position
+        FROM facet_pair_counts
+        WHERE facet = :facet AND value IN ({values})
+        GROUP BY other_facet, other_value
+        HAVING SUM(count) > 0
+    )
+    WHERE position <= :limit
+"""
+
+
+class CatalogFacets:
+    """Katalog üzerinde faset sayımları ve fasetlere göre süzülmüş liste"""
+
+    async def get_facets(
+        self,
+        filters: Dict[str, List[str]],
+        limit: int = DEFAULT_VALUE_LIMIT,
+        page_size: int = 0,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Her fasetin en sık değerleri ve sayıları. Bir fasetin kendi sayımları
+        kendi seçimi dışındaki filtrelerle hesaplanır (çoklu seçim).
+        Geçersiz faset veya değer için ValueError fırlatır.
+        """
+        started = time.perf_counter()
+        filters = {facet: values for facet, values in filters.items() if values}
+        for facet in filters:
+            if facet not in FACETS:
+                raise ValueError(f"Bilinmeyen faset: {facet}")
+        # Sayaç ve tarama yolları aynı değerleri kabul etsin
+        filters = {
+            facet: [normalize_facet_value(facet, value) for value in values]
+            for facet, values in filters.items()
+        }
+
+        async with get_async_db() as db:
+            if len(filters) <= 1:
+                facets, total = await self._from_counters(db, filters, limit)
+                mode = "counters"
+            else:
+                facets, total = await self._from_scan(db, filters, limit)
+                mode = "scan"
+
+            images = []
+            if page_size:
+                images = await self._list_images(db, filters, page_size, offset)
+
+        return {
+            "success": True,
+            "facets": facets,
+            "total": total,
+            "filters": filters,
+            "images": images,
+            "mode": mode,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    async def _from_counters(self, db, filters: Dict[str, List[str]], limit: int):
+        facets: Dict[str, List[dict]] = {facet: [] for facet in FACETS}
+        for row in (await db.execute(_TOP_VALUES_SQL, {"limit": limit})).mappings():
+            facets[row["facet"]].append({"value": row["value"], "count": row["count"]})
+
+        if not filters:
+            total = sum(entry["count"] for entry in facets["source"])
+            if len(facets["source"]) == limit:
+                total = await db.scalar(text(
+                    "SELECT COALESCE(SUM(count), 0) FROM facet_counts WHERE facet = 'source'"
+                ))
+            return facets, total
+
+        # Tek fasete göre filtre: diğer fasetler çift sayaçlarından okunur
+        (facet, values), = filters.items()
+        params = {"facet": facet, "limit": limit}
+        names = []
+        for index, value in enumerate(values):
+            params[f"value_{index}"] = value
+            names.append(f":value_{index}")
+
+        for other in FACETS:
+            if other != facet:
+                facets[other] = []
+        rows = await db.execute(text(_PAIR_VALUES_SQL.format(values=", ".join(names))), params)
+        for row in rows.mappings():
+            facets[row["facet"]].append({"value": row["value"], "count": row["count"]})
+
+        total = await db.scalar(text(
+            f"SELECT COALESCE(SUM(count), 0) FROM facet_counts "
+            f"WHERE facet = :facet AND value IN ({', '.join(names)})"
+        ), params)
+        return facets, total
+
+    async def _from_scan(self, db, filters: Dict[str, List[str]], limit: int):
+        facets: Dict[str, List[dict]] = {}
+        for facet in FACETS:
+            params: Dict[str, object] = {"limit": limit}
+            where = self._where({f: v for f, v in filters.items() if f != facet}, params)
+            rows = await db.execute(text(f"""
+                SELECT {facet_expression(facet)} AS value, COUNT(*) AS count
+                FROM images WHERE {where}
+                GROUP BY value ORDER BY count DESC, value LIMIT :limit
+            """), params)
+            facets[facet] = [{"value": row["value"], "count": row["count"]} for row in rows.mappings()]
+
+        params = {}
+        total = await db.scalar(text(
+            f"SELECT COUNT(*) FROM images WHERE {self._where(filters, params)}"
+        ), params)
+        return facets, total
+
+    async def _list_images(
+        self,
+        db,
+        filters: Dict[str, List[str]],
+        page_size: int,
+        offset: int
+    ) -> List[dict]:
+        params: Dict[str, object] = {"page_size": page_size, "offset": offset}
+        rows = await db.execute(text(f"""
+            SELECT {CATALOG_COLUMNS} FROM images
+            WHERE {self._where(filters, params)}
+            ORDER BY images.id DESC LIMIT :page_size OFFSET :offset
+        """), params)
+        return [catalog_image(row) for row in rows.mappings()]
+
+    def _where(self, filters: Dict[str, List[str]], params: Dict[str, object]) -> str:
+        conditions = [facet_filter_sql(facet, values, params) for facet, values in filters.items()]
+        return " AND ".join(conditions) or "1 = 1"
@@ -0,0 +1,168 @@
+"""
+Birleşik (federated) arama
+Tüm kaynakları eşzamanlı sorgular, sonuçları geldikçe olay olarak yayar
+"""
+import time
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional
+
+from ..core.deadline import deadline_scope
+
+# Kaynak başına varsayılan süre sınırı (ms)
+SOURCE_DEADLINES_MS = {
+    "wikimedia": 5000,
+    "nara": 8000,
+    "archive_org": 8000,
+}
+
+# Scraper'ın kısmi sonucunu teslim edebilmesi için bütçeye eklenen pay
+GRACE_SECONDS = 0.25
+
+
+class FederatedSearch:
+    """Wikimedia, NARA ve Archive.org üzerinde eşzamanlı görsel araması"""
+
+    def __init__(self, scrapers: Dict[str, Any]):
+        # kaynak adı -> search_images(query, limit=...) sunan scraper
+        self.scrapers = scrapers
+
+    async def stream(
+        self,
+        query: str,
+        limit: int = 100,
+        deadline_ms: Optional[int] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Her kaynağın sonucunu hazır olur olmaz "results" (veya "error")
+        olayı olarak üret; en sonda zaman aşımına uğrayanları listeleyen
+        "summary" olayı gelir.
+        """
+        started = time.monotonic()
+        per_source = max(1, limit // len(self.scrapers))
+
+        tasks = {
+            asyncio.create_task(
+                self._run_source(name, scraper, query, per_source, started,
+                                 deadline_ms or SOURCE_DEADLINES_MS.get(name, 8000))
+            ): name
+            for name, scraper in self.scrapers.items()
+        }
+
+        succeeded, partial, failed, timed_out = [], [], [], []
+        total = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                event = await next_done
+                if event["event"] == "results":
+                    succeeded.append(event["source"])
+                    if event["partial"]:
+                        partial.append(event["source"])
+                    total += event["total"]
+                elif event["event"] == "timeout":
+                    timed_out.append(event["source"])
+                    continue
+                else:
+                    failed.append(event["source"])
+                yield event
+        finally:
+            # İstemci bağlantıyı koparırsa kalan sorgular iptal edilir
+            for task in tasks:
+                task.cancel()
+
+        yield {
+            "event": "summary",
+            "query": query,
+            "sources": succeeded,
+            "partial": partial,
+            "failed": failed,
+            "timed_out": timed_out,
+            "total": total,
+            "elapsed_ms": _elapsed_ms(started)
+        }
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 100,
+        timeout_ms: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Tüm kaynakların sonuçlarını tek yanıtta topla. Bütçe dolduğunda
+        yetişenler döner; yanıt partial ve kaynak bazlı durum içerir.
+        """
+        all_images = []
+        # Kaynak bazlı durum; "sources" eskisi gibi sonuç veren kaynakların listesi
+        source_status: Dict[str, dict] = {}
+        summary = {}
+
+        async for event in self.stream(query, limit=limit, deadline_ms=timeout_ms):
+            name = event.get("source")
+            if event["event"] == "results":
+                all_images.extend(event["images"])
+                source_status[name] = {
+                    "status": "partial" if event["partial"] else "ok",
+                    "count": event["total"],
+                    "elapsed_ms": event["elapsed_ms"]
+                }
+            elif event["event"] == "error":
+                source_status[name] = {"status": "error", "error": event["error"],
+                                 "elapsed_ms": event["elapsed_ms"]}
+            elif event["event"] == "summary":
+                summary = event
+
+        for name in summary.get("timed_out", []):
+            source_status[name] = {"status": "timeout", "count": 0}
+
+        return {
+            "success": True,
+            "images": all_images[:limit],
+            "total": len(all_images),
+            "sources": [
+                name for name in self.scrapers
+                if source_status.get(name, {}).get("status") in ("ok", "partial")
+            ],
+            "source_status": source_status,
+            "partial": any(info["status"] != "ok" for info in source_status.values()),
+            "query": query,
+            "elapsed_ms": summary.get("elapsed_ms")
+        }
+
+    async def _run_source(
+        self,
+        name: str,
+        scraper: Any,
+        query: str,
+        limit: int,
+        started: float,
+        deadline_ms: int
+    ) -> dict:
+        try:
+            # Bütçe scraper'a taşınır; scraper yetişen sonuçlarla (partial) döner.
+            # wait_for yalnızca bütçeye uymayan çağrılar için emniyet sınırıdır
+            with deadline_scope(deadline_ms):
+                result = await asyncio.wait_for(
+                    scraper.search_images(query, limit=limit),
+                    timeout=deadline_ms / 1000 + GRACE_SECONDS
+                )
+        except asyncio.TimeoutError:
+            return {"event": "timeout", "source": name, "elapsed_ms": _elapsed_ms(started)}
+        except Exception as e:
+            return {"event": "error", "source": name, "error": str(e),
+                    "elapsed_ms": _elapsed_ms(started)}
+
+        if not result.get("success"):
+            return {"event": "error", "source": name, "error": result.get("error", "Hata"),
+                    "elapsed_ms": _elapsed_ms(started)}
+
+        return {
+            "event": "results",
+            "source": name,
+            "images": result["images"][:limit],
+            "total": len(result["images"][:limit]),
+            "partial": result.get("partial", False),
+            "elapsed_ms": _elapsed_ms(started)
+        }
+
+
+def _elapsed_ms(started: float) -> int:
+    return int((time.monotonic() - started) * 1000)
@@ -0,0 +1,351 @@
+"""
+Wikimedia kategori ağacı toplayıcı
+Alt kategorileri genişlik öncelikli gezer, dosyaları yerel kataloğa yazar
+"""
+import json
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from ..database import get_db, Category, Image, HarvestJob, CategorySyncState
+from ..scrapers.wikimedia import WikimediaScraper
+from .catalog import bulk_upsert_images
+
+# Aynı sayfa için art arda deneme sayısı
+MAX_ATTEMPTS = 3
+
+# Senkron sırasında gelen eklemeleri kaçırmamak için yüksek su işareti bu kadar geri alınır
+SYNC_OVERLAP = timedelta(minutes=10)
+
+
+class CategoryHarvester:
+    """HarvestJob kayıtlarını arka planda çalıştıran tarayıcı"""
+
+    def __init__(self, scraper: WikimediaScraper):
+        self.scraper = scraper
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._sync_tasks: Dict[str, asyncio.Task] = {}
+
+    # ---------- İş yönetimi ----------
+
+    async def start(self, category_slug: str, max_depth: int = 3) -> dict:
+        """Yeni tarama işi oluştur ve arka planda başlat"""
+        if category_slug not in self.scraper.WW2_CATEGORIES:
+            return {"success": False, "error": "Kategori bulunamadı"}
+
+        result = await asyncio.to_thread(self._create_job, category_slug, max_depth)
+        if result["success"]:
+            self._spawn(result["job"]["id"])
+        return result
+
+    def _create_job(self, category_slug: str, max_depth: int) -> dict:
+        with get_db() as db:
+            active = db.query(HarvestJob).filter(
+                HarvestJob.category_slug == category_slug,
+                HarvestJob.status.in_(["pending", "running"])
+            ).first()
+            if active:
+                return {"success": False, "error": "Bu kategori için çalışan bir iş var", "job": active.to_dict()}
+
+            roots = self.scraper.WW2_CATEGORIES[category_slug]
+            state = {
+                "queue": [[name, 0] for name in roots],
+                "visited": list(roots),
+                "current": None,
+            }
+            job = HarvestJob(
+                category_slug=category_slug,
+                max_depth=max_depth,
+                state=json.dumps(state, ensure_ascii=False)
+            )
+            db.add(job)
+            db.commit()
+            return {"success": True, "job": job.to_dict()}
+
+    async def resume(self, job_id: int) -> dict:
+        """Yarım kalmış veya hata almış işi kaldığı yerden sürdür"""
+        result = await asyncio.to_thread(self._reset_job, job_id)
+        if result["success"]:
+            self._spawn(job_id)
+        return result
+
+    def _reset_job(self, job_id: int) -> dict:
+        with get_db() as db:
+            job = db.query(HarvestJob).filter(HarvestJob.id == job_id).first()
+            if not job:
+                return {"success": False, "error": "İş bulunamadı"}
+            if job.status == "completed":
+                return {"success": False, "error": "İş zaten tamamlandı", "job": job.to_dict()}
+            job.status = "pending"
+            job.error_message = None
+            db.commit()
+            return {"success": True, "job": job.to_dict()}
+
+    async def resume_unfinished(self):
+        """Uygulama başlarken yarıda kalan işleri yeniden başlat"""
+        for job_id in await asyncio.to_thread(self._unfinished_job_ids):
+            self._spawn(job_id)
+
+    def _unfinished_job_ids(self) -> List[int]:
+        with get_db() as db:
+            return list(db.scalars(select(HarvestJob.id).where(
+                HarvestJob.status.in_(["pending", "running"])
+            )))
+
+    def get_job(self, job_id: int) -> Optional[dict]:
+        with get_db() as db:
+            job = db.query(HarvestJob).filter(HarvestJob.id == job_id).first()
+            return job.to_dict() if job else None
+
+    def list_jobs(self, limit: int = 20) -> List[dict]:
+        with get_db() as db:
+            jobs = db.query(HarvestJob).order_by(HarvestJob.id.desc()).limit(limit).all()
+            return [job.to_dict() for job in jobs]
+
+    async def close(self):
+        """Çalışan işleri durdur; kontrol noktasından sonra devam edilir"""
+        tasks = list(self._tasks.values()) + list(self._sync_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._sync_tasks.clear()
+
+    def _spawn(self, job_id: int):
+        if job_id in self._tasks and not self._tasks[job_id].done():
+            return
+        task = asyncio.create_task(self._run(job_id))
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        self._tasks[job_id] = task
+
+    # ---------- Tarama ----------
+
+    async def _run(self, job_id: int):
+        started = await asyncio.to_thread(self._mark_running, job_id)
+        if started is None:
+            return
+        max_depth, state, category_id = started
+
+        queue = deque(tuple(item) for item in state["queue"])
+        visited = set(state["visited"])
+        current = state["current"]
+
+        try:
+            while current or queue:
+                if current is None:
+                    name, depth = queue.popleft()
+                    current = {"category": name, "depth": depth, "continue": None}
+
+                # 1) Kategorinin dosyalarını sayfa sayfa topla
+                while True:
+                    images, next_continue = await self._with_retry(
+                        self.scraper.get_category_files_page,
+                        current["category"],
+                        current["continue"]
+                    )
+                    current["continue"] = next_continue
+                    done = next_continue is None
+                    await asyncio.to_thread(
+                        self._persist_page, job_id, category_id, images,
+                        self._snapshot(queue, visited, current), False
+                    )
+                    if done:
+                        break
+
+                # 2) Derinlik sınırı içindeyse alt kategorileri kuyruğa ekle
+                if current["depth"] < max_depth:
+                    subcategories = await self._with_retry(
+                        self.scraper.get_subcategories, current["category"]
+                    )
+                    for sub in subcategories:
+                        if sub not in visited:  # Döngü koruması
+                            visited.add(sub)
+                            queue.append((sub, current["depth"] + 1))
+
+                current = None
+                await asyncio.to_thread(
+                    self._persist_page, job_id, category_id, [],
+                    self._snapshot(queue, visited, current), True
+                )
+
+            await asyncio.to_thread(self._finish, job_id, "completed")
+        except asyncio.CancelledError:
+            # Kapatma sırasında: durum "running" kalır, açılışta devam edilir
+            raise
+        except Exception as e:
+            print(f"Tarama hatası (iş {job_id}): {e}")
+            await asyncio.to_thread(self._finish, job_id, "failed", str(e))
+
+    def _mark_running(self, job_id: int) -> Optional[Tuple[int, dict, Optional[int]]]:
+        """İşi running yap; (max_depth, kontrol noktası, kategori id) döndür"""
+        with get_db() as db:
+            job = db.query(HarvestJob).filter(HarvestJob.id == job_id).first()
+            if not job:
+                return None
+            job.status = "running"
+            db.commit()
+            return job.max_depth, json.loads(job.state), self._category_id(db, job.category_slug)
+
+    def _category_id(self, db, category_slug: str) -> Optional[int]:
+        return db.scalar(select(Category.id).where(Category.slug == category_slug))
+
+    async def _with_retry(self, func, *args):
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                return await func(*args)
+            except Exception:
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+
+    def _snapshot(self, queue: deque, visited: set, current: Optional[dict]) -> str:
+        return json.dumps({
+            "queue": [list(item) for item in queue],
+            "visited": sorted(visited),
+            "current": current,
+        }, ensure_ascii=False)
+
+    def _persist_page(
+        self,
+        job_id: int,
+        category_id: Optional[int],
+        images: List[dict],
+        state: str,
+        category_done: bool
+    ):
+        """Yeni görselleri toplu ekle ve kontrol noktasını aynı işlemde kaydet"""
+        with get_db() as db:
+            # Eklenen sayısı için önceden katalogda olanlar sayılır
+            existing = db.scalar(select(func.count()).select_from(Image).where(
+                Image.source == "wikimedia",
+                Image.source_id.in_([str(img["source_id"]) for img in images])
+            )) if images else 0
+            added = bulk_upsert_images(db, images, category_id) - existing
+
+            job = db.query(HarvestJob).filter(HarvestJob.id == job_id).first()
+            job.state = state
+            job.files_seen += len(images)
+            job.files_added += added
+            if category_done:
+                job.categories_done += 1
+            job.updated_at = datetime.utcnow()
+            db.commit()
+
+    def _finish(self, job_id: int, status: str, error: Optional[str] = None):
+        with get_db() as db:
+            job = db.query(HarvestJob).filter(HarvestJob.id == job_id).first()
+            job.status = status
+            job.error_message = error
+            job.updated_at = datetime.utcnow()
+            if status == "completed":
+                job.completed_at = datetime.utcnow()
+            db.commit()
+
+    # ---------- Artımlı senkron ----------
+
+    def start_sync(self, category_slug: str) -> dict:
+        """Kategoride son senkrondan beri eklenen dosyaları arka planda çek"""
+        if category_slug not in self.scraper.WW2_CATEGORIES:
+            return {"success": False, "error": "Kategori bulunamadı"}
+
+        task = self._sync_tasks.get(category_slug)
+        if task is None or task.done():
+            task = asyncio.create_task(self._run_sync(category_slug))
+            task.add_done_callback(lambda _: self._sync_tasks.pop(category_slug, None))
+            self._sync_tasks[category_slug] = task
+
+        return {"success": True, "category_slug": category_slug, "running": True}
+
+    def get_sync_states(self, category_slug: str) -> List[dict]:
+        with get_db() as db:
+            states = db.query(CategorySyncState).filter(
+                CategorySyncState.category_slug == category_slug
+            ).order_by(CategorySyncState.wiki_category).all()
+            return [state.to_dict() for state in states]
+
+    def _sync_targets(self, category_slug: str) -> Tuple[Optional[int], Dict[str, Optional[str]]]:
+        """
+        Kategori id'si ile senkronlanacak Wikimedia kategorileri ve yüksek su işaretleri.
+        Taranmış alt kategoriler de dahil edilir; hiç senkronlanmamış ama
+        taranmış kategoriler tarama başlangıcından itibaren senkronlanır.
+        """
+        targets: Dict[str, Optional[str]] = {
+            name: None for name in self.scraper.WW2_CATEGORIES[category_slug]
+        }
+
+        with get_db() as db:
+            harvest = db.query(HarvestJob).filter(
+                HarvestJob.category_slug == category_slug,
+                HarvestJob.status == "completed"
+            ).order_by(HarvestJob.id.desc()).first()
+            if harvest:
+                harvested_at = _to_mw_timestamp(harvest.created_at - SYNC_OVERLAP)
+                for name in json.loads(harvest.state)["visited"]:
+                    targets[name] = harvested_at
+
+            for state in db.query(CategorySyncState).filter(
+                CategorySyncState.wiki_category.in_(list(targets))
+            ):
+                targets[state.wiki_category] = state.high_water_mark
+
+            return self._category_id(db, category_slug), targets
+
+    async def _run_sync(self, category_slug: str):
+        category_id, targets = await asyncio.to_thread(self._sync_targets, category_slug)
+
+        for wiki_category, since in targets.items():
+            started_at = datetime.utcnow()
+            continue_params = None
+            synced = 0
+
+            try:
+                while True:
+                    images, continue_params = await self._with_retry(
+                        self.scraper.get_category_files_page,
+                        wiki_category, continue_params, 0, since
+                    )
+                    await asyncio.to_thread(self._upsert_page, images, category_id)
+                    synced += len(images)
+                    if continue_params is None:
+                        break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # İşaret ilerletilmez; sonraki senkron aynı noktadan tekrar dener
+                print(f"Senkron hatası ({wiki_category}): {e}")
+                continue
+
+            await asyncio.to_thread(
+                self._save_sync_state, category_slug, wiki_category,
+                _to_mw_timestamp(started_at - SYNC_OVERLAP), synced
+            )
+
+    def _upsert_page(self, images: List[dict], category_id: Optional[int]):
+        with get_db() as db:
+            bulk_upsert_images(db, images, category_id)
+            db.commit()
+
+    def _save_sync_state(self, category_slug: str, wiki_category: str, mark: str, synced: int):
+        with get_db() as db:
+            state = db.query(CategorySyncState).filter(
+                CategorySyncState.wiki_category == wiki_category
+            ).first()
+            if not state:
+                state = CategorySyncState(
+                    wiki_category=wiki_category,
+                    category_slug=category_slug,
+                    files_synced=0
+                )
+                db.add(state)
+            state.high_water_mark = mark
+            state.files_synced += synced
+            state.last_synced_at = datetime.utcnow()
+            db.commit()
+
+
+def _to_mw_timestamp(value: datetime) -> str:
+    """MediaWiki API'nin beklediği ISO 8601 UTC biçimi"""
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
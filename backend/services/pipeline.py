@@ -0,0 +1,284 @@
+"""
+Arama → indirme hattı
+Kaynak sonuçları sayfa sayfa sınırlı bir kuyruğa akar; kuyruğu boşaltan
+görev sayfaları kalıcı indirme kuyruğuna ekler. İndirmeler arama sürerken
+başlar, bellekte en fazla birkaç sayfa tutulur:
+  - tampon dolunca arama bekler,
+  - işin indirilmeyi bekleyen satırları çoğalınca kuyruğa ekleme bekler.
+"""
+import uuid
+import asyncio
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .download_queue import DownloadQueueWorker
+
+# Kaynaktan tek seferde istenen görsel sayısı
+PAGE_SIZE = 50
+
+# Arama ile kuyruğa ekleme arasındaki tampon (sayfa)
+QUEUE_PAGES = 4
+
+# İşin bitmemiş satırı bu sayıya ulaşınca yeni sayfa eklenmez
+MAX_BACKLOG = 200
+BACKLOG_POLL_INTERVAL = 1.0
+
+# Bir işte en fazla kaç görsel indirileceği
+MAX_PIPELINE_IMAGES = 5000
+
+# Bellekte tutulan bitmiş iş sayısı
+MAX_TRACKED_JOBS = 50
+
+
+def _matches(image: dict, min_width: int, mime_types: Optional[List[str]]) -> bool:
+    """Filtrelere uyuyor mu? Boyutu bilinmeyen (0) görseller genişlikten elenmez."""
+    width = image.get("width") or 0
+    if min_width and width and width < min_width:
+        return False
+    if mime_types:
+        mime = (image.get("mime_type") or "").lower()
+        if not any(mime.startswith(prefix.lower()) for prefix in mime_types):
+            return False
+    return True
+
+
+class SearchDownloadPipeline:
+    """Kategori/arama sonuçlarını sunucuda doğrudan indirme kuyruğuna aktarır"""
+
+    def __init__(
+        self,
+        scrapers: Dict[str, Any],
+        download_queue: DownloadQueueWorker,
+        page_size: int = PAGE_SIZE,
+        queue_pages: int = QUEUE_PAGES,
+        max_backlog: int = MAX_BACKLOG
+    ):
+        # kaynak adı -> scraper; "wikimedia" kategori ve cursor desteği sunar
+        self.scrapers = scrapers
+        self.download_queue = download_queue
+        self.page_size = page_size
+        self.queue_pages = queue_pages
+        self.max_backlog = max_backlog
+
+        self._jobs: Dict[str, dict] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    # ---------- İş yönetimi ----------
+
+    def start(
+        self,
+        category_slug: Optional[str] = None,
+        query: Optional[str] = None,
+        sources: Optional[List[str]] = None,
+        limit: int = 500,
+        min_width: int = 0,
+        mime_types: Optional[List[str]] = None
+    ) -> dict:
+        """Arama+indirme işini arka planda başlat ve iş kimliğini döndür"""
+        sources = sources or ["wikimedia"]
+        unknown = [name for name in sources if name not in self.scrapers]
+        if unknown:
+            return {"success": False, "error": f"Bilinmeyen kaynak: {', '.join(unknown)}"}
+
+        wikimedia = self.scrapers.get("wikimedia")
+        if category_slug and (wikimedia is None or category_slug not in wikimedia.WW2_CATEGORIES):
+            return {"success": False, "error": "Kategori bulunamadı"}
+        if not category_slug and not query:
+            return {"success": False, "error": "Kategori veya arama terimi gerekli"}
+
+        job_id = uuid.uuid4().hex
+        self._jobs[job_id] = {
+            "job_id": job_id,
+            "category_slug": category_slug or "diger",
+            "query": query,
+            "sources": sources,
+            "limit": min(limit, MAX_PIPELINE_IMAGES),
+            "search": "running",
+            "pages": 0,
+            "found": 0,
+            "filtered": 0,
+            "queued": 0,
+            "errors": [],
+            "started_at": datetime.utcnow().isoformat(),
+            "search_finished_at": None,
+        }
+        self._forget_finished()
+
+        task = asyncio.create_task(self._run(job_id, min_width, mime_types))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        return {"success": True, "job_id": job_id}
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        """
+        Arama durumu ile işin indirme sayaçlarını birlikte döndür.
+        Bellekten düşmüş işlerin durumu yalnızca indirme kuyruğundan okunur.
+        """
+        job = self._jobs.get(job_id)
+        downloads = self.download_queue.get_job(job_id, include_items=False)
+        if job is None:
+            if downloads is None:
+                return None
+            # Arama çoktan bitmiştir; kuyruktaki satırlar işin bulduklarıdır
+            job = {
+                "job_id": job_id,
+                "search": "done",
+                "found": downloads["total"],
+                "queued": downloads["total"],
+            }
+
+        counts = {"total": 0, "pending": 0, "downloading": 0, "completed": 0,
+                  "skipped": 0, "failed": 0, "downloaded": 0, "progress": 0}
+        if downloads:
+            counts.update({key: downloads[key] for key in counts})
+
+        searching = job["search"] == "running"
+        return {
+            **job,
+            **counts,
+            "done": not searching and (downloads is None or downloads["done"]),
+        }
+
+    async def close(self):
+        """Süren aramaları durdur; kuyruğa alınmış satırlar indirilmeye devam eder"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _forget_finished(self):
+        # İndirmeleri sürse de düşürülebilir; get_job durumu kuyruktan okur
+        finished = [job_id for job_id, job in self._jobs.items() if job["search"] != "running"]
+        for job_id in finished[:max(0, len(finished) - MAX_TRACKED_JOBS)]:
+            del self._jobs[job_id]
+
+    # ---------- Hat ----------
+
+    async def _run(self, job_id: str, min_width: int, mime_types: Optional[List[str]]):
+        job = self._jobs[job_id]
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.queue_pages)
+        producer = asyncio.create_task(self._produce(job, min_width, mime_types, pages))
+
+        try:
+            while True:
+                images = await pages.get()
+                if images is None:
+                    break
+                await self._wait_for_backlog(job_id)
+                result = await self.download_queue.enqueue(images, job["category_slug"], job_id=job_id)
+                if result["success"]:
+                    job["queued"] += result["total"]
+            job["search"] = "failed" if job["errors"] and not job["queued"] else "done"
+        except asyncio.CancelledError:
+            job["search"] = "cancelled"
+            raise
+        except Exception as e:
+            print(f"Arama-indirme hattı hatası ({job_id}): {e}")
+            job["errors"].append(str(e))
+            job["search"] = "failed"
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            job["search_finished_at"] = datetime.utcnow().isoformat()
+
+    async def _produce(
+        self,
+        job: dict,
+        min_width: int,
+        mime_types: Optional[List[str]],
+        pages: asyncio.Queue
+    ):
+        """Filtrelenmiş, tekrarsız sayfaları tampona koy; sonunda None gönder"""
+        seen = set()
+        try:
+            for source in job["sources"]:
+                async for batch in self._source_pages(source, job):
+                    job["pages"] += 1
+                    page = []
+                    for img in batch:
+                        key = img.get("source_id") or img.get("source_url")
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        if not _matches(img, min_width, mime_types):
+                            job["filtered"] += 1
+                            continue
+                        page.append(img)
+
+                    page = page[:job["limit"] - job["found"]]
+                    if page:
+                        job["found"] += len(page)
+                        # Tampon doluysa indirme tarafı yetişene kadar burada beklenir
+                        await pages.put(page)
+                    if job["found"] >= job["limit"]:
+                        break
+                if job["found"] >= job["limit"]:
+                    break
+        except Exception as e:
+            print(f"Hat araması hatası ({job['job_id']}): {e}")
+            job["errors"].append(str(e))
+        await pages.put(None)
+
+    async def _source_pages(self, source: str, job: dict) -> AsyncIterator[List[dict]]:
+        """Bir kaynağın sonuçlarını sayfa sayfa üret"""
+        scraper = self.scrapers[source]
+        category_slug = job["category_slug"] if job["category_slug"] != "diger" else None
+        query = job["query"]
+
+        if source == "wikimedia":
+            if category_slug and not query:
+                async for page in self._cursor_pages(
+                    job, source,
+                    lambda cursor: scraper.get_category_images(
+                        category_slug, limit=self.page_size, cursor=cursor
+                    )
+                ):
+                    yield page
+            if query:
+                async for page in self._cursor_pages(
+                    job, source,
+                    lambda cursor: scraper.search_images(
+                        query=query, category_slug=category_slug,
+                        limit=self.page_size, cursor=cursor
+                    )
+                ):
+                    yield page
+            return
+
+        # NARA ve Archive.org sayfalamıyor; tek istek yeterli
+        term = query or self._category_term(category_slug)
+        if not term:
+            return
+        result = await scraper.search_images(query=term, limit=min(job["limit"], 100))
+        if result["success"]:
+            yield result["images"]
+        else:
+            job["errors"].append(f"{source}: {result.get('error', 'Hata')}")
+
+    async def _cursor_pages(self, job: dict, source: str, fetch) -> AsyncIterator[List[dict]]:
+        """next_cursor bitene (ya da ilerlemeyi durdurana) kadar sayfaları getir"""
+        cursor = None
+        while True:
+            result = await fetch(cursor)
+            if not result["success"]:
+                job["errors"].append(f"{source}: {result.get('error', 'Hata')}")
+                return
+            yield result["images"]
+
+            next_cursor = result.get("next_cursor")
+            # Hata alan alt akışlar aynı konumda kalır; hiç ilerleme yoksa dur
+            if not next_cursor or next_cursor == cursor:
+                return
+            cursor = next_cursor
+
+    def _category_term(self, category_slug: Optional[str]) -> Optional[str]:
+        wikimedia = self.scrapers.get("wikimedia")
+        if not category_slug or wikimedia is None:
+            return None
+        terms = wikimedia.SEARCH_TERMS.get(category_slug)
+        return terms[0] if terms else None
+
+    async def _wait_for_backlog(self, job_id: str):
+        """İşin indirilmeyi bekleyen satırları azalana kadar beklet"""
+        while await asyncio.to_thread(self.download_queue.count_unfinished, job_id) >= self.max_backlog:
+            await asyncio.sleep(BACKLOG_POLL_INTERVAL)
@@ -0,0 +1,88 @@
+"""
+WW2 Görsel Arşivi - Bağımsız indirme işçisi
+Aynı data/ dizinini paylaşan API ile birlikte çalışır ve DownloadQueue
+tablosundaki işleri kiralama (lease) ile sahiplenip indirir.
+
+Kullanım:
+    python -m backend.worker --workers 8
+
+Birden fazla örnek aynı anda çalıştırılabilir; bir satırı yalnızca
+kiralamayı alan işçi indirir, çöken işçinin satırları kiralama dolunca
+diğer işçilere geçer.
+"""
+import sys
+import signal
+import asyncio
+import argparse
+from pathlib import Path
+
+# Proje yolunu ayarla
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from backend.core import http_client
+from backend.database import init_db
+from backend.scrapers import WikimediaScraper
+from backend.services import DownloadService, DownloadQueueWorker
+from backend.services.download_queue import LEASE_SECONDS
+from backend.services.download_service import DOWNLOAD_WORKERS
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="DownloadQueue işçisi")
+    parser.add_argument("--workers", type=int, default=DOWNLOAD_WORKERS,
+                        help="Aynı anda çalışan en fazla indirme sayısı")
+    parser.add_argument("--bandwidth-kbps", type=int, default=None,
+                        help="Bu işçinin toplam indirme hızı sınırı (KB/s)")
+    parser.add_argument("--lease", type=int, default=LEASE_SECONDS,
+                        help="Kiralama süresi (saniye)")
+    parser.add_argument("--worker-id", default=None,
+                        help="İşçi kimliği (varsayılan: host:pid)")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace):
+    init_db()
+
+    download_service = DownloadService(
+        max_workers=args.workers,
+        bandwidth_limit=args.bandwidth_kbps * 1024 if args.bandwidth_kbps else None
+    )
+    worker = DownloadQueueWorker(
+        download_service,
+        WikimediaScraper(),
+        worker_id=args.worker_id,
+        lease_seconds=args.lease
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows: Ctrl+C KeyboardInterrupt olarak gelir
+            pass
+
+    worker.start()
+    print(f"⬇️ İndirme işçisi başladı ({worker.worker_id}, {args.workers} eşzamanlı)")
+
+    try:
+        await stop.wait()
+    finally:
+        # Yarım kalan satırlar kuyruğa geri bırakılır
+        await worker.close()
+        await http_client.close()
+        print(f"🛑 İndirme işçisi durdu ({worker.worker_id})")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
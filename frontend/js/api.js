@@ -76,14 +76,35 @@ class ApiClient {
             params.append('category', options.category);
         }
 
+        if (options.cursor) {
+            params.append('cursor', options.cursor);
+        }
+
         return this.request(`/search?${params.toString()}`);
     }
 
     /**
      * Kategori bazlı görseller getir
+     * @param {string} cursor - Önceki yanıttaki next_cursor (sonraki sayfa)
+     */
+    async getCategoryImages(slug, limit = 50, cursor = null) {
+        const params = new URLSearchParams({ limit: limit });
+
+        if (cursor) {
+            params.append('cursor', cursor);
+        }
+
+        return this.request(`/category-images/${slug}?${params.toString()}`);
+    }
+
+    /**
+     * Wikimedia dosyaları için açıklama/lisans/yazar bilgisini toplu getir
+     * @param {string[]} titles - Dosya başlıkları (File:...)
      */
-    async getCategoryImages(slug, limit = 50) {
-        return this.request(`/category-images/${slug}?limit=${limit}`);
+    async getImageMetadata(titles) {
+        const params = new URLSearchParams();
+        titles.forEach(title => params.append('titles', title));
+        return this.request(`/image-metadata?${params.toString()}`);
     }
 
     /**
@@ -112,7 +133,7 @@ class ApiClient {
     /**
      * Tek görsel indir
      */
-    async downloadImage(url, category, title = null) {
+    async downloadImage(url, category, title = null, sha1 = null) {
         const params = new URLSearchParams({
             url: url,
             category: category || 'diger',
@@ -122,13 +143,18 @@ class ApiClient {
             params.append('title', title);
         }
 
+        // Aynı içerik başka kategoride indirilmişse sunucu tekrar indirmez
+        if (sha1) {
+            params.append('sha1', sha1);
+        }
+
         return this.request(`/download?${params.toString()}`, {
             method: 'POST',
         });
     }
 
     /**
-     * Toplu indirme
+     * Toplu indirme (kuyruğa alır, iş kimliği döner)
      */
     async downloadBatch(images, categorySlug) {
         return this.request('/download-batch', {
@@ -140,6 +166,34 @@ class ApiClient {
         });
     }
 
+    /**
+     * Toplu indirme işinin durumu
+     */
+    async getDownloadJob(jobId) {
+        return this.request(`/download-jobs/${encodeURIComponent(jobId)}`);
+    }
+
+    /**
+     * Kategorinin tamamını sunucuda ara ve indir (iş kimliği döner)
+     */
+    async startCategoryDownload(categorySlug, minWidth = 0, limit = 500) {
+        return this.request('/pipeline', {
+            method: 'POST',
+            body: JSON.stringify({
+                category_slug: categorySlug,
+                min_width: minWidth,
+                limit: limit,
+            }),
+        });
+    }
+
+    /**
+     * Arama + indirme işinin durumu
+     */
+    async getPipelineJob(jobId) {
+        return this.request(`/pipeline/${encodeURIComponent(jobId)}`);
+    }
+
     // ==================== İNDİRİLMİŞ GÖRSELLER ====================
 
     /**
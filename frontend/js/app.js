@@ -13,6 +13,7 @@ const state = {
     categories: [],
     isLoading: false,
     minWidth: 600,
+    nextCursor: null,           // Sonraki sayfa için sunucu cursor'ı
 };
 
 // DOM Elements
@@ -110,6 +111,9 @@ function setupEventListeners() {
     // Yenile butonu
     document.getElementById('refreshBtn').addEventListener('click', refresh);
 
+    // Daha fazla yükle
+    document.getElementById('loadMoreBtn').addEventListener('click', loadMore);
+
     // Koleksiyon menüsü (İndirilenler, Favoriler, Videolar)
     document.querySelectorAll('.category-item[data-view]').forEach(item => {
         item.addEventListener('click', () => {
@@ -186,6 +190,7 @@ async function selectCategory(category) {
     // UI güncelle
     updateActiveCategory(category.slug);
     setPageTitle(category.name, `${category.icon} ${category.description || ''}`);
+    showCategoryDownloadButton();
 
     // Görselleri yükle
     await loadCategoryImages(category.slug);
@@ -202,6 +207,7 @@ function updateActiveCategory(slug) {
 
 async function loadCategoryImages(slug) {
     showLoading('Görseller yükleniyor...');
+    setNextCursor(null);
 
     try {
         const result = await api.getCategoryImages(slug, 100);
@@ -209,6 +215,7 @@ async function loadCategoryImages(slug) {
         if (result.success) {
             state.images = result.images || [];
             renderImages(state.images);
+            setNextCursor(result.next_cursor);
 
             if (state.images.length === 0) {
                 showEmptyState('Bu kategoride henüz görsel yok', '📭');
@@ -241,6 +248,7 @@ async function handleSearch() {
 
     // Kategori seçimini temizle
     updateActiveCategory(null);
+    setNextCursor(null);
     setPageTitle(`"${query}" Araması`, 'Görseller ve videolar aranıyor...');
 
     showLoading('Aranıyor...');
@@ -274,6 +282,7 @@ async function handleSearch() {
 
         const images = imageResult.success ? (imageResult.images || []) : [];
         const videos = videoResult.success ? (videoResult.videos || []) : [];
+        state.searchNextCursor = imageResult.success ? imageResult.next_cursor : null;
 
         // Sonuçları state'e kaydet
         state.searchResultImages = images;
@@ -338,9 +347,11 @@ function switchSearchTab(tabName) {
             });
         }
         elements.downloadSelectedBtn.disabled = state.selectedImages.size === 0;
+        setNextCursor(state.searchNextCursor);
 
     } else if (tabName === 'videos') {
         const videos = state.searchResultVideos || [];
+        setNextCursor(null);
 
         if (videos.length === 0) {
             showEmptyState('Video bulunamadı', '🎬');
@@ -414,6 +425,7 @@ function clearSearch() {
     } else {
         state.images = [];
         renderImages([]);
+        setNextCursor(null);
         setPageTitle('Aramaya Başla', 'WW2 görselleri arayın veya kategorilere göz atın');
         showEmptyState();
     }
@@ -439,6 +451,60 @@ function renderImages(images) {
     updateSelectionUI();
 }
 
+function setNextCursor(cursor) {
+    state.nextCursor = cursor || null;
+    elements.loadMoreContainer.classList.toggle('hidden', !state.nextCursor);
+}
+
+async function loadMore() {
+    if (!state.nextCursor || state.isLoading) return;
+
+    const btn = document.getElementById('loadMoreBtn');
+    btn.disabled = true;
+    state.isLoading = true;
+
+    try {
+        let result;
+        if (state.currentView === 'category') {
+            result = await api.getCategoryImages(state.currentCategory, 100, state.nextCursor);
+        } else if (state.currentView === 'search') {
+            result = await api.searchImages(state.currentQuery, {
+                limit: 50,
+                minWidth: state.minWidth,
+                cursor: state.nextCursor,
+            });
+        } else {
+            return;
+        }
+
+        if (result.success) {
+            // Sayfalar arasında tekrar eden görselleri atla
+            const known = new Set(state.images.map(img => img.source_id));
+            const fresh = (result.images || []).filter(img => !known.has(img.source_id));
+
+            fresh.forEach(image => {
+                const card = createImageCard(image, state.selectedImages.has(image.source_id));
+                elements.imageGrid.appendChild(card);
+            });
+            state.images = state.images.concat(fresh);
+
+            if (state.currentView === 'search') {
+                state.searchResultImages = state.images;
+                state.searchNextCursor = result.next_cursor;
+                elements.tabImageCount.textContent = state.images.length;
+            }
+            setNextCursor(result.next_cursor);
+            updateSelectionUI();
+        }
+    } catch (error) {
+        console.error('Sonraki sayfa yüklenemedi:', error);
+        showToast('Daha fazla görsel yüklenemedi', 'error');
+    } finally {
+        state.isLoading = false;
+        btn.disabled = false;
+    }
+}
+
 function handleImageGridClick(e) {
     const card = e.target.closest('.image-card');
     if (!card) return;
@@ -519,11 +585,39 @@ function openImageModal(card) {
         const imageData = JSON.parse(card.dataset.imageData);
         populateImageModal(imageData);
         showModal('imageModal');
+
+        // Açıklama/lisans/yazar arama sonuçlarında gelmez; modal açılınca yükle
+        if (imageData.page_title && imageData.metadata_loaded === false) {
+            loadImageMetadata(card, imageData);
+        }
     } catch (error) {
         console.error('Modal açılamadı:', error);
     }
 }
 
+async function loadImageMetadata(card, imageData) {
+    try {
+        const result = await api.getImageMetadata([imageData.page_title]);
+        const meta = result.metadata && result.metadata[imageData.page_title];
+        if (!meta) return;
+
+        const enriched = { ...imageData, ...meta };
+        card.dataset.imageData = JSON.stringify(enriched);
+
+        const index = state.images.findIndex(img => img.source_id === imageData.source_id);
+        if (index !== -1) state.images[index] = enriched;
+
+        // Modal hâlâ aynı görseli gösteriyorsa güncelle
+        const modal = document.getElementById('imageModal');
+        const current = JSON.parse(modal.dataset.currentImage || '{}');
+        if (current.source_id === imageData.source_id) {
+            populateImageModal(enriched);
+        }
+    } catch (error) {
+        console.error('Görsel bilgileri yüklenemedi:', error);
+    }
+}
+
 async function downloadCurrentImage() {
     const modal = document.getElementById('imageModal');
     const imageData = JSON.parse(modal.dataset.currentImage);
@@ -537,7 +631,8 @@ async function downloadCurrentImage() {
         const result = await api.downloadImage(
             imageData.source_url,
             category,
-            imageData.title
+            imageData.title,
+            imageData.sha1
         );
 
         if (result.success) {
@@ -589,7 +684,8 @@ async function downloadSelected() {
     updateDownloadProgress(0, selectedImageData.length, 'Hazırlanıyor...');
 
     try {
-        const result = await api.downloadBatch(selectedImageData, category);
+        const queued = await api.downloadBatch(selectedImageData, category);
+        const result = await waitForDownloadJob(queued.job_id);
 
         if (result.success) {
             updateDownloadProgress(
@@ -623,6 +719,57 @@ async function downloadSelected() {
     }
 }
 
+async function downloadWholeCategory() {
+    const category = state.currentCategory;
+    if (!category) return;
+
+    showModal('downloadModal');
+    updateDownloadProgress(0, 1, 'Aranıyor...');
+
+    try {
+        // Arama ve indirme sunucuda birlikte yürür; sonuçlar tarayıcıya gelmez
+        const started = await api.startCategoryDownload(category, state.minWidth);
+        let job;
+        while (true) {
+            job = await api.getPipelineJob(started.job_id);
+            const finished = job.downloaded + job.skipped + job.failed;
+            const status = job.search === 'running'
+                ? `Aranıyor... ${job.found} görsel bulundu`
+                : `İndiriliyor... %${job.progress}`;
+            updateDownloadProgress(finished, Math.max(job.total, 1), status);
+
+            if (job.done) break;
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+
+        updateDownloadProgress(job.total, Math.max(job.total, 1), 'Tamamlandı!');
+        setTimeout(() => {
+            hideModal('downloadModal');
+            showToast(
+                `${job.downloaded} görsel indirildi, ${job.skipped} atlandı`,
+                job.failed > 0 ? 'warning' : 'success'
+            );
+            loadStats();
+        }, 1000);
+    } catch (error) {
+        console.error('Kategori indirme hatası:', error);
+        hideModal('downloadModal');
+        showToast('İndirme sırasında hata oluştu', 'error');
+    }
+}
+
+async function waitForDownloadJob(jobId) {
+    // İndirme sunucuda kuyruktan yürür; iş bitene kadar durumu yokla
+    while (true) {
+        const job = await api.getDownloadJob(jobId);
+        const finished = job.downloaded + job.skipped + job.failed;
+        updateDownloadProgress(finished, job.total, `İndiriliyor... %${job.progress}`);
+
+        if (job.done) return job;
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
 // ==================== İNDİRİLMİŞ GÖRSELLER ====================
 
 async function loadDownloadedImages() {
@@ -631,6 +778,7 @@ async function loadDownloadedImages() {
     state.currentQuery = '';
 
     updateActiveCategory(null);
+    setNextCursor(null);
     document.querySelector('[data-view="downloaded"]').classList.add('active');
     setPageTitle('İndirilen Görseller', 'Yerel koleksiyonunuz');
 
@@ -674,6 +822,7 @@ async function loadFavorites() {
     state.currentQuery = '';
 
     updateActiveCategory(null);
+    setNextCursor(null);
     document.querySelector('[data-view="favorites"]').classList.add('active');
     setPageTitle('Favoriler', 'Beğendiğiniz görseller');
 
@@ -688,6 +837,7 @@ async function loadVideos(query) {
     state.currentQuery = query;
 
     updateActiveCategory(null);
+    setNextCursor(null);
     // Video item'ı aktif yap
     document.querySelectorAll('[data-view="videos"]').forEach(item => {
         item.classList.remove('active');
@@ -823,6 +973,24 @@ function showOpenFolderButton() {
     headerActions.insertBefore(btn, headerActions.firstChild);
 }
 
+function showCategoryDownloadButton() {
+    hideCategoryDownloadButton();
+
+    const btn = document.createElement('button');
+    btn.id = 'downloadCategoryBtn';
+    btn.className = 'btn btn-secondary';
+    btn.innerHTML = '<span class="btn-icon">📥</span><span class="btn-text">Tümünü İndir</span>';
+    btn.onclick = downloadWholeCategory;
+
+    const headerActions = document.querySelector('.header-actions');
+    headerActions.insertBefore(btn, headerActions.firstChild);
+}
+
+function hideCategoryDownloadButton() {
+    const btn = document.getElementById('downloadCategoryBtn');
+    if (btn) btn.remove();
+}
+
 function hideOpenFolderButton() {
     const btn = document.getElementById('openFolderBtn');
     if (btn) btn.remove();
@@ -847,6 +1015,10 @@ function setPageTitle(title, subtitle = '') {
     if (state.currentView !== 'downloaded') {
         hideOpenFolderButton();
     }
+    // Kategori dışındaki görünümlerde toplu kategori indirme butonu gizlenir
+    if (state.currentView !== 'category') {
+        hideCategoryDownloadButton();
+    }
     elements.pageTitle.textContent = title;
     elements.pageSubtitle.textContent = subtitle;
 }